@@ -6,5 +6,5 @@ class ApiConfig(AppConfig):
     name = 'api'
     verbose_name = 'REST API'
 
-
-
+    def ready(self):
+        from . import signals  # noqa: F401
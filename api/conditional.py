@@ -0,0 +1,75 @@
+"""
+GET có điều kiện (ETag) cho các API ít thay đổi
+ETag tính từ phiên bản các model mà dữ liệu phụ thuộc (equipment_management.versions), user và URL,
+nên khi client gửi If-None-Match khớp thì trả 304 chỉ sau 1 query đọc phiên bản, không query và serialize dữ liệu
+Không dùng Last-Modified: phiên bản là bộ đếm, không phải thời điểm, và độ chính xác theo giây
+của If-Modified-Since bỏ sót các thay đổi trong cùng 1 giây
+"""
+import hashlib
+
+from django.utils import timezone
+from django.utils.cache import quote_etag
+from django.utils.http import parse_etags
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from rest_framework.response import Response
+
+from equipment_management import versions
+
+
+class NotModified(APIException):
+    status_code = status.HTTP_304_NOT_MODIFIED
+
+
+def _strip_weak(etag):
+    return etag[2:] if etag.startswith('W/') else etag
+
+
+class ConditionalGetMixin:
+    """
+    Mixin cho ViewSet
+    etag_models: các model mà dữ liệu trả về phụ thuộc (kể cả model lồng/join, vd. Company cho company_name)
+    conditional_actions: các action GET được áp dụng
+    """
+    etag_models = ()
+    conditional_actions = ('list', 'retrieve')
+
+    def get_etag(self, request):
+        model_versions = versions.get_many(self.etag_models)
+        parts = [
+            request.get_full_path(),
+            str(request.user.pk),
+            # Bộ lọc theo ngày hiện tại (vd. gia hạn sắp hết hạn) đổi kết quả khi sang ngày mới
+            timezone.localdate().isoformat(),
+        ]
+        parts += [f'{model._meta.label_lower}={version}' for model, version in model_versions.items()]
+        return 'W/' + quote_etag(hashlib.sha1('|'.join(parts).encode()).hexdigest())
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self.etag = None
+        # Đồng bộ delta phụ thuộc thời điểm gọi (xem sync.py), không dùng ETag
+        if (request.method not in ('GET', 'HEAD') or self.action not in self.conditional_actions
+                or 'updated_since' in request.query_params):
+            return
+        self.etag = self.get_etag(request)
+
+        if_none_match = request.headers.get('If-None-Match')
+        if if_none_match:
+            etags = parse_etags(if_none_match)
+            if '*' in etags or _strip_weak(self.etag) in {_strip_weak(tag) for tag in etags}:
+                raise NotModified()
+
+    def handle_exception(self, exc):
+        if isinstance(exc, NotModified):
+            return Response(status=status.HTTP_304_NOT_MODIFIED)
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        etag = getattr(self, 'etag', None)
+        if etag and response.status_code in (status.HTTP_200_OK, status.HTTP_304_NOT_MODIFIED):
+            response['ETag'] = etag
+            # Dữ liệu theo user đăng nhập: proxy dùng chung không được cache
+            response['Cache-Control'] = 'private, no-cache'
+        return response
@@ -0,0 +1,100 @@
+"""
+Chọn field trả về theo request cho REST API
+?fields=id,name,code: chỉ trả các field này
+?expand=histories: thêm các field lồng khai báo trong Meta.expandable_fields (mặc định không trả)
+select_related/prefetch_related của queryset được dựng từ các field thực sự trả về,
+nên danh sách rút gọn không join/prefetch thừa và số query không tăng theo số dòng
+"""
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
+
+
+def parse_names(value):
+    """'id, name,code' -> {'id', 'name', 'code'}, rỗng -> None"""
+    names = {name.strip() for name in (value or '').split(',') if name.strip()}
+    return names or None
+
+
+class DynamicFieldsMixin:
+    """
+    Mixin cho ModelSerializer, nhận thêm 2 tham số:
+    fields: tập tên field được trả về (None = tất cả), expand: tập tên field lồng được thêm vào
+    Meta.expandable_fields = {'tên field': (SerializerClass, {tham số khởi tạo})}
+    """
+
+    def __init__(self, *args, fields=None, expand=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        expand = set(expand or ())
+        for name, (serializer_class, options) in getattr(self.Meta, 'expandable_fields', {}).items():
+            if name in expand:
+                self.fields[name] = serializer_class(read_only=True, **options)
+        if fields:
+            # Field được expand luôn trả về, kể cả khi không có trong ?fields=
+            for name in set(self.fields) - set(fields) - expand:
+                self.fields.pop(name)
+
+
+def _select_path(model, source_attrs):
+    """Đường join của 1 field theo source, vd. ['company', 'name'] -> 'company', ['get_region_display'] -> None"""
+    path = []
+    for attr in source_attrs[:-1]:
+        try:
+            field = model._meta.get_field(attr)
+        except FieldDoesNotExist:
+            break
+        if not (field.many_to_one or field.one_to_one):
+            break
+        path.append(attr)
+        model = field.related_model
+    return '__'.join(path) or None
+
+
+def related_lookups(serializer, model):
+    """(select_related, prefetch_related) cần để serialize các field của serializer mà không query thêm theo từng dòng"""
+    select = set()
+    prefetch = []
+    for field in serializer.fields.values():
+        if field.write_only or field.source == '*':
+            continue
+        if isinstance(field, serializers.ListSerializer):
+            # Serializer lồng many=True (vd. histories): prefetch, bên trong tự join các field của nó
+            related_model = model._meta.get_field(field.source).related_model
+            child_select, child_prefetch = related_lookups(field.child, related_model)
+            queryset = related_model._default_manager.select_related(*child_select).prefetch_related(*child_prefetch)
+            prefetch.append(Prefetch(field.source, queryset=queryset))
+        elif isinstance(field, serializers.ManyRelatedField):
+            prefetch.append(field.source)
+        else:
+            path = _select_path(model, field.source_attrs)
+            if path:
+                select.add(path)
+    return sorted(select), prefetch
+
+
+def optimize_queryset(queryset, serializer):
+    select, prefetch = related_lookups(serializer, queryset.model)
+    if select:
+        queryset = queryset.select_related(*select)
+    if prefetch:
+        queryset = queryset.prefetch_related(*prefetch)
+    return queryset
+
+
+class SparseFieldsMixin:
+    """
+    Mixin cho ViewSet: truyền ?fields=/?expand= vào serializer (serializer dùng DynamicFieldsMixin)
+    và join/prefetch queryset theo các field sẽ trả về
+    ?fields= chỉ áp dụng cho GET (request ghi vẫn nhận đủ field)
+    """
+
+    def get_serializer(self, *args, **kwargs):
+        params = self.request.query_params
+        if self.request.method in SAFE_METHODS:
+            kwargs.setdefault('fields', parse_names(params.get('fields')))
+        kwargs.setdefault('expand', parse_names(params.get('expand')))
+        return super().get_serializer(*args, **kwargs)
+
+    def get_queryset(self):
+        return optimize_queryset(super().get_queryset(), self.get_serializer())
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:06
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DeletionLog',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model', models.CharField(max_length=100, verbose_name='Model')),
+                ('object_id', models.BigIntegerField(blank=True, null=True, verbose_name='ID')),
+                ('deleted_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Thời điểm xóa')),
+            ],
+            options={
+                'verbose_name': 'Nhật ký xóa',
+                'verbose_name_plural': 'Nhật ký xóa',
+                'indexes': [models.Index(fields=['model', 'deleted_at', 'id'], name='api_deletio_model_7699cf_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DataVersion',
+            fields=[
+                ('key', models.CharField(max_length=100, primary_key=True, serialize=False, verbose_name='Khóa')),
+                ('version', models.BigIntegerField(default=0, verbose_name='Phiên bản')),
+            ],
+            options={
+                'verbose_name': 'Phiên bản dữ liệu',
+                'verbose_name_plural': 'Phiên bản dữ liệu',
+            },
+        ),
+    ]
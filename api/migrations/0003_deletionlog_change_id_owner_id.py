@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0002_dataversion'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='deletionlog',
+            name='api_deletio_model_7699cf_idx',
+        ),
+        migrations.AddField(
+            model_name='deletionlog',
+            name='change_id',
+            field=models.BigIntegerField(default=0, verbose_name='Số thứ tự thay đổi'),
+        ),
+        migrations.AddField(
+            model_name='deletionlog',
+            name='owner_id',
+            field=models.BigIntegerField(blank=True, null=True, verbose_name='ID người sở hữu'),
+        ),
+        migrations.AddIndex(
+            model_name='deletionlog',
+            index=models.Index(fields=['model', 'change_id', 'id'], name='api_deletio_model_09c817_idx'),
+        ),
+    ]
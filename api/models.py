@@ -0,0 +1,65 @@
+from django.db import models, transaction
+from django.utils import timezone
+
+from equipment_management import versions
+
+
+class DeletionLog(models.Model):
+    """
+    Nhật ký xóa cho đồng bộ delta (?updated_since=) của mobile app: mỗi dòng bị xóa để lại 1 tombstone
+    object_id rỗng = toàn bộ dữ liệu của model đã bị xóa (vd. xóa hết log NAS), client phải tải lại từ đầu
+    """
+    model = models.CharField(max_length=100, verbose_name="Model")
+    object_id = models.BigIntegerField(null=True, blank=True, verbose_name="ID")
+    # User được xem dòng đã xóa (vd. người yêu cầu ticket), rỗng = không giới hạn theo user
+    owner_id = models.BigIntegerField(null=True, blank=True, verbose_name="ID người sở hữu")
+    deleted_at = models.DateTimeField(default=timezone.now, verbose_name="Thời điểm xóa")
+    # Cùng dãy số thứ tự thay đổi với các dòng của model (xem api/sync.py)
+    change_id = models.BigIntegerField(default=0, verbose_name="Số thứ tự thay đổi")
+
+    class Meta:
+        verbose_name = "Nhật ký xóa"
+        verbose_name_plural = "Nhật ký xóa"
+        indexes = [
+            models.Index(fields=['model', 'change_id', 'id']),
+        ]
+
+    def __str__(self):
+        return f"{self.model} #{self.object_id or '*'} ({self.deleted_at:%d/%m/%Y %H:%M})"
+
+    @classmethod
+    def record(cls, model, object_id=None, owner_id=None, using='default'):
+        """Ghi 1 tombstone (object_id=None: đánh dấu xóa toàn bộ model)"""
+        with transaction.atomic(using=using):
+            return cls.objects.using(using).create(
+                model=model._meta.label_lower, object_id=object_id, owner_id=owner_id,
+                change_id=versions.next_change_id(model, using),
+            )
+
+    @classmethod
+    def record_many(cls, model, object_ids, using='default'):
+        """Ghi tombstone cho nhiều dòng bị xóa cùng lúc (xóa hàng loạt không qua signals), dùng chung 1 số thứ tự thay đổi"""
+        if not object_ids:
+            return []
+        with transaction.atomic(using=using):
+            change_id = versions.next_change_id(model, using)
+            return cls.objects.using(using).bulk_create([
+                cls(model=model._meta.label_lower, object_id=object_id, change_id=change_id)
+                for object_id in object_ids
+            ], batch_size=1000)
+
+
+class DataVersion(models.Model):
+    """
+    Phiên bản dữ liệu dùng chung cho mọi process (gunicorn worker, run_workers...), xem equipment_management/versions.py
+    key: model (vd. 'equipment.equipment') hoặc nhóm dữ liệu được cache; version tăng 1 mỗi lần dữ liệu đổi
+    """
+    key = models.CharField(max_length=100, primary_key=True, verbose_name="Khóa")
+    version = models.BigIntegerField(default=0, verbose_name="Phiên bản")
+
+    class Meta:
+        verbose_name = "Phiên bản dữ liệu"
+        verbose_name_plural = "Phiên bản dữ liệu"
+
+    def __str__(self):
+        return f"{self.key} = {self.version}"
@@ -0,0 +1,75 @@
+"""
+Phân trang cho REST API
+"""
+import hashlib
+
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from equipment_management.pagination import InvalidCursor, KeysetPaginator
+
+
+class KeysetCursorPagination(PageNumberPagination):
+    """
+    Mặc định phân trang theo số trang như cũ; có ?cursor= (trang đầu để rỗng) thì phân trang keyset
+    theo ordering (không COUNT(*), không OFFSET: trang sâu tốn như trang đầu)
+    Cursor gắn với bộ lọc (các query param khác): đổi bộ lọc mà dùng lại cursor cũ thì trả 404
+    ?page_size= (tối đa max_page_size) cho các công cụ xuất dữ liệu lấy mỗi lần nhiều dòng
+    """
+    # Trùng timestamp thì id tăng dần: khớp thứ tự của index (..., -timestamp) (id/rowid đi kèm index tăng dần), không phải sort thêm
+    ordering = ('-timestamp', 'id')
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+    # Các query param không thuộc bộ lọc
+    pagination_params = ('cursor', 'page', 'page_size', 'format')
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset_page = None
+        if self.cursor_query_param not in request.query_params:
+            return super().paginate_queryset(queryset, request, view)
+
+        self.request = request
+        paginator = KeysetPaginator(
+            queryset, self.get_page_size(request), ordering=self.ordering,
+            with_count=False, scope=self.get_scope(request),
+        )
+        cursor = request.query_params[self.cursor_query_param]
+        if cursor:
+            try:
+                paginator.decode(cursor)
+            except InvalidCursor:
+                raise NotFound('Cursor không hợp lệ')
+        self.keyset_page = paginator.get_page(cursor)
+        return list(self.keyset_page)
+
+    def get_page_size(self, request):
+        if self.cursor_query_param not in request.query_params:
+            # Phân trang theo số trang giữ cỡ trang cố định (trang lớn vẫn phải COUNT + OFFSET)
+            return self.page_size
+        return super().get_page_size(request)
+
+    def get_scope(self, request):
+        """Dấu vân tay của bộ lọc hiện tại"""
+        filters = sorted(
+            (key, value) for key, values in request.query_params.lists()
+            if key not in self.pagination_params for value in values
+        )
+        return hashlib.sha1(repr(filters).encode()).hexdigest()[:16]
+
+    def get_cursor_link(self, cursor):
+        if cursor is None:
+            return None
+        url = remove_query_param(self.request.build_absolute_uri(), 'page')
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def get_paginated_response(self, data):
+        if self.keyset_page is None:
+            return super().get_paginated_response(data)
+        return Response({
+            'next': self.get_cursor_link(self.keyset_page.next_cursor),
+            'previous': self.get_cursor_link(self.keyset_page.previous_cursor),
+            'results': data,
+        })
@@ -3,13 +3,14 @@ Serializers cho REST API
 """
 from rest_framework import serializers
 from django.contrib.auth.models import User
-from equipment.models import Company, Equipment, EquipmentHistory
+from equipment.models import Company, Equipment, EquipmentAssignment, EquipmentHistory
 from nas_management.models import NASConfig, NASLog
 from tickets.models import Ticket, TicketCategory, Department
 from renewals.models import Renewal, RenewalType
+from .fieldsets import DynamicFieldsMixin
 
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """Serializer cho User"""
     class Meta:
         model = User
@@ -17,7 +18,7 @@ class UserSerializer(serializers.ModelSerializer):
         read_only_fields = ['id']
 
 
-class CompanySerializer(serializers.ModelSerializer):
+class CompanySerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """Serializer cho Company"""
     class Meta:
         model = Company
@@ -25,7 +26,7 @@ class CompanySerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at', 'updated_at']
 
 
-class EquipmentHistorySerializer(serializers.ModelSerializer):
+class EquipmentHistorySerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """Serializer cho EquipmentHistory"""
     action_type_display = serializers.CharField(source='get_action_type_display', read_only=True)
     signed_by_name = serializers.CharField(source='signed_by.get_full_name', read_only=True)
@@ -39,7 +40,22 @@ class EquipmentHistorySerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at']
 
 
-class EquipmentSerializer(serializers.ModelSerializer):
+class EquipmentAssignmentSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    """Serializer cho sổ giao máy"""
+    equipment_name = serializers.CharField(source='equipment.name', read_only=True)
+    equipment_code = serializers.CharField(source='equipment.code', read_only=True)
+    user_name = serializers.CharField(source='user.get_full_name', read_only=True)
+    
+    class Meta:
+        model = EquipmentAssignment
+        fields = [
+            'id', 'equipment', 'equipment_name', 'equipment_code',
+            'user', 'user_name', 'start_date', 'end_date'
+        ]
+        read_only_fields = fields
+
+
+class EquipmentSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """Serializer cho Equipment"""
     company_name = serializers.CharField(source='company.name', read_only=True)
     company_code = serializers.CharField(source='company.code', read_only=True)
@@ -47,7 +63,6 @@ class EquipmentSerializer(serializers.ModelSerializer):
     region_display = serializers.CharField(source='get_region_display', read_only=True)
     current_user_name = serializers.CharField(source='current_user.get_full_name', read_only=True)
     dxdiag_file_url = serializers.SerializerMethodField()
-    history = EquipmentHistorySerializer(many=True, read_only=True)
     
     class Meta:
         model = Equipment
@@ -61,9 +76,11 @@ class EquipmentSerializer(serializers.ModelSerializer):
             'monitor_model', 'technical_specs', 'documentation',
             'dxdiag_file', 'dxdiag_file_url', 'current_user',
             'current_user_name', 'is_active', 'created_at',
-            'updated_at', 'history'
+            'updated_at'
         ]
         read_only_fields = ['id', 'created_at', 'updated_at']
+        # Lịch sử chỉ trả khi có ?expand=histories
+        expandable_fields = {'histories': (EquipmentHistorySerializer, {'many': True})}
     
     def get_dxdiag_file_url(self, obj):
         """Lấy URL của file DxDiag nếu có"""
@@ -74,7 +91,7 @@ class EquipmentSerializer(serializers.ModelSerializer):
         return None
 
 
-class EquipmentListSerializer(serializers.ModelSerializer):
+class EquipmentListSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """Serializer rút gọn cho danh sách Equipment"""
     company_name = serializers.CharField(source='company.name', read_only=True)
     equipment_type_display = serializers.CharField(source='get_equipment_type_display', read_only=True)
@@ -87,9 +104,10 @@ class EquipmentListSerializer(serializers.ModelSerializer):
             'equipment_type', 'equipment_type_display',
             'current_user_name', 'is_active', 'created_at'
         ]
+        expandable_fields = {'histories': (EquipmentHistorySerializer, {'many': True})}
 
 
-class NASConfigSerializer(serializers.ModelSerializer):
+class NASConfigSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """Serializer cho NASConfig"""
     class Meta:
         model = NASConfig
@@ -103,7 +121,7 @@ class NASConfigSerializer(serializers.ModelSerializer):
         }
 
 
-class NASLogSerializer(serializers.ModelSerializer):
+class NASLogSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """Serializer cho NASLog"""
     nas_name = serializers.CharField(source='nas.name', read_only=True)
     log_type_display = serializers.CharField(source='get_log_type_display', read_only=True)
@@ -120,7 +138,7 @@ class NASLogSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at']
 
 
-class DepartmentSerializer(serializers.ModelSerializer):
+class DepartmentSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """Serializer cho Department"""
     class Meta:
         model = Department
@@ -128,7 +146,7 @@ class DepartmentSerializer(serializers.ModelSerializer):
         read_only_fields = ['id']
 
 
-class TicketCategorySerializer(serializers.ModelSerializer):
+class TicketCategorySerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """Serializer cho TicketCategory"""
     class Meta:
         model = TicketCategory
@@ -136,7 +154,7 @@ class TicketCategorySerializer(serializers.ModelSerializer):
         read_only_fields = ['id']
 
 
-class TicketSerializer(serializers.ModelSerializer):
+class TicketSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """Serializer cho Ticket"""
     requester_name = serializers.CharField(source='requester.get_full_name', read_only=True)
     company_name = serializers.CharField(source='company.name', read_only=True)
@@ -156,15 +174,15 @@ class TicketSerializer(serializers.ModelSerializer):
             'category_name', 'priority', 'priority_display',
             'status', 'status_display', 'assigned_to',
             'assigned_to_name', 'created_at', 'updated_at',
-            'resolved_at', 'closed_at'
+            'resolved_at'
         ]
         read_only_fields = [
             'id', 'ticket_number', 'created_at', 'updated_at',
-            'resolved_at', 'closed_at'
+            'resolved_at'
         ]
 
 
-class RenewalTypeSerializer(serializers.ModelSerializer):
+class RenewalTypeSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """Serializer cho RenewalType"""
     class Meta:
         model = RenewalType
@@ -172,7 +190,7 @@ class RenewalTypeSerializer(serializers.ModelSerializer):
         read_only_fields = ['id']
 
 
-class RenewalSerializer(serializers.ModelSerializer):
+class RenewalSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """Serializer cho Renewal"""
     renewal_type_name = serializers.CharField(source='renewal_type.name', read_only=True)
     company_name = serializers.CharField(source='company.name', read_only=True)
@@ -0,0 +1,57 @@
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from equipment.models import Company, Equipment, EquipmentHistory
+from equipment_management import versions
+from nas_management.models import NASConfig, NASLog
+from renewals.models import Renewal, RenewalType
+from tickets.models import Department, Ticket, TicketCategory
+
+from .models import DeletionLog
+
+# Các model có phiên bản dùng làm ETag của API (xem conditional.py)
+VERSIONED_MODELS = [User, Company, Equipment, EquipmentHistory, Department, TicketCategory, Renewal, RenewalType]
+
+
+@receiver(post_save, sender=Equipment)
+@receiver(post_save, sender=Ticket)
+@receiver(post_save, sender=NASLog)
+def assign_change_id(sender, instance, raw=False, using='default', **kwargs):
+    """Gán số thứ tự thay đổi mới cho dòng vừa lưu (đồng bộ delta, xem sync.py)"""
+    if raw:
+        return
+    with transaction.atomic(using=using):
+        instance.change_id = versions.next_change_id(sender, using)
+        sender.objects.using(using).filter(pk=instance.pk).update(change_id=instance.change_id)
+
+
+@receiver(post_delete, sender=Equipment)
+@receiver(post_delete, sender=Ticket)
+def record_deletion(sender, instance, using='default', **kwargs):
+    """Ghi tombstone để lần đồng bộ delta sau báo cho client xóa dòng này (ticket chỉ báo cho người yêu cầu và staff)"""
+    owner_id = instance.requester_id if sender is Ticket else None
+    DeletionLog.record(sender, instance.pk, owner_id=owner_id, using=using)
+
+
+@receiver(post_delete, sender=NASConfig)
+def record_nas_logs_deletion(sender, instance, using='default', **kwargs):
+    """
+    Xóa NAS thì log của NAS bị xóa theo (cascade): đánh dấu xóa toàn bộ log thay vì ghi tombstone từng dòng
+    (không gắn signal cho NASLog để xóa hàng loạt log vẫn chạy 1 câu DELETE)
+    """
+    DeletionLog.record(NASLog, using=using)
+
+
+def bump_model_version(sender, update_fields=None, using='default', **kwargs):
+    """Dòng được thêm/sửa/xóa thì đổi phiên bản của model (ETag cũ hết hiệu lực)"""
+    if sender is User and update_fields and set(update_fields) <= {'last_login'}:
+        # Đăng nhập chỉ cập nhật last_login, không có trong dữ liệu API
+        return
+    versions.bump(sender, using=using)
+
+
+for model in VERSIONED_MODELS:
+    post_save.connect(bump_model_version, sender=model, dispatch_uid=f'api_version_save_{model._meta.label_lower}')
+    post_delete.connect(bump_model_version, sender=model, dispatch_uid=f'api_version_delete_{model._meta.label_lower}')
@@ -0,0 +1,107 @@
+"""
+Đồng bộ delta cho mobile app: ?updated_since=<cursor> chỉ trả các dòng thay đổi sau cursor và tombstone các dòng đã xóa
+Lần đầu gửi ?updated_since= (rỗng) để tải toàn bộ; mỗi response có cursor mới cho lần sau,
+has_more=true thì gọi tiếp ngay với cursor đó
+
+Thứ tự thay đổi theo change_id (không theo thời điểm ghi): mỗi transaction thêm/sửa/xóa dòng lấy số từ
+equipment_management.versions.next_change_id, số lớn hơn luôn commit sau, nên cursor không vượt qua
+dòng của transaction commit chậm. Code ghi không qua signals (bulk_create/bulk_update/update) phải tự gán change_id
+"""
+from django.db.models import Q
+from rest_framework import status
+from rest_framework.response import Response
+
+from equipment_management import versions
+from equipment_management.pagination import InvalidCursor, decode_cursor, encode_cursor
+from .models import DeletionLog
+
+# Số dòng thay đổi / tombstone tối đa mỗi response
+SYNC_LIMIT = 500
+
+CHANGE_FIELD = 'change_id'
+
+
+def _key_filter(key):
+    """Các dòng đứng sau khóa (change_id, id)"""
+    change_id, pk = key
+    return Q(change_id__gt=change_id) | Q(change_id=change_id, pk__gt=pk)
+
+
+def _valid_key(key):
+    return isinstance(key, list) and len(key) == 2 and all(type(value) is int and 0 <= value < 2 ** 63 for value in key)
+
+
+def changes(queryset, tombstones, state, limit=SYNC_LIMIT):
+    """
+    (các dòng thay đổi, id đã xóa, reset, has_more, state mới) sau state của cursor
+    tombstones: DeletionLog của model mà user được xem
+    """
+    rows_key = state.get('r') if _valid_key(state.get('r')) else None
+    deleted_key = state.get('d') if _valid_key(state.get('d')) else None
+
+    tombstones = tombstones.order_by(CHANGE_FIELD, 'id')
+    reset = False
+    if deleted_key and tombstones.filter(_key_filter(deleted_key), object_id__isnull=True).exists():
+        # Toàn bộ dữ liệu đã bị xóa sau lần đồng bộ trước: tải lại từ đầu
+        reset = True
+        rows_key = None
+    if not deleted_key or reset:
+        # Tải từ đầu thì không cần tombstone cũ, chỉ cần các lần xóa từ lúc này
+        deleted_key = [versions.last_change_id(queryset.model), 0]
+
+    rows = queryset.order_by(CHANGE_FIELD, 'pk')
+    if rows_key:
+        rows = rows.filter(_key_filter(rows_key))
+    rows = list(rows[:limit + 1])
+    deleted = list(
+        tombstones.filter(_key_filter(deleted_key), object_id__isnull=False)
+        .values_list(CHANGE_FIELD, 'id', 'object_id')[:limit + 1]
+    )
+
+    has_more = len(rows) > limit or len(deleted) > limit
+    rows = rows[:limit]
+    deleted = deleted[:limit]
+    if rows:
+        rows_key = [rows[-1].change_id, rows[-1].pk]
+    if deleted:
+        deleted_key = [deleted[-1][0], deleted[-1][1]]
+    return rows, [object_id for _, _, object_id in deleted], reset, has_more, {'r': rows_key, 'd': deleted_key}
+
+
+def sync_response(view, queryset, tombstones, cursor):
+    """Response đồng bộ delta cho 1 ViewSet (serialize bằng serializer của view)"""
+    state = {}
+    if cursor:
+        try:
+            state = decode_cursor(cursor)
+        except InvalidCursor:
+            return Response({'error': 'updated_since không hợp lệ'}, status=status.HTTP_400_BAD_REQUEST)
+
+    rows, deleted, reset, has_more, state = changes(queryset, tombstones, state)
+
+    serializer = view.get_serializer(rows, many=True)
+    return Response({
+        'results': serializer.data,
+        'deleted': deleted,
+        'reset': reset,
+        'has_more': has_more,
+        'cursor': encode_cursor(state),
+    })
+
+
+class DeltaSyncMixin:
+    """
+    Mixin cho ViewSet: list nhận thêm ?updated_since=<cursor> (xem sync_response)
+    Model phải có cột change_id; get_queryset giới hạn dòng theo user thì get_tombstones cũng phải giới hạn tương ứng
+    """
+
+    def get_tombstones(self, tombstones):
+        """DeletionLog của model mà user được xem (mặc định: tất cả)"""
+        return tombstones
+
+    def list(self, request, *args, **kwargs):
+        if 'updated_since' not in request.query_params:
+            return super().list(request, *args, **kwargs)
+        queryset = self.filter_queryset(self.get_queryset())
+        tombstones = self.get_tombstones(DeletionLog.objects.filter(model=queryset.model._meta.label_lower))
+        return sync_response(self, queryset, tombstones, request.query_params['updated_since'])
@@ -0,0 +1,310 @@
+from datetime import date, timedelta
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from equipment.models import Company, Equipment, EquipmentHistory
+from nas_management import log_sync, rollups
+from nas_management.models import NASConfig, NASLog
+from tickets.models import Company as TicketCompany, Ticket
+
+
+class EquipmentFieldsTests(TestCase):
+    """?fields= / ?expand=histories của API thiết bị"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.staff = User.objects.create_user('staff', is_staff=True)
+        self.client.force_authenticate(self.staff)
+
+    def create_equipment(self, count):
+        for index in range(Equipment.objects.count(), Equipment.objects.count() + count):
+            company = Company.objects.create(name=f'Công ty {index}', code=f'C{index}')
+            user = User.objects.create_user(f'user{index}', first_name='Nguyễn', last_name=f'Văn {index}')
+            equipment = Equipment.objects.create(
+                company=company, name=f'Máy {index}', code=f'MN-{index:03d}',
+                equipment_type='desktop', current_user=user,
+            )
+            for action_type in ('user_assignment', 'repair'):
+                EquipmentHistory.objects.create(
+                    equipment=equipment, action_date=date(2025, 1, 1), action_type=action_type,
+                    description=f'{action_type} {index}', signed_by='Trần Văn B',
+                )
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries), response.json()
+
+    def test_query_count_does_not_grow_with_page_size(self):
+        urls = [
+            '/api/equipment/',
+            '/api/equipment/?expand=histories',
+            '/api/equipment/?fields=id,code,company_name&expand=histories',
+            '/api/equipment-history/',
+        ]
+        self.create_equipment(2)
+        small = {url: self.count_queries(url)[0] for url in urls}
+        self.create_equipment(10)
+        for url in urls:
+            queries, data = self.count_queries(url)
+            self.assertGreaterEqual(len(data['results']), 12)
+            self.assertEqual(queries, small[url], url)
+
+    def test_histories_only_when_expanded(self):
+        self.create_equipment(1)
+        equipment = Equipment.objects.get()
+
+        data = self.client.get(f'/api/equipment/{equipment.pk}/').json()
+        self.assertNotIn('histories', data)
+        self.assertEqual(data['company_name'], 'Công ty 0')
+
+        data = self.client.get(f'/api/equipment/{equipment.pk}/?expand=histories').json()
+        self.assertEqual(len(data['histories']), 2)
+        self.assertEqual(data['histories'][0]['signed_by'], 'Trần Văn B')
+
+    def test_sparse_fields(self):
+        self.create_equipment(1)
+        data = self.client.get('/api/equipment/?fields=id,code&expand=histories').json()
+        self.assertEqual(set(data['results'][0]), {'id', 'code', 'histories'})
+
+
+class DeltaSyncTests(TestCase):
+    """?updated_since=<cursor>: chỉ trả thay đổi sau cursor, kèm tombstone các dòng đã xóa"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('staff', is_staff=True))
+        self.company = Company.objects.create(name='Công ty A', code='A')
+
+    def create_equipment(self, code):
+        return Equipment.objects.create(company=self.company, name=f'Máy {code}', code=code, equipment_type='desktop')
+
+    def sync(self, url, cursor=''):
+        response = self.client.get(url, {'updated_since': cursor})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_changes_and_tombstones(self):
+        first = self.create_equipment('MN-001')
+        second = self.create_equipment('MN-002')
+
+        data = self.sync('/api/equipment/')
+        self.assertEqual([row['code'] for row in data['results']], ['MN-001', 'MN-002'])
+        self.assertEqual(data['deleted'], [])
+
+        data = self.sync('/api/equipment/', data['cursor'])
+        self.assertEqual(data['results'], [])
+
+        first.name = 'Máy đã sửa'
+        first.save()
+        second_pk = second.pk
+        second.delete()
+        self.create_equipment('MN-003')
+
+        data = self.sync('/api/equipment/', data['cursor'])
+        self.assertEqual([row['code'] for row in data['results']], ['MN-001', 'MN-003'])
+        self.assertEqual(data['deleted'], [second_pk])
+        self.assertFalse(data['reset'])
+
+    def test_has_more(self):
+        for index in range(5):
+            self.create_equipment(f'MN-{index:03d}')
+        codes = []
+        cursor = ''
+        with mock.patch('api.sync.SYNC_LIMIT', 2):
+            while True:
+                data = self.sync('/api/equipment/', cursor)
+                codes += [row['code'] for row in data['results']]
+                cursor = data['cursor']
+                if not data['has_more']:
+                    break
+        self.assertEqual(codes, [f'MN-{index:03d}' for index in range(5)])
+
+    def test_nas_logs_reset(self):
+        nas = NASConfig.objects.create(name='NAS', host='10.0.0.1', username='admin', password='x')
+        NASLog.objects.create(nas=nas, message='login', timestamp=timezone.now())
+        data = self.sync('/api/nas-logs/')
+        self.assertEqual(len(data['results']), 1)
+
+        nas.delete()
+        data = self.sync('/api/nas-logs/', data['cursor'])
+        self.assertTrue(data['reset'])
+        self.assertEqual(data['results'], [])
+
+    def test_deleted_logs_reported(self):
+        nas = NASConfig.objects.create(name='NAS', host='10.0.0.1', username='admin', password='x')
+        logs = [NASLog.objects.create(nas=nas, message=f'log {index}', timestamp=timezone.now()) for index in range(3)]
+        data = self.sync('/api/nas-logs/')
+        self.assertEqual(len(data['results']), 3)
+
+        rollups.delete_logs(NASLog.objects.filter(pk=logs[0].pk))
+        data = self.sync('/api/nas-logs/', data['cursor'])
+        self.assertEqual(data['deleted'], [logs[0].pk])
+        self.assertFalse(data['reset'])
+
+        with mock.patch('nas_management.rollups.DELETE_TOMBSTONE_LIMIT', 1):
+            rollups.delete_logs(NASLog.objects.all())
+        data = self.sync('/api/nas-logs/', data['cursor'])
+        self.assertTrue(data['reset'])
+
+    def test_invalid_cursor(self):
+        response = self.client.get('/api/equipment/', {'updated_since': 'abc'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_bulk_import_rows_synced(self):
+        nas = NASConfig.objects.create(name='NAS', host='10.0.0.1', username='admin', password='x')
+        data = self.sync('/api/nas-logs/')
+        self.assertEqual(data['results'], [])
+
+        logs = [NASLog(nas=nas, message=f'log {index}', timestamp=timezone.now()) for index in range(3)]
+        log_sync._insert_new_logs(nas, logs, {'duplicates': 0})
+        data = self.sync('/api/nas-logs/', data['cursor'])
+        self.assertEqual(len(data['results']), 3)
+
+    def test_ticket_tombstones_scoped_to_requester(self):
+        company = TicketCompany.objects.create(name='Công ty A', code='A')
+        owner = User.objects.create_user('owner')
+        other = User.objects.create_user('other')
+        ticket = Ticket.objects.create(
+            title='Máy in lỗi', description='Kẹt giấy', requester_name='A', requester_email='a@example.com',
+            company=company, requester=owner,
+        )
+        cursors = {}
+        for user in (owner, other):
+            self.client.force_authenticate(user)
+            cursors[user] = self.sync('/api/tickets/')['cursor']
+
+        ticket_pk = ticket.pk
+        ticket.delete()
+        self.client.force_authenticate(owner)
+        self.assertEqual(self.sync('/api/tickets/', cursors[owner])['deleted'], [ticket_pk])
+        self.client.force_authenticate(other)
+        self.assertEqual(self.sync('/api/tickets/', cursors[other])['deleted'], [])
+
+
+class ConditionalGetTests(TestCase):
+    """ETag: dữ liệu không đổi thì trả 304 chỉ với query đọc phiên bản"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user('staff', is_staff=True)
+        self.client.force_authenticate(self.user)
+        Company.objects.create(name='Công ty A', code='A')
+
+    def test_not_modified_with_single_query(self):
+        response = self.client.get('/api/companies/')
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+        self.assertNotIn('Last-Modified', response)
+
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/companies/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+    def test_etag_changes_with_data(self):
+        etag = self.client.get('/api/companies/')['ETag']
+        Company.objects.create(name='Công ty B', code='B')
+        response = self.client.get('/api/companies/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['results']), 2)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_etag_per_user(self):
+        etag = self.client.get('/api/auth/user/me/')['ETag']
+        self.client.force_authenticate(User.objects.create_user('other'))
+        response = self.client.get('/api/auth/user/me/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['username'], 'other')
+
+
+class NASLogCursorPaginationTests(TestCase):
+    """?cursor= của API log NAS: phân trang keyset theo (timestamp, id), cursor gắn với bộ lọc"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('staff', is_staff=True))
+        nas = NASConfig.objects.create(name='NAS', host='10.0.0.1', username='admin', password='x')
+        now = timezone.now()
+        # 2 log cùng thời điểm để kiểm tra id phân định thứ tự
+        self.logs = [
+            NASLog.objects.create(
+                nas=nas, log_type='syslog', level='info', message=f'log {index}',
+                timestamp=now - timedelta(minutes=index // 2),
+            )
+            for index in range(7)
+        ]
+
+    def test_walks_all_pages_in_order(self):
+        ids = []
+        url = '/api/nas-logs/?log_type=syslog&page_size=3&cursor='
+        while url:
+            with CaptureQueriesContext(connection) as queries:
+                data = self.client.get(url).json()
+            self.assertNotIn('count', data)
+            self.assertFalse(any('COUNT(' in query['sql'] for query in queries.captured_queries))
+            ids += [row['id'] for row in data['results']]
+            url = data['next']
+        expected = sorted(self.logs, key=lambda log: (-log.timestamp.timestamp(), log.id))
+        self.assertEqual(ids, [log.id for log in expected])
+
+    def test_cursor_bound_to_filters(self):
+        data = self.client.get('/api/nas-logs/', {'log_type': 'syslog', 'page_size': 3, 'cursor': ''}).json()
+        cursor = data['next'].split('cursor=')[1].split('&')[0]
+        response = self.client.get('/api/nas-logs/', {'log_type': 'connectlog', 'page_size': 3, 'cursor': cursor})
+        self.assertEqual(response.status_code, 404)
+
+    def test_page_number_mode_unchanged(self):
+        data = self.client.get('/api/nas-logs/', {'page_size': 3}).json()
+        self.assertEqual(data['count'], 7)
+        self.assertEqual(len(data['results']), 7)
+
+
+class NASDashboardTests(TestCase):
+    """Dashboard NAS: ma trận loại log x mức độ trong 1 query, cache tới khi có log mới"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('staff', is_staff=True))
+        self.nas = NASConfig.objects.create(name='NAS', host='10.0.0.1', username='admin', password='x')
+        self.url = f'/api/nas/{self.nas.pk}/dashboard/'
+
+    def add_logs(self, *pairs):
+        now = timezone.now()
+        logs = [
+            NASLog.objects.create(nas=self.nas, log_type=log_type, level=level, message=f'log {index}', timestamp=now)
+            for index, (log_type, level) in enumerate(pairs, NASLog.objects.count())
+        ]
+        rollups.refresh_for_logs(logs)
+
+    def test_matrix_and_cache(self):
+        self.add_logs(('syslog', 'info'), ('syslog', 'error'), ('connectlog', 'info'))
+
+        with self.assertNumQueries(3):
+            data = self.client.get(self.url).json()
+        self.assertEqual(data['total_logs'], 3)
+        self.assertEqual(data['logs_by_type']['syslog'], 2)
+        self.assertEqual(data['logs_by_level']['info'], 2)
+        self.assertEqual(data['matrix']['connectlog']['info'], 1)
+        self.assertEqual(data['matrix']['filexferlog']['error'], 0)
+
+        # Lần sau chỉ còn query lấy NAS và version
+        with self.assertNumQueries(2):
+            self.assertEqual(self.client.get(self.url).json(), data)
+
+        self.add_logs(('filexferlog', 'warning'))
+        data = self.client.get(self.url).json()
+        self.assertEqual(data['total_logs'], 4)
+        self.assertEqual(data['matrix']['filexferlog']['warning'], 1)
+
+        # Xóa toàn bộ log (version chung)
+        NASLog.objects.all().delete()
+        rollups.rebuild()
+        self.assertEqual(self.client.get(self.url).json()['total_logs'], 0)
@@ -7,48 +7,68 @@ from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.models import User
-from django.db.models import Q
+from django.db.models import Q, Count
 from django.utils import timezone
 from datetime import timedelta
 
 from .serializers import (
     UserSerializer, CompanySerializer,
-    EquipmentSerializer, EquipmentListSerializer, EquipmentHistorySerializer,
+    EquipmentSerializer, EquipmentListSerializer, EquipmentHistorySerializer, EquipmentAssignmentSerializer,
     NASConfigSerializer, NASLogSerializer,
     TicketSerializer, TicketCategorySerializer, DepartmentSerializer,
     RenewalSerializer, RenewalTypeSerializer
 )
 from .permissions import IsStaffOrReadOnly, IsOwnerOrStaff
-from equipment.models import Company, Equipment, EquipmentHistory
+from .fieldsets import SparseFieldsMixin
+from .sync import DeltaSyncMixin
+from .conditional import ConditionalGetMixin
+from .pagination import KeysetCursorPagination
+from equipment.models import Company, Equipment, EquipmentAssignment, EquipmentHistory
+from equipment import search as equipment_search
 from nas_management.models import NASConfig, NASLog
+from nas_management import rollups
 from tickets.models import Ticket, TicketCategory, Department
 from renewals.models import Renewal, RenewalType
 
 
-class UserViewSet(viewsets.ReadOnlyModelViewSet):
+class UserViewSet(ConditionalGetMixin, SparseFieldsMixin, viewsets.ReadOnlyModelViewSet):
     """API cho User"""
     queryset = User.objects.all()
     serializer_class = UserSerializer
     permission_classes = [IsAuthenticated]
+    etag_models = [User]
+    conditional_actions = ('list', 'retrieve', 'me')
     
     @action(detail=False, methods=['get'])
     def me(self, request):
         """Lấy thông tin user hiện tại"""
         serializer = self.get_serializer(request.user)
         return Response(serializer.data)
+    
+    @action(detail=True, methods=['get'])
+    def equipment(self, request, pk=None):
+        """Các thiết bị user đã/đang sử dụng (từ sổ giao máy)"""
+        user = self.get_object()
+        assignments = EquipmentAssignment.objects.filter(user=user).select_related('equipment', 'user')
+        equipment_count = assignments.aggregate(count=Count('equipment', distinct=True))['count']
+        serializer = EquipmentAssignmentSerializer(assignments, many=True)
+        return Response({'equipment_count': equipment_count, 'results': serializer.data})
 
 
-class CompanyViewSet(viewsets.ReadOnlyModelViewSet):
+class CompanyViewSet(ConditionalGetMixin, SparseFieldsMixin, viewsets.ReadOnlyModelViewSet):
     """API cho Company"""
     queryset = Company.objects.all()
     serializer_class = CompanySerializer
     permission_classes = [IsAuthenticated]
+    etag_models = [Company]
 
 
-class EquipmentViewSet(viewsets.ModelViewSet):
+class EquipmentViewSet(ConditionalGetMixin, DeltaSyncMixin, SparseFieldsMixin, viewsets.ModelViewSet):
     """API cho Equipment"""
-    queryset = Equipment.objects.select_related('company', 'current_user').prefetch_related('history')
+    queryset = Equipment.objects.all()
     permission_classes = [IsAuthenticated, IsStaffOrReadOnly]
+    # Company/User cho company_name, current_user_name; EquipmentHistory cho ?expand=histories
+    etag_models = [Equipment, Company, User, EquipmentHistory]
     
     def get_serializer_class(self):
         if self.action == 'list':
@@ -76,11 +96,7 @@ class EquipmentViewSet(viewsets.ModelViewSet):
         # Search
         search = self.request.query_params.get('search')
         if search:
-            queryset = queryset.filter(
-                Q(name__icontains=search) |
-                Q(code__icontains=search) |
-                Q(machine_name__icontains=search)
-            )
+            queryset = equipment_search.filter_queryset(queryset, search)
         
         # Filter is_active
         is_active = self.request.query_params.get('is_active')
@@ -93,10 +109,19 @@ class EquipmentViewSet(viewsets.ModelViewSet):
     def history(self, request, pk=None):
         """Lấy lịch sử của thiết bị"""
         equipment = self.get_object()
-        history = equipment.history.all().order_by('-action_date')
+        history = equipment.histories.order_by('-action_date')
         serializer = EquipmentHistorySerializer(history, many=True)
         return Response(serializer.data)
     
+    @action(detail=True, methods=['get'])
+    def assignments(self, request, pk=None):
+        """Những người đã/đang sử dụng thiết bị (từ sổ giao máy)"""
+        equipment = self.get_object()
+        assignments = equipment.assignments.select_related('equipment', 'user')
+        users_count = assignments.aggregate(count=Count('user', distinct=True))['count']
+        serializer = EquipmentAssignmentSerializer(assignments, many=True)
+        return Response({'users_count': users_count, 'results': serializer.data})
+    
     @action(detail=True, methods=['post'])
     def add_history(self, request, pk=None):
         """Thêm lịch sử cho thiết bị"""
@@ -108,9 +133,9 @@ class EquipmentViewSet(viewsets.ModelViewSet):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
-class EquipmentHistoryViewSet(viewsets.ModelViewSet):
+class EquipmentHistoryViewSet(SparseFieldsMixin, viewsets.ModelViewSet):
     """API cho EquipmentHistory"""
-    queryset = EquipmentHistory.objects.select_related('equipment', 'signed_by')
+    queryset = EquipmentHistory.objects.all()
     serializer_class = EquipmentHistorySerializer
     permission_classes = [IsAuthenticated, IsStaffOrReadOnly]
     
@@ -122,7 +147,7 @@ class EquipmentHistoryViewSet(viewsets.ModelViewSet):
         return queryset.order_by('-action_date')
 
 
-class NASConfigViewSet(viewsets.ReadOnlyModelViewSet):
+class NASConfigViewSet(SparseFieldsMixin, viewsets.ReadOnlyModelViewSet):
     """API cho NASConfig"""
     queryset = NASConfig.objects.filter(is_active=True)
     serializer_class = NASConfigSerializer
@@ -152,31 +177,18 @@ class NASConfigViewSet(viewsets.ReadOnlyModelViewSet):
         """Dashboard stats cho NAS"""
         nas = self.get_object()
         
-        # Thống kê logs
-        total_logs = NASLog.objects.filter(nas=nas).count()
-        logs_by_type = {}
-        logs_by_level = {}
-        
-        for log_type, _ in NASLog.LOG_TYPE_CHOICES:
-            count = NASLog.objects.filter(nas=nas, log_type=log_type).count()
-            logs_by_type[log_type] = count
-        
-        for level, _ in NASLog.LOG_LEVEL_CHOICES:
-            count = NASLog.objects.filter(nas=nas, level=level).count()
-            logs_by_level[level] = count
-        
-        return Response({
-            'total_logs': total_logs,
-            'logs_by_type': logs_by_type,
-            'logs_by_level': logs_by_level,
-        })
+        # Ma trận loại log x mức độ từ bảng thống kê theo ngày (1 query GROUP BY),
+        # cache theo NAS và bị xóa khi import/đồng bộ log
+        return Response(rollups.dashboard(nas.id))
 
 
-class NASLogViewSet(viewsets.ReadOnlyModelViewSet):
+class NASLogViewSet(DeltaSyncMixin, SparseFieldsMixin, viewsets.ReadOnlyModelViewSet):
     """API cho NASLog"""
-    queryset = NASLog.objects.select_related('nas')
+    queryset = NASLog.objects.all()
     serializer_class = NASLogSerializer
     permission_classes = [IsAuthenticated]
+    # ?cursor= : phân trang keyset theo (timestamp, id), dùng index (nas, log_type, -timestamp)
+    pagination_class = KeysetCursorPagination
     
     def get_queryset(self):
         queryset = super().get_queryset()
@@ -199,11 +211,9 @@ class NASLogViewSet(viewsets.ReadOnlyModelViewSet):
         return queryset.order_by('-timestamp')
 
 
-class TicketViewSet(viewsets.ModelViewSet):
+class TicketViewSet(DeltaSyncMixin, SparseFieldsMixin, viewsets.ModelViewSet):
     """API cho Ticket"""
-    queryset = Ticket.objects.select_related(
-        'requester', 'company', 'department', 'category', 'assigned_to'
-    )
+    queryset = Ticket.objects.all()
     serializer_class = TicketSerializer
     permission_classes = [IsAuthenticated]
     
@@ -240,23 +250,31 @@ class TicketViewSet(viewsets.ModelViewSet):
         
         return queryset.order_by('-created_at')
     
+    def get_tombstones(self, tombstones):
+        # Giống get_queryset: user thường chỉ nhận tombstone ticket của mình
+        if not self.request.user.is_staff:
+            tombstones = tombstones.filter(Q(owner_id=self.request.user.pk) | Q(object_id__isnull=True))
+        return tombstones
+
     def perform_create(self, serializer):
         """Tự động set requester khi tạo ticket"""
         serializer.save(requester=self.request.user)
 
 
-class TicketCategoryViewSet(viewsets.ReadOnlyModelViewSet):
+class TicketCategoryViewSet(ConditionalGetMixin, SparseFieldsMixin, viewsets.ReadOnlyModelViewSet):
     """API cho TicketCategory"""
     queryset = TicketCategory.objects.all()
     serializer_class = TicketCategorySerializer
     permission_classes = [IsAuthenticated]
+    etag_models = [TicketCategory]
 
 
-class DepartmentViewSet(viewsets.ReadOnlyModelViewSet):
+class DepartmentViewSet(ConditionalGetMixin, SparseFieldsMixin, viewsets.ReadOnlyModelViewSet):
     """API cho Department"""
-    queryset = Department.objects.select_related('company')
+    queryset = Department.objects.all()
     serializer_class = DepartmentSerializer
     permission_classes = [IsAuthenticated]
+    etag_models = [Department]
     
     def get_queryset(self):
         queryset = super().get_queryset()
@@ -266,11 +284,12 @@ class DepartmentViewSet(viewsets.ReadOnlyModelViewSet):
         return queryset
 
 
-class RenewalViewSet(viewsets.ModelViewSet):
+class RenewalViewSet(ConditionalGetMixin, SparseFieldsMixin, viewsets.ModelViewSet):
     """API cho Renewal"""
-    queryset = Renewal.objects.select_related('company', 'renewal_type')
+    queryset = Renewal.objects.all()
     serializer_class = RenewalSerializer
     permission_classes = [IsAuthenticated, IsStaffOrReadOnly]
+    etag_models = [Renewal, RenewalType, Company]
     
     def get_queryset(self):
         queryset = super().get_queryset()
@@ -298,7 +317,7 @@ class RenewalViewSet(viewsets.ModelViewSet):
         return queryset.order_by('end_date')
 
 
-class RenewalTypeViewSet(viewsets.ReadOnlyModelViewSet):
+class RenewalTypeViewSet(SparseFieldsMixin, viewsets.ReadOnlyModelViewSet):
     """API cho RenewalType"""
     queryset = RenewalType.objects.all()
     serializer_class = RenewalTypeSerializer
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Company, Equipment, EquipmentHistory
+from .models import Company, Equipment, EquipmentAssignment, EquipmentCodeSequence, EquipmentHistory
 
 
 @admin.register(Company)
@@ -23,3 +23,15 @@ class EquipmentHistoryAdmin(admin.ModelAdmin):
     search_fields = ['equipment__name', 'description', 'signed_by']
     readonly_fields = ['created_at']
 
+
+@admin.register(EquipmentAssignment)
+class EquipmentAssignmentAdmin(admin.ModelAdmin):
+    list_display = ['equipment', 'user', 'start_date', 'end_date']
+    list_filter = ['start_date', 'end_date']
+    search_fields = ['equipment__name', 'equipment__code', 'user__username', 'user__first_name', 'user__last_name']
+    raw_id_fields = ['equipment', 'user']
+
+
+@admin.register(EquipmentCodeSequence)
+class EquipmentCodeSequenceAdmin(admin.ModelAdmin):
+    list_display = ['region', 'last_value']
@@ -6,3 +6,5 @@ class EquipmentConfig(AppConfig):
     name = 'equipment'
     verbose_name = 'Quản lý thiết bị'
 
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,165 @@
+"""
+Sổ giao máy (EquipmentAssignment): ai đã dùng thiết bị nào, từ ngày nào tới ngày nào
+Được cập nhật mỗi khi Equipment.current_user thay đổi (xem signals.py), dữ liệu cũ được dựng lại
+từ mô tả lịch sử ('Giao máy cho ...', 'Chuyển máy từ ... sang ...', 'Trả máy từ ...')
+Mỗi lần giao ghi lại dòng lịch sử đã mở/đóng nó (opened_by/closed_by): xóa lịch sử thì chỉ hoàn tác các lần giao đó
+"""
+import re
+from datetime import date
+
+from .models import EquipmentAssignment
+
+ASSIGN_RE = re.compile(r'Giao máy cho\s+(.+)$')
+TRANSFER_RE = re.compile(r'Chuyển máy(?:\s+từ\s+.+?)?\s+sang\s+(.+)$')
+RETURN_RE = re.compile(r'Trả máy từ\s+(.+)$')
+
+# Các loại lịch sử có thể đổi người sử dụng
+LEDGER_ACTION_TYPES = ['user_assignment', 'user_return', 'movement', 'liquidation']
+
+
+def sync(equipment, on_date=None, using='default'):
+    """Đóng lần giao đang mở nếu người sử dụng đã đổi, mở lần giao mới cho current_user"""
+    open_assignments = EquipmentAssignment.objects.using(using).filter(equipment=equipment, end_date__isnull=True)
+    open_user_id = open_assignments.values_list('user_id', flat=True).first()
+    if open_user_id == equipment.current_user_id:
+        return
+
+    on_date = on_date or date.today()
+    closed_ids = []
+    opened_ids = []
+    if open_user_id is not None:
+        closed_ids = list(open_assignments.values_list('id', flat=True))
+        open_assignments.update(end_date=on_date)
+    if equipment.current_user_id:
+        opened_ids.append(EquipmentAssignment.objects.using(using).create(
+            equipment=equipment, user_id=equipment.current_user_id, start_date=on_date,
+        ).pk)
+    # Dòng lịch sử giao/trả máy được tạo ngay sau đó (cùng instance thiết bị) sẽ được gắn vào, xem link_history
+    equipment._ledger_changes = (opened_ids, closed_ids)
+
+
+def link_history(history, using='default'):
+    """Gắn dòng lịch sử giao/trả máy vừa tạo với các lần giao mà lần lưu thiết bị ngay trước đó đã mở/đóng"""
+    if not type(history).equipment.is_cached(history):
+        return
+    changes = history.equipment.__dict__.pop('_ledger_changes', None)
+    if not changes:
+        return
+    opened_ids, closed_ids = changes
+    ledger = EquipmentAssignment.objects.using(using)
+    ledger.filter(pk__in=opened_ids).update(opened_by=history)
+    ledger.filter(pk__in=closed_ids).update(closed_by=history)
+
+
+def revert(history, using='default'):
+    """
+    Hoàn tác sổ giao máy của 1 dòng lịch sử (gọi trước khi xóa lịch sử): bỏ các lần giao do lịch sử đó mở,
+    lần giao do lịch sử đó đóng được kéo dài thay cho lần giao bị bỏ, hoặc tới lần giao kế tiếp (không còn thì mở lại)
+    Lịch sử không mở/đóng lần giao nào (vd. đổi người sử dụng không qua lịch sử này) thì sổ giữ nguyên
+    """
+    ledger = EquipmentAssignment.objects.using(using)
+    opened = list(ledger.filter(opened_by=history).order_by('start_date', 'id'))
+    closed = list(ledger.filter(closed_by=history))
+    if not closed and not opened:
+        return False
+
+    ledger.filter(pk__in=[assignment.pk for assignment in opened]).delete()
+    for assignment in closed:
+        if opened:
+            # Chuyển máy: người cũ giữ máy tới khi lần giao bị bỏ kết thúc
+            successor = opened[-1]
+            assignment.end_date, assignment.closed_by_id = successor.end_date, successor.closed_by_id
+        else:
+            # Trả máy: người cũ giữ máy tới lần giao kế tiếp
+            following = ledger.filter(
+                equipment_id=assignment.equipment_id, start_date__gte=assignment.end_date,
+            ).exclude(pk=assignment.pk).order_by('start_date', 'id').first()
+            assignment.end_date = following.start_date if following else None
+            assignment.closed_by_id = following.opened_by_id if following else None
+        assignment.save(update_fields=['end_date', 'closed_by'])
+    # Xóa lịch sử không đổi người sử dụng hiện tại: sổ luôn có lần giao đang mở cho người đó
+    sync(history.equipment, using=using)
+    return True
+
+
+def parse_description(action_type, description):
+    """('assign', tên người nhận) / ('return', None) từ 1 dòng lịch sử, None nếu không đổi người sử dụng"""
+    if action_type == 'liquidation':
+        return 'return', None
+    description = (description or '').strip()
+    if action_type == 'user_return' and RETURN_RE.search(description):
+        return 'return', None
+    for pattern in (TRANSFER_RE, ASSIGN_RE):
+        match = pattern.search(description)
+        if match:
+            return 'assign', match.group(1).strip()
+    return None
+
+
+def backfill(Equipment, EquipmentHistory, EquipmentAssignment, User, using='default'):
+    """
+    Dựng lại toàn bộ sổ giao máy từ lịch sử (truyền model vào để dùng được trong migration)
+    Tên trong mô tả là username hoặc họ tên đầy đủ; người sử dụng hiện tại luôn có 1 lần giao đang mở
+    """
+    # Model trong migration trước khi có opened_by/closed_by
+    linked = any(field.name == 'opened_by' for field in EquipmentAssignment._meta.get_fields())
+    users_by_name = {}
+    for user_id, username, first_name, last_name in User.objects.using(using).values_list(
+        'id', 'username', 'first_name', 'last_name'
+    ):
+        full_name = f'{first_name} {last_name}'.strip()
+        if full_name:
+            users_by_name.setdefault(full_name, user_id)
+    for user_id, username in User.objects.using(using).values_list('id', 'username'):
+        users_by_name[username] = user_id
+
+    histories = EquipmentHistory.objects.using(using).filter(
+        action_type__in=LEDGER_ACTION_TYPES,
+    ).order_by('equipment_id', 'action_date', 'created_at', 'id').values_list(
+        'equipment_id', 'id', 'action_type', 'action_date', 'description',
+    )
+    histories_by_equipment = {}
+    for equipment_id, history_id, action_type, action_date, description in histories.iterator():
+        histories_by_equipment.setdefault(equipment_id, []).append((history_id, action_type, action_date, description))
+
+    assignments = []
+    today = date.today()
+    for equipment_id, current_user_id, created_at in Equipment.objects.using(using).values_list(
+        'id', 'current_user_id', 'created_at'
+    ).iterator():
+        open_assignment = None
+        last_date = created_at.date()
+        for history_id, action_type, action_date, description in histories_by_equipment.get(equipment_id, []):
+            parsed = parse_description(action_type, description)
+            if parsed is None:
+                continue
+            last_date = action_date
+            kind, name = parsed
+            user_id = users_by_name.get(name) if kind == 'assign' else None
+            if open_assignment and (kind == 'return' or user_id):
+                if user_id == open_assignment.user_id:
+                    continue
+                open_assignment.end_date = max(action_date, open_assignment.start_date)
+                if linked:
+                    open_assignment.closed_by_id = history_id
+                open_assignment = None
+            if user_id:
+                open_assignment = EquipmentAssignment(
+                    equipment_id=equipment_id, user_id=user_id, start_date=action_date,
+                )
+                if linked:
+                    open_assignment.opened_by_id = history_id
+                assignments.append(open_assignment)
+
+        # Lịch sử không khớp người sử dụng hiện tại (sửa tay, tên không tìm thấy...): theo current_user
+        if open_assignment and open_assignment.user_id != current_user_id:
+            open_assignment.end_date = max(min(last_date, today), open_assignment.start_date)
+            open_assignment = None
+        if current_user_id and not open_assignment:
+            assignments.append(EquipmentAssignment(
+                equipment_id=equipment_id, user_id=current_user_id, start_date=min(last_date, today),
+            ))
+
+    EquipmentAssignment.objects.using(using).all().delete()
+    EquipmentAssignment.objects.using(using).bulk_create(assignments, batch_size=1000)
+    return len(assignments)
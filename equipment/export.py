@@ -0,0 +1,174 @@
+"""
+Xuất báo cáo thiết bị ra Excel/CSV
+Excel dùng chế độ write-only của openpyxl (ghi từng dòng ra file tạm, style dùng chung qua NamedStyle)
+CSV được stream thẳng về trình duyệt. Cả 2 đọc queryset theo lô bằng iterator nên bộ nhớ không tăng theo số dòng
+"""
+import csv
+import tempfile
+from datetime import date
+
+from django.http import FileResponse, StreamingHttpResponse
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Alignment, Border, Font, NamedStyle, PatternFill, Side
+from openpyxl.utils import get_column_letter
+from openpyxl.worksheet.dimensions import SheetFormatProperties
+
+from .models import Equipment
+
+# Số dòng đọc từ database mỗi lô
+CHUNK_SIZE = 2000
+
+HEADERS = [
+    'STT', 'Mã thiết bị', 'Tên thiết bị', 'Công ty', 'Miền', 'Loại thiết bị',
+    'Ngày đưa vào sử dụng', 'Tên máy', 'Hệ điều hành', 'Nhà sản xuất', 'Model', 'Bộ xử lý',
+    'Bộ nhớ', 'HDD/SSD', 'Card đồ họa', 'Người sử dụng', 'Email', 'Trạng thái'
+]
+COLUMN_WIDTHS = [6, 15, 25, 20, 12, 15, 18, 20, 20, 20, 20, 25, 15, 20, 20, 20, 25, 15]
+
+XLSX_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+REGION_NAMES = dict(Equipment.REGIONS)
+TYPE_NAMES = dict(Equipment.EQUIPMENT_TYPES)
+
+
+def _filename(extension):
+    return f'bao_cao_thiet_bi_{date.today().strftime("%Y%m%d")}.{extension}'
+
+
+def _status(equipment):
+    if equipment.has_liquidation:
+        return 'Đã thanh lý'
+    if equipment.is_active:
+        return 'Hoạt động'
+    return 'Không hoạt động'
+
+
+def build_row(idx, equipment):
+    """1 dòng dữ liệu của báo cáo theo thứ tự HEADERS"""
+    current_user = ''
+    user_email = ''
+    if equipment.current_user:
+        current_user = equipment.current_user.get_full_name() or equipment.current_user.username
+        user_email = equipment.current_user.email or ''
+
+    return [
+        idx,
+        equipment.code,
+        equipment.name,
+        equipment.company.name if equipment.company else '',
+        REGION_NAMES.get(equipment.region, equipment.region),
+        TYPE_NAMES.get(equipment.equipment_type, equipment.equipment_type),
+        equipment.commission_date.strftime('%d/%m/%Y') if equipment.commission_date else '',
+        equipment.machine_name or '',
+        equipment.operating_system or '',
+        equipment.system_manufacturer or '',
+        equipment.system_model or '',
+        equipment.processor or '',
+        equipment.memory or '',
+        equipment.storage or '',
+        equipment.graphics_card or '',
+        current_user,
+        user_email,
+        _status(equipment),
+    ]
+
+
+def iter_rows(queryset):
+    """Các dòng dữ liệu của báo cáo (không gồm tiêu đề), đọc queryset theo lô CHUNK_SIZE"""
+    queryset = queryset.select_related('company', 'current_user')
+    for idx, equipment in enumerate(queryset.iterator(chunk_size=CHUNK_SIZE), 1):
+        yield build_row(idx, equipment)
+
+
+def _named_styles():
+    """Các style dùng chung: mỗi style chỉ lưu 1 lần trong file thay vì tạo đối tượng mới cho từng ô"""
+    border = Border(left=Side(style='thin'), right=Side(style='thin'), top=Side(style='thin'), bottom=Side(style='thin'))
+    return [
+        NamedStyle(
+            name='report_title',
+            font=Font(bold=True, size=16),
+            alignment=Alignment(horizontal='center', vertical='center'),
+        ),
+        NamedStyle(
+            name='report_header',
+            font=Font(bold=True, color='FFFFFF', size=11),
+            fill=PatternFill(start_color='366092', end_color='366092', fill_type='solid'),
+            border=border,
+            alignment=Alignment(horizontal='center', vertical='center'),
+        ),
+        NamedStyle(
+            name='report_index',
+            border=border,
+            alignment=Alignment(horizontal='center', vertical='center'),
+        ),
+        NamedStyle(
+            name='report_cell',
+            border=border,
+            alignment=Alignment(vertical='center', wrap_text=True),
+        ),
+    ]
+
+
+def write_xlsx(queryset, fileobj):
+    """Ghi báo cáo Excel vào fileobj (file mở ở chế độ nhị phân)"""
+    wb = Workbook(write_only=True)
+    for style in _named_styles():
+        wb.add_named_style(style)
+
+    ws = wb.create_sheet('Báo cáo thiết bị')
+    # Chế độ write-only không đặt được chiều cao từng hàng, dùng chiều cao mặc định cho cả sheet
+    ws.sheet_format = SheetFormatProperties(defaultRowHeight=25, customHeight=True)
+    for col_num, width in enumerate(COLUMN_WIDTHS, 1):
+        ws.column_dimensions[get_column_letter(col_num)].width = width
+    ws.merged_cells.add(f'A1:{get_column_letter(len(HEADERS))}1')
+
+    def styled(value, style):
+        cell = WriteOnlyCell(ws, value=value)
+        cell.style = style
+        return cell
+
+    ws.append([styled('BÁO CÁO THIẾT BỊ IT', 'report_title')])
+    ws.append([])
+    ws.append([styled(header, 'report_header') for header in HEADERS])
+    # Dòng được ghi ra file ngay khi append nên mỗi cột dùng lại 1 ô đã gán style, chỉ đổi giá trị
+    row_cells = [styled(None, 'report_index')] + [styled(None, 'report_cell') for _ in HEADERS[1:]]
+    for row in iter_rows(queryset):
+        for cell, value in zip(row_cells, row):
+            cell.value = value
+        ws.append(row_cells)
+
+    wb.save(fileobj)
+
+
+def xlsx_response(queryset):
+    """Xuất Excel ra file tạm rồi trả về bằng FileResponse (gửi file theo từng khối, tự đóng/xóa file tạm)"""
+    tmp = tempfile.TemporaryFile()
+    try:
+        write_xlsx(queryset, tmp)
+    except Exception:
+        tmp.close()
+        raise
+    tmp.seek(0)
+    return FileResponse(tmp, as_attachment=True, filename=_filename('xlsx'), content_type=XLSX_CONTENT_TYPE)
+
+
+class _Echo:
+    """File giả cho csv.writer: write() trả lại chuỗi thay vì ghi"""
+
+    def write(self, value):
+        return value
+
+
+def iter_csv(queryset):
+    """Các dòng CSV (đã định dạng), dòng đầu có BOM để Excel đọc đúng UTF-8"""
+    writer = csv.writer(_Echo())
+    yield '﻿' + writer.writerow(HEADERS)
+    for row in iter_rows(queryset):
+        yield writer.writerow(row)
+
+
+def csv_response(queryset):
+    response = StreamingHttpResponse(iter_csv(queryset), content_type='text/csv; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="{_filename("csv")}"'
+    return response
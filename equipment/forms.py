@@ -1,6 +1,6 @@
 from django import forms
 from django.contrib.auth.models import User
-from .models import Company, Equipment, EquipmentHistory
+from .models import Company, Equipment, EquipmentCodeSequence, EquipmentHistory
 from .parser import parse_dxdiag
 import os
 
@@ -18,6 +18,11 @@ class EquipmentForm(forms.ModelForm):
         label="Thông số kỹ thuật",
         help_text="Nhập thông số (mỗi dòng một cặp Tên: Giá trị)"
     )
+    # Mã xem trước (get_next_code) đang hiển thị trong ô Ký hiệu mã, do JS điền
+    code_preview = forms.CharField(
+        required=False,
+        widget=forms.HiddenInput(attrs={'id': 'id_code_preview'})
+    )
     
     class Meta:
         model = Equipment
@@ -65,6 +70,7 @@ class EquipmentForm(forms.ModelForm):
             # Nếu đang sửa, cho phép chỉnh sửa code nhưng readonly
             # Nếu thay đổi miền, mã sẽ được tự động tạo lại
             self.fields['code'].help_text = "Mã thiết bị (chỉ đọc). Nếu thay đổi miền, mã sẽ được tự động tạo lại."
+            self.fields['code'].required = False  # Mã trống hoặc đổi miền thì cấp mã mới khi lưu
         
         # Khởi tạo technical_specs_text từ instance nếu có
         if self.instance and self.instance.pk and self.instance.technical_specs:
@@ -79,33 +85,25 @@ class EquipmentForm(forms.ModelForm):
                              'monitor_name', 'monitor_model']:
                     self.fields[field].widget = forms.HiddenInput()
     
+    def clean(self):
+        cleaned_data = super().clean()
+        # Mã xem trước của get_next_code có thể đã bị người khác lấy: bỏ đi để cấp mã mới khi lưu
+        # (tạo mới hoặc đổi miền), tránh lỗi trùng mã ở bước kiểm tra unique
+        # Mã nhập tay (khác mã xem trước) được giữ nguyên và kiểm tra trùng như bình thường
+        code = (cleaned_data.get('code') or '').strip()
+        region = cleaned_data.get('region')
+        if region and (not self.instance.pk or 'region' in self.changed_data):
+            previews = {cleaned_data.get('code_preview'), EquipmentCodeSequence.peek(region)}
+            if code in previews:
+                cleaned_data['code'] = ''
+        return cleaned_data
+    
     def save(self, commit=True):
         instance = super().save(commit=False)
         
-        # Tự động tạo code nếu chưa có (chỉ khi tạo mới)
+        # Cấp mã tự động theo số thứ tự của miền (xem clean)
         if not instance.code and instance.region:
-            from .models import Equipment
-            import re
-            
-            # Lấy prefix từ region
-            prefix = instance.region
-            
-            # Tìm số lớn nhất trong miền này
-            existing_codes = Equipment.objects.filter(
-                code__startswith=f"{prefix}-"
-            ).exclude(pk=instance.pk if instance.pk else None).values_list('code', flat=True)
-            
-            max_num = 0
-            for code in existing_codes:
-                match = re.match(rf'^{prefix}-(\d+)$', code)
-                if match:
-                    num = int(match.group(1))
-                    if num > max_num:
-                        max_num = num
-            
-            # Tạo code mới
-            new_num = max_num + 1
-            instance.code = f"{prefix}-{new_num:03d}"
+            instance.code = EquipmentCodeSequence.allocate(instance.region)
         
         # Xử lý technical_specs từ text
         specs_text = self.cleaned_data.get('technical_specs_text', '')
@@ -0,0 +1,163 @@
+"""
+Management command để benchmark parser DxDiag:
+so sánh parser cũ (đọc cả file UTF-8 rồi chạy ~15 regex trên toàn bộ nội dung) với parser đọc theo dòng
+trên 1 bộ file DxDiag giả lập (UTF-8 và UTF-16, nhiều card màn hình/ổ đĩa, mục DirectShow Filters dài như file thật)
+"""
+import os
+import random
+import re
+import sys
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand
+
+from equipment.parser import parse_dxdiag
+
+# Fix encoding cho Windows
+if sys.platform == 'win32':
+    import codecs
+    sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'strict')
+    sys.stderr = codecs.getwriter('utf-8')(sys.stderr.buffer, 'strict')
+
+RULE = '-' * 20
+CARDS = ['NVIDIA GeForce GTX 1650', 'Intel(R) UHD Graphics 630', 'AMD Radeon RX 6600', 'Intel(R) Iris(R) Xe Graphics']
+DISKS = ['Samsung SSD 970 EVO Plus 500GB', 'WDC WD10EZEX-08WN4A0', 'KINGSTON SA400S37240G', 'ST1000DM010-2EP102']
+
+
+def _section(title, lines):
+    return [RULE, title, RULE] + lines + ['']
+
+
+def _synthetic_dxdiag(index, cards, drives, filter_lines):
+    """Nội dung 1 file DxDiag giả lập"""
+    lines = _section('System Information', [
+        f'      Time of this report: 1/15/2025, 09:{index % 60:02d}:00',
+        f'             Machine name: PC-{index:05d}',
+        f'               Machine Id: {{{index:08X}-0000-0000-0000-000000000000}}',
+        '         Operating System: Windows 11 Pro 64-bit (10.0, Build 22631)',
+        '                 Language: Vietnamese (Regional Setting: Vietnamese)',
+        '      System Manufacturer: Dell Inc.',
+        '             System Model: OptiPlex 7090',
+        '                     BIOS: 1.22.0 (type: UEFI)',
+        '                Processor: Intel(R) Core(TM) i5-10500 CPU @ 3.10GHz (12 CPUs), ~3.1GHz',
+        '                   Memory: 16384MB RAM',
+        '      Available OS Memory: 16122MB RAM',
+        '                Page File: 9800MB used, 8900MB available',
+        '          DirectX Version: DirectX 12',
+    ])
+    lines += _section('DirectX Debug Levels', ['Direct3D:    0/4 (retail)', 'DirectDraw:  0/4 (retail)'])
+    display = []
+    for card in range(cards):
+        display += [
+            f'           Card name: {CARDS[(index + card) % len(CARDS)]}',
+            '        Manufacturer: Intel Corporation',
+            '           Chip type: Intel(R) UHD Graphics Family',
+            '      Display Memory: 8250 MB',
+            '    Dedicated Memory: 128 MB',
+            '        Current Mode: 1920 x 1080 (32 bit) (60Hz)',
+            f'        Monitor Name: Generic PnP Monitor {card + 1}',
+            f'       Monitor Model: DELL P24{19 + card}H',
+        ] + [f'      Driver Attribute {i}: value {i}' for i in range(40)] + ['']
+    lines += _section('Display Devices', display)
+    lines += _section('Sound Devices', [f'            Description: Speakers {i}' for i in range(60)])
+    lines += _section('USB Devices', [f' + USB Root Hub | VID: 8086 | PID: {i:04X}' for i in range(30)])
+    disk = []
+    for drive in range(drives):
+        disk += [
+            f'      Drive: {chr(ord("C") + drive)}:',
+            ' Free Space: 120.5 GB',
+            'Total Space: 476.3 GB',
+            'File System: NTFS',
+            f'      Model: {DISKS[(index + drive) % len(DISKS)]}',
+            '',
+        ]
+    disk += ['      Drive: Z:', '      Model: HL-DT-ST DVD+-RW GU90N', '     Driver: c:\\windows\\system32\\drivers\\cdrom.sys', '']
+    lines += _section('Disk & DVD/CD-ROM Drives', disk)
+    lines += _section('System Devices', [f'     Name: PCI Device {i}\nDevice ID: PCI\\VEN_8086&DEV_{i:04X}' for i in range(80)])
+    lines += _section('DirectShow Filters', [
+        f'Filter {i},0x00200000,1,1,filter{i}.dll,10.00.22621.{i}' for i in range(filter_lines)
+    ])
+    return '\r\n'.join(lines) + '\r\n'
+
+
+def _legacy_parse(file_path):
+    """Parser cũ: đọc cả file dạng UTF-8 rồi chạy regex trên toàn bộ nội dung (giữ các bước chính)"""
+    result = {'machine_name': '', 'graphics_card': '', 'drives': 0}
+    try:
+        with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
+            content = f.read()
+    except Exception:
+        return result
+    for label in ['Machine name', 'Operating System', 'System Manufacturer', 'System Model', 'Processor',
+                  'Memory', 'Card name', 'BIOS', 'DirectX Version', 'Monitor Name', 'Monitor Model', 'Current Mode']:
+        match = re.search(rf'{label}:\s*(.+)', content, re.IGNORECASE)
+        if match and label == 'Machine name':
+            result['machine_name'] = match.group(1).strip()
+        if match and label == 'Card name':
+            result['graphics_card'] = match.group(1).strip()
+    disk_section_match = re.search(r'Disk & DVD/CD-ROM Drives\s*-+\s*(.+?)(?=\n-{3,}|\Z)', content, re.IGNORECASE | re.DOTALL)
+    if disk_section_match:
+        drive_pattern = r'Drive:\s*([A-Z]:)\s*\n\s*Free Space:\s*(.+?)\s*\n\s*Total Space:\s*(.+?)\s*\n\s*File System:\s*(.+?)\s*\n\s*Model:\s*(.+?)(?=\n\s*Drive:|\n-{3,}|\Z)'
+        result['drives'] = len(re.findall(drive_pattern, disk_section_match.group(1), re.IGNORECASE | re.MULTILINE))
+    return result
+
+
+class Command(BaseCommand):
+    help = 'Benchmark parser DxDiag trên bộ file giả lập (UTF-8 và UTF-16)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--files',
+            type=int,
+            default=200,
+            help='Số file DxDiag giả lập (mặc định: 200)',
+        )
+        parser.add_argument(
+            '--filter-lines',
+            type=int,
+            default=3000,
+            help='Số dòng mục DirectShow Filters mỗi file, phần lớn dung lượng file thật (mặc định: 3000)',
+        )
+
+    def handle(self, *args, **options):
+        random.seed(42)
+        with tempfile.TemporaryDirectory() as corpus:
+            paths = []
+            expected_cards = expected_drives = 0
+            total_bytes = 0
+            for index in range(options['files']):
+                cards, drives = random.randint(1, 2), random.randint(1, 3)
+                expected_cards += cards
+                expected_drives += drives
+                encoding = 'utf-16' if index % 2 else 'utf-8'
+                path = os.path.join(corpus, f'DxDiag_{index:05d}.txt')
+                with open(path, 'w', encoding=encoding, newline='') as f:
+                    f.write(_synthetic_dxdiag(index, cards, drives, options['filter_lines']))
+                total_bytes += os.path.getsize(path)
+                paths.append(path)
+            self.stdout.write(
+                f'{len(paths)} file ({total_bytes / 1024 / 1024:.1f} MB, một nửa UTF-16), '
+                f'{expected_cards} card màn hình, {expected_drives} ổ đĩa'
+            )
+
+            results = []
+            for name, parse in (('Parser cũ (regex toàn file)', _legacy_parse), ('Parser theo dòng', parse_dxdiag)):
+                start = time.perf_counter()
+                parsed = [parse(path) for path in paths]
+                elapsed = time.perf_counter() - start
+                machines = sum(1 for item in parsed if item['machine_name'])
+                if parse is parse_dxdiag:
+                    cards = sum(len(item['display_devices']) for item in parsed)
+                    drives = sum(sum(1 for d in item['drives'] if d.get('total_space')) for item in parsed)
+                else:
+                    cards = sum(1 for item in parsed if item['graphics_card'])
+                    drives = sum(item['drives'] for item in parsed)
+                results.append((name, elapsed, machines, cards, drives))
+
+        self.stdout.write('')
+        self.stdout.write(f'{"Parser":<30}{"Thời gian (ms)":>16}{"File/giây":>12}{"Tên máy":>10}{"Card":>8}{"Ổ đĩa":>8}')
+        for name, elapsed, machines, cards, drives in results:
+            self.stdout.write(
+                f'{name:<30}{elapsed * 1000:>16.1f}{len(paths) / elapsed:>12.0f}{machines:>10}{cards:>8}{drives:>8}'
+            )
@@ -0,0 +1,147 @@
+"""
+Management command để benchmark xuất báo cáo thiết bị:
+so sánh cách cũ (Workbook trong bộ nhớ, tạo style mới cho từng ô, HttpResponse) với
+Excel write-only ra file tạm và CSV stream của equipment/export.py, đo thời gian và bộ nhớ đỉnh (tracemalloc)
+"""
+import io
+import random
+import sys
+import time
+import tracemalloc
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from openpyxl import Workbook
+from openpyxl.styles import Alignment, Border, Font, PatternFill, Side
+
+from equipment import export
+from equipment.models import Company, Equipment
+
+# Fix encoding cho Windows
+if sys.platform == 'win32':
+    import codecs
+    sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'strict')
+    sys.stderr = codecs.getwriter('utf-8')(sys.stderr.buffer, 'strict')
+
+
+def _legacy_xlsx(queryset):
+    """Cách cũ: Workbook thường giữ toàn bộ ô trong bộ nhớ, mỗi ô 1 Border/Alignment riêng"""
+    wb = Workbook()
+    ws = wb.active
+    header_fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
+    header_font = Font(bold=True, color="FFFFFF", size=11)
+    border_style = Border(left=Side(style='thin'), right=Side(style='thin'), top=Side(style='thin'), bottom=Side(style='thin'))
+    ws.merge_cells('A1:R1')
+    ws['A1'] = 'BÁO CÁO THIẾT BỊ IT'
+    ws['A1'].font = Font(bold=True, size=16)
+    for col_num, header in enumerate(export.HEADERS, 1):
+        cell = ws.cell(row=3, column=col_num, value=header)
+        cell.fill = header_fill
+        cell.font = header_font
+        cell.border = border_style
+        cell.alignment = Alignment(horizontal='center', vertical='center')
+
+    queryset = queryset.select_related('company', 'current_user')
+    for idx, equipment in enumerate(queryset, 1):
+        for col_num, value in enumerate(export.build_row(idx, equipment), 1):
+            cell = ws.cell(row=idx + 3, column=col_num, value=value)
+            cell.border = border_style
+            cell.alignment = Alignment(vertical='center', wrap_text=True)
+        ws.row_dimensions[idx + 3].height = 25
+
+    buffer = io.BytesIO()
+    wb.save(buffer)
+    return buffer.tell()
+
+
+def _drain(response):
+    """Đọc hết response (giống WSGI server gửi về client), trả về số byte"""
+    size = sum(len(chunk) for chunk in response)
+    # Không gọi response.close(): nó gửi signal request_finished làm đóng kết nối database
+    if getattr(response, 'file_to_stream', None):
+        response.file_to_stream.close()
+    return size
+
+
+class Command(BaseCommand):
+    help = 'Benchmark xuất báo cáo thiết bị Excel/CSV (dữ liệu giả lập, tự rollback)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rows',
+            type=int,
+            default=100000,
+            help='Số thiết bị giả lập (mặc định: 100000)',
+        )
+        parser.add_argument(
+            '--skip-legacy',
+            action='store_true',
+            help='Bỏ qua cách cũ (rất chậm và tốn bộ nhớ với nhiều dòng)',
+        )
+        parser.add_argument(
+            '--memory',
+            action='store_true',
+            help='Đo bộ nhớ đỉnh bằng tracemalloc (chạy chậm hơn nhiều, thời gian đo được chỉ để so sánh tương đối)',
+        )
+
+    def handle(self, *args, **options):
+        rows = options['rows']
+
+        # Toàn bộ dữ liệu giả lập nằm trong 1 transaction và bị rollback ở cuối
+        with transaction.atomic():
+            self.stdout.write(f'Đang tạo {rows} thiết bị giả lập...')
+            self._seed_equipment(rows)
+            queryset = Equipment.objects.filter(code__startswith='BENCH-').order_by('code')
+
+            cases = []
+            if not options['skip_legacy']:
+                cases.append(('Workbook trong bộ nhớ (cũ)', lambda: _legacy_xlsx(queryset)))
+            cases += [
+                ('Excel write-only + file tạm', lambda: _drain(export.xlsx_response(queryset))),
+                ('CSV stream', lambda: _drain(export.csv_response(queryset))),
+            ]
+
+            self.stdout.write('')
+            self.stdout.write(f'{"Cách xuất":<32}{"Thời gian (s)":>16}{"Bộ nhớ đỉnh (MB)":>20}{"Kích thước (MB)":>18}')
+            for name, func in cases:
+                if options['memory']:
+                    tracemalloc.start()
+                start = time.perf_counter()
+                size = func()
+                elapsed = time.perf_counter() - start
+                peak = '-'
+                if options['memory']:
+                    peak = f'{tracemalloc.get_traced_memory()[1] / 1024 / 1024:.1f}'
+                    tracemalloc.stop()
+                self.stdout.write(f'{name:<32}{elapsed:>16.1f}{peak:>20}{size / 1024 / 1024:>18.1f}')
+
+            transaction.set_rollback(True)
+
+    def _seed_equipment(self, rows):
+        company = Company.objects.create(name='Benchmark', code=f'BENCH{int(time.time())}')
+        types = [code for code, _ in Equipment.EQUIPMENT_TYPES]
+        regions = [code for code, _ in Equipment.REGIONS]
+        batch = []
+        for i in range(rows):
+            batch.append(Equipment(
+                company=company,
+                region=random.choice(regions),
+                name=f'Thiết bị benchmark {i}',
+                code=f'BENCH-{i:07d}',
+                equipment_type=random.choice(types),
+                commission_date=date(2020, 1, 1) + timedelta(days=i % 1500),
+                machine_name=f'PC-{i:07d}',
+                operating_system='Windows 11 Pro 64-bit',
+                system_manufacturer='Dell Inc.',
+                system_model='Latitude 5440',
+                processor='13th Gen Intel(R) Core(TM) i5-1345U',
+                memory='16384MB RAM',
+                storage='SSD 512GB',
+                graphics_card='Intel(R) Iris(R) Xe Graphics',
+            ))
+            if len(batch) >= 5000:
+                Equipment.objects.bulk_create(batch)
+                batch = []
+        if batch:
+            Equipment.objects.bulk_create(batch)
@@ -0,0 +1,277 @@
+"""
+Management command để nhập hàng loạt file DxDiag.txt (vd. thu từ thư mục chia sẻ khi tiếp nhận 1 văn phòng)
+Parse song song bằng nhiều process, khớp với thiết bị đã có theo tên máy hoặc mã (tên file),
+cập nhật/tạo thiết bị bằng bulk_update/bulk_create theo lô. --dry-run chỉ in các thay đổi
+"""
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.functions import Lower
+from django.utils import timezone
+
+from equipment import search, stats
+from equipment.models import Company, Equipment, EquipmentCodeSequence
+from equipment.parser import parse_dxdiag
+from equipment_management import versions
+
+# Fix encoding cho Windows
+if sys.platform == 'win32':
+    import codecs
+    sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'strict')
+    sys.stderr = codecs.getwriter('utf-8')(sys.stderr.buffer, 'strict')
+
+# Các field của Equipment lấy từ DxDiag (giống EquipmentForm khi upload file)
+FIELDS = [
+    'machine_name', 'operating_system', 'system_manufacturer', 'system_model',
+    'processor', 'memory', 'graphics_card', 'monitor_name', 'monitor_model',
+]
+
+# Số giá trị mỗi lần lọc IN (...) khi tìm thiết bị đã có (SQLite giới hạn số tham số của 1 query)
+LOOKUP_CHUNK = 500
+
+
+def _chunks(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _changes(equipment, data):
+    """{field: (giá trị cũ, giá trị mới)} các field sẽ đổi; giá trị rỗng trong file không ghi đè dữ liệu đã có"""
+    changes = {}
+    for field in FIELDS:
+        value = data[field]
+        if value and value != getattr(equipment, field):
+            changes[field] = (getattr(equipment, field), value)
+    if data['technical_specs']:
+        current_specs = equipment.technical_specs or {}
+        specs = {**current_specs, **data['technical_specs']}
+        if specs != current_specs:
+            changes['technical_specs'] = (current_specs, specs)
+    return changes
+
+
+class Command(BaseCommand):
+    help = 'Nhập hàng loạt file DxDiag.txt trong 1 thư mục vào danh sách thiết bị'
+
+    def add_arguments(self, parser):
+        parser.add_argument('directory', help='Thư mục chứa các file DxDiag (đọc cả thư mục con)')
+        parser.add_argument(
+            '--pattern',
+            default='*.txt',
+            help='Mẫu tên file (mặc định: *.txt)',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=os.cpu_count() or 1,
+            help='Số process parse song song (mặc định: số CPU, 1 = không dùng process pool)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Số thiết bị mỗi lô bulk_create/bulk_update (mặc định: 500)',
+        )
+        parser.add_argument(
+            '--company',
+            help='Mã công ty để tạo thiết bị mới cho các file không khớp thiết bị nào (không có thì bỏ qua các file đó)',
+        )
+        parser.add_argument(
+            '--region',
+            default='MN',
+            choices=[code for code, _ in Equipment.REGIONS],
+            help='Miền của thiết bị mới (mặc định: MN)',
+        )
+        parser.add_argument(
+            '--equipment-type',
+            default='desktop',
+            choices=[code for code, _ in Equipment.EQUIPMENT_TYPES],
+            help='Loại của thiết bị mới (mặc định: desktop)',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Chỉ in các thay đổi, không ghi vào database',
+        )
+
+    def handle(self, *args, **options):
+        directory = Path(options['directory'])
+        if not directory.is_dir():
+            raise CommandError(f'Không tìm thấy thư mục: {directory}')
+        if options['workers'] < 1 or options['batch_size'] < 1:
+            raise CommandError('--workers và --batch-size phải lớn hơn 0')
+
+        company = None
+        if options['company']:
+            company = Company.objects.filter(code=options['company']).first()
+            if company is None:
+                raise CommandError(f'Không tìm thấy công ty có mã: {options["company"]}')
+
+        paths = sorted(path for path in directory.rglob(options['pattern']) if path.is_file())
+        if not paths:
+            self.stdout.write(self.style.WARNING('Không có file nào'))
+            return
+
+        started = time.perf_counter()
+        results = self._parse(paths, options['workers'])
+        parse_seconds = time.perf_counter() - started
+        total_bytes = sum(path.stat().st_size for path in paths)
+
+        # Bỏ file không đọc được tên máy; nhiều file cùng tên máy thì lấy file sửa gần nhất
+        unreadable = []
+        by_machine = {}
+        for path, data in zip(paths, results):
+            if not data['machine_name']:
+                unreadable.append(path)
+                continue
+            key = data['machine_name'].lower()
+            if key not in by_machine or path.stat().st_mtime >= by_machine[key][0].stat().st_mtime:
+                by_machine[key] = (path, data)
+        duplicates = len(paths) - len(unreadable) - len(by_machine)
+
+        started = time.perf_counter()
+        matches, unmatched = self._match(list(by_machine.values()))
+        updates = []
+        unchanged = 0
+        for equipment, path, data in matches:
+            changes = _changes(equipment, data)
+            if not changes:
+                unchanged += 1
+                continue
+            updates.append((equipment, path, changes))
+        creates = unmatched if company else []
+
+        self._report(updates, unmatched, company, unreadable, options['verbosity'])
+
+        if not options['dry_run']:
+            self._apply(updates, creates, company, options)
+        db_seconds = time.perf_counter() - started
+
+        prefix = '[DRY-RUN] ' if options['dry_run'] else '[OK] '
+        self.stdout.write(self.style.SUCCESS(
+            f'{prefix}{len(paths)} file: cập nhật {len(updates)}, tạo mới {len(creates)}, '
+            f'không đổi {unchanged}, không khớp {len(unmatched) - len(creates)}, '
+            f'không đọc được {len(unreadable)}, trùng tên máy {duplicates}'
+        ))
+        self.stdout.write(
+            f'Parse: {parse_seconds:.2f}s ({len(paths) / parse_seconds:.1f} file/s, '
+            f'{total_bytes / 1024 / 1024 / parse_seconds:.1f} MB/s, {options["workers"]} process), '
+            f'database: {db_seconds:.2f}s'
+        )
+
+    def _parse(self, paths, workers):
+        """Kết quả parse_dxdiag của các file, theo đúng thứ tự paths"""
+        names = [str(path) for path in paths]
+        if workers == 1:
+            return [parse_dxdiag(name) for name in names]
+        # Chia thành vài chục lô cho mỗi process để giảm chi phí gửi/nhận giữa các process
+        chunksize = max(len(names) // (workers * 4), 1)
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(parse_dxdiag, names, chunksize=chunksize))
+
+    def _match(self, parsed):
+        """
+        Khớp mỗi file với thiết bị đã có: theo tên máy, không có thì theo mã thiết bị trùng tên file (vd. MN-001.txt)
+        Trả về ([(equipment, path, data)], [(path, data)] không khớp)
+        """
+        keys = set()
+        for path, data in parsed:
+            keys.add(data['machine_name'].lower())
+            keys.add(path.stem.lower())
+
+        by_machine = {}
+        by_code = {}
+        fields = ['id', 'code', 'name', 'technical_specs', *FIELDS]
+        for chunk in _chunks(sorted(keys), LOOKUP_CHUNK):
+            queryset = Equipment.objects.annotate(
+                machine_key=Lower('machine_name'), code_key=Lower('code'),
+            ).filter(Q(machine_key__in=chunk) | Q(code_key__in=chunk)).only(*fields)
+            for equipment in queryset:
+                if equipment.machine_key:
+                    by_machine.setdefault(equipment.machine_key, equipment)
+                by_code[equipment.code_key] = equipment
+
+        matches = []
+        unmatched = []
+        matched_ids = set()
+        for path, data in parsed:
+            equipment = by_machine.get(data['machine_name'].lower()) or by_code.get(path.stem.lower())
+            if equipment is None:
+                unmatched.append((path, data))
+            elif equipment.pk in matched_ids:
+                # 2 file khác tên máy cùng khớp 1 thiết bị (qua mã): chỉ lấy file đầu
+                self.stderr.write(f'[SKIP] {path.name}: thiết bị {equipment.code} đã khớp với file khác')
+            else:
+                matched_ids.add(equipment.pk)
+                matches.append((equipment, path, data))
+        return matches, unmatched
+
+    def _report(self, updates, unmatched, company, unreadable, verbosity):
+        """Danh sách thay đổi: '~' cập nhật (kèm từng field cũ -> mới), '+' tạo mới, '?' không khớp, '!' không đọc được"""
+        if verbosity < 1:
+            return
+        for equipment, path, changes in updates:
+            self.stdout.write(f'~ {equipment.code} ({path.name})')
+            for field, (old, new) in changes.items():
+                if field == 'technical_specs':
+                    for key, value in new.items():
+                        if old.get(key) != value:
+                            self.stdout.write(f'    technical_specs[{key}]: {old.get(key, "")!r} -> {value!r}')
+                else:
+                    self.stdout.write(f'    {field}: {old!r} -> {new!r}')
+        for path, data in unmatched:
+            marker = '+' if company else '?'
+            self.stdout.write(f'{marker} {data["machine_name"]} ({path.name})')
+        for path in unreadable:
+            self.stdout.write(self.style.WARNING(f'! {path.name}: không đọc được tên máy'))
+
+    def _apply(self, updates, creates, company, options):
+        batch_size = options['batch_size']
+        now = timezone.now()
+        changed_fields = set()
+        for equipment, path, changes in updates:
+            for field, (old, new) in changes.items():
+                setattr(equipment, field, new)
+                changed_fields.add(field)
+            equipment.updated_at = now
+
+        with transaction.atomic():
+            if updates:
+                Equipment.objects.bulk_update(
+                    [equipment for equipment, path, changes in updates],
+                    sorted(changed_fields) + ['updated_at'],
+                    batch_size=batch_size,
+                )
+
+            created = []
+            if creates:
+                codes = EquipmentCodeSequence.allocate_many(options['region'], len(creates))
+                for code, (path, data) in zip(codes, creates):
+                    name = f"{data['system_manufacturer']} {data['system_model']}".strip()
+                    created.append(Equipment(
+                        company=company,
+                        region=options['region'],
+                        code=code,
+                        name=(name or data['machine_name'])[:200],
+                        equipment_type=options['equipment_type'],
+                        technical_specs=data['technical_specs'],
+                        **{field: data[field] for field in FIELDS},
+                    ))
+                created = Equipment.objects.bulk_create(created, batch_size=batch_size)
+
+            # bulk_create/bulk_update không gửi signals: tự cập nhật chỉ mục tìm kiếm, số liệu báo cáo,
+            # phiên bản (ETag API) và số thứ tự thay đổi (đồng bộ delta, cả lô dùng chung 1 số)
+            equipment_ids = [equipment.pk for equipment, path, changes in updates] + [equipment.pk for equipment in created]
+            change_id = versions.next_change_id(Equipment) if equipment_ids else None
+            for chunk in _chunks(equipment_ids, LOOKUP_CHUNK):
+                search.index_equipment(Equipment.objects.filter(pk__in=chunk))
+                Equipment.objects.filter(pk__in=chunk).update(change_id=change_id)
+            if equipment_ids:
+                stats.invalidate()
+                versions.bump(Equipment)
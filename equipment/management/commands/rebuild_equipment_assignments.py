@@ -0,0 +1,25 @@
+"""
+Management command để dựng lại sổ giao máy (EquipmentAssignment) từ lịch sử thiết bị
+Chạy khi lịch sử/người sử dụng được sửa trực tiếp trong database (không qua signals)
+"""
+import sys
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from equipment import assignments
+from equipment.models import Equipment, EquipmentAssignment, EquipmentHistory
+
+# Fix encoding cho Windows
+if sys.platform == 'win32':
+    import codecs
+    sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'strict')
+    sys.stderr = codecs.getwriter('utf-8')(sys.stderr.buffer, 'strict')
+
+
+class Command(BaseCommand):
+    help = 'Dựng lại sổ giao máy từ lịch sử giao/chuyển/trả máy'
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            count = assignments.backfill(Equipment, EquipmentHistory, EquipmentAssignment, User)
+        self.stdout.write(self.style.SUCCESS(f'[OK] Đã tạo {count} lần giao máy'))
@@ -0,0 +1,33 @@
+"""
+Management command để dựng lại chỉ mục tìm kiếm thiết bị (equipment/search.py)
+Chạy khi dữ liệu được sửa trực tiếp trong database / bằng queryset.update (không qua signals)
+"""
+import sys
+import time
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from equipment import search
+from equipment.models import Equipment
+
+# Fix encoding cho Windows
+if sys.platform == 'win32':
+    import codecs
+    sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'strict')
+    sys.stderr = codecs.getwriter('utf-8')(sys.stderr.buffer, 'strict')
+
+
+class Command(BaseCommand):
+    help = 'Dựng lại chỉ mục tìm kiếm thiết bị'
+
+    def handle(self, *args, **options):
+        if not search.is_supported(connection):
+            self.stdout.write(self.style.WARNING(
+                f'Database {connection.vendor} không hỗ trợ chỉ mục, tìm kiếm dùng icontains'
+            ))
+            return
+
+        start = time.perf_counter()
+        with transaction.atomic():
+            count = search.rebuild(Equipment.objects.all())
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(f'[OK] Đã đánh chỉ mục {count} thiết bị ({elapsed:.1f}s)'))
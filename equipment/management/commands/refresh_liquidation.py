@@ -0,0 +1,24 @@
+"""
+Management command để tính lại Equipment.liquidated_at từ lịch sử thanh lý
+Chạy khi lịch sử được sửa trực tiếp trong database / bằng queryset.update (không qua signals)
+"""
+import sys
+from django.core.management.base import BaseCommand
+from equipment import stats
+from equipment.models import Equipment
+
+# Fix encoding cho Windows
+if sys.platform == 'win32':
+    import codecs
+    sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'strict')
+    sys.stderr = codecs.getwriter('utf-8')(sys.stderr.buffer, 'strict')
+
+
+class Command(BaseCommand):
+    help = 'Tính lại ngày thanh lý (liquidated_at) của thiết bị từ lịch sử'
+
+    def handle(self, *args, **options):
+        Equipment.objects.all().refresh_liquidation()
+        stats.invalidate()
+        count = Equipment.objects.filter(liquidated_at__isnull=False).count()
+        self.stdout.write(self.style.SUCCESS(f'[OK] Đã cập nhật, {count} thiết bị đã thanh lý'))
@@ -0,0 +1,80 @@
+# Bảng chỉ mục tìm kiếm thiết bị (FTS5 trên SQLite, trigram trên Postgres), xem equipment/search.py
+# SQL được cố định tại đây (không import equipment.search) để migration không đổi theo code hiện tại
+
+from django.db import migrations
+
+TABLE = 'equipment_search'
+
+SQLITE_CREATE = [
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {TABLE} USING fts5("
+    f"name, code, machine_name, user_names, company_name, "
+    f"tokenize='unicode61 remove_diacritics 2')",
+    # Trọng số bm25 theo cột: tên/mã quan trọng hơn người dùng/công ty
+    f"INSERT INTO {TABLE}({TABLE}, rank) VALUES('rank', 'bm25(10.0, 10.0, 5.0, 3.0, 1.0)')",
+]
+
+POSTGRES_CREATE = [
+    'CREATE EXTENSION IF NOT EXISTS pg_trgm',
+    f'CREATE TABLE IF NOT EXISTS {TABLE} ('
+    f'equipment_id bigint PRIMARY KEY REFERENCES equipment_equipment(id) '
+    f'ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED, '
+    f'document text NOT NULL)',
+    f'CREATE INDEX IF NOT EXISTS {TABLE}_document_trgm ON {TABLE} USING gin (document gin_trgm_ops)',
+]
+
+# Dựng chỉ mục từ các thiết bị hiện có ({user_table}: bảng của AUTH_USER_MODEL)
+SQLITE_BACKFILL = (
+    f"INSERT INTO {TABLE}(rowid, name, code, machine_name, user_names, company_name) "
+    f"SELECT e.id, COALESCE(e.name, ''), COALESCE(e.code, ''), COALESCE(e.machine_name, ''), "
+    f"TRIM(COALESCE(u.username, '') || ' ' || COALESCE(u.first_name, '') || ' ' || COALESCE(u.last_name, '')), "
+    f"COALESCE(c.name, '') "
+    f"FROM equipment_equipment e "
+    f"LEFT JOIN {{user_table}} u ON u.id = e.current_user_id "
+    f"LEFT JOIN equipment_company c ON c.id = e.company_id"
+)
+
+POSTGRES_BACKFILL = (
+    f"INSERT INTO {TABLE}(equipment_id, document) "
+    f"SELECT e.id, LOWER(CONCAT_WS(' ', COALESCE(e.name, ''), COALESCE(e.code, ''), COALESCE(e.machine_name, ''), "
+    f"CONCAT_WS(' ', NULLIF(u.username, ''), NULLIF(u.first_name, ''), NULLIF(u.last_name, '')), "
+    f"COALESCE(c.name, ''))) "
+    f"FROM equipment_equipment e "
+    f"LEFT JOIN {{user_table}} u ON u.id = e.current_user_id "
+    f"LEFT JOIN equipment_company c ON c.id = e.company_id"
+)
+
+DROP = f'DROP TABLE IF EXISTS {TABLE}'
+
+
+def create_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor == 'sqlite':
+        statements, backfill = SQLITE_CREATE, SQLITE_BACKFILL
+    elif connection.vendor == 'postgresql':
+        statements, backfill = POSTGRES_CREATE, POSTGRES_BACKFILL
+    else:
+        # Database khác tìm bằng icontains, không cần chỉ mục
+        return
+    Equipment = apps.get_model('equipment', 'Equipment')
+    user_table = Equipment._meta.get_field('current_user').related_model._meta.db_table
+    with connection.cursor() as cursor:
+        for statement in statements:
+            cursor.execute(statement)
+        cursor.execute(backfill.format(user_table=connection.ops.quote_name(user_table)))
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor in ('sqlite', 'postgresql'):
+        with schema_editor.connection.cursor() as cursor:
+            cursor.execute(DROP)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('equipment', '0007_alter_equipment_equipment_type'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:15
+
+from django.db import migrations, models
+
+
+def backfill_liquidated_at(apps, schema_editor):
+    """Điền liquidated_at cho thiết bị đã có lịch sử thanh lý"""
+    Equipment = apps.get_model('equipment', 'Equipment')
+    EquipmentHistory = apps.get_model('equipment', 'EquipmentHistory')
+    latest_liquidation = EquipmentHistory.objects.filter(
+        equipment=models.OuterRef('pk'),
+        action_type='liquidation',
+    ).order_by('-action_date').values('action_date')[:1]
+    Equipment.objects.update(liquidated_at=models.Subquery(latest_liquidation))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('equipment', '0009_equipment_equipment_e_created_98bee5_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='equipment',
+            name='liquidated_at',
+            field=models.DateField(blank=True, db_index=True, editable=False, null=True, verbose_name='Ngày thanh lý'),
+        ),
+        migrations.RunPython(backfill_liquidated_at, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:54
+
+import re
+
+from django.db import migrations, models
+
+
+def seed_code_sequences(apps, schema_editor):
+    """Khởi tạo số thứ tự mỗi miền bằng số lớn nhất trong các mã hiện có (MN-001...)"""
+    Equipment = apps.get_model('equipment', 'Equipment')
+    EquipmentCodeSequence = apps.get_model('equipment', 'EquipmentCodeSequence')
+    for region in ('MN', 'MT', 'MB'):
+        pattern = re.compile(rf'^{region}-(\d+)$')
+        last_value = 0
+        for code in Equipment.objects.filter(code__startswith=f'{region}-').values_list('code', flat=True).iterator():
+            match = pattern.match(code)
+            if match:
+                last_value = max(last_value, int(match.group(1)))
+        EquipmentCodeSequence.objects.update_or_create(region=region, defaults={'last_value': last_value})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('equipment', '0010_equipment_liquidated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EquipmentCodeSequence',
+            fields=[
+                ('region', models.CharField(choices=[('MN', 'Miền Nam'), ('MT', 'Miền Trung'), ('MB', 'Miền Bắc')], max_length=2, primary_key=True, serialize=False, verbose_name='Miền')),
+                ('last_value', models.PositiveIntegerField(default=0, verbose_name='Số đã cấp gần nhất')),
+            ],
+            options={
+                'verbose_name': 'Số thứ tự mã thiết bị',
+                'verbose_name_plural': 'Số thứ tự mã thiết bị',
+            },
+        ),
+        migrations.RunPython(seed_code_sequences, migrations.RunPython.noop),
+    ]
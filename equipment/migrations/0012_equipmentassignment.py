@@ -0,0 +1,46 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:58
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_assignments(apps, schema_editor):
+    """Dựng sổ giao máy từ mô tả lịch sử giao/chuyển/trả máy đã có"""
+    from equipment import assignments
+    assignments.backfill(
+        apps.get_model('equipment', 'Equipment'),
+        apps.get_model('equipment', 'EquipmentHistory'),
+        apps.get_model('equipment', 'EquipmentAssignment'),
+        apps.get_model(settings.AUTH_USER_MODEL),
+        using=schema_editor.connection.alias,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('equipment', '0011_equipmentcodesequence'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EquipmentAssignment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('start_date', models.DateField(verbose_name='Ngày giao')),
+                ('end_date', models.DateField(blank=True, null=True, verbose_name='Ngày trả')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Ngày tạo')),
+                ('equipment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='assignments', to='equipment.equipment', verbose_name='Thiết bị')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='equipment_assignments', to=settings.AUTH_USER_MODEL, verbose_name='Người sử dụng')),
+            ],
+            options={
+                'verbose_name': 'Giao máy',
+                'verbose_name_plural': 'Sổ giao máy',
+                'ordering': ['-start_date', '-id'],
+                'indexes': [models.Index(fields=['equipment', 'user'], name='equipment_e_equipme_ddf393_idx'), models.Index(fields=['user', 'equipment'], name='equipment_e_user_id_73f2dc_idx'), models.Index(fields=['equipment', 'end_date'], name='equipment_e_equipme_1020e1_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_assignments, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:22
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('equipment', '0013_equipmentassignment_user_protect'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='equipment',
+            name='change_id',
+            field=models.BigIntegerField(default=0, editable=False, verbose_name='Số thứ tự thay đổi'),
+        ),
+        migrations.AddIndex(
+            model_name='equipment',
+            index=models.Index(fields=['change_id', 'id'], name='equipment_e_change__88d5ec_idx'),
+        ),
+    ]
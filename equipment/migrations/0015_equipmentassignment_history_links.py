@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:29
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('equipment', '0014_equipment_change_id'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='equipmentassignment',
+            name='closed_by',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='closed_assignments', to='equipment.equipmenthistory', verbose_name='Lịch sử trả máy'),
+        ),
+        migrations.AddField(
+            model_name='equipmentassignment',
+            name='opened_by',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='opened_assignments', to='equipment.equipmenthistory', verbose_name='Lịch sử giao máy'),
+        ),
+    ]
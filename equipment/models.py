@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import models, transaction
 from django.core.validators import MinValueValidator
 from django.contrib.auth.models import User
 from decimal import Decimal
@@ -20,6 +20,16 @@ class Company(models.Model):
         return self.name
 
 
+class EquipmentQuerySet(models.QuerySet):
+    def refresh_liquidation(self):
+        """Tính lại liquidated_at (ngày thanh lý gần nhất trong lịch sử) cho các thiết bị, 1 câu UPDATE"""
+        latest_liquidation = EquipmentHistory.objects.filter(
+            equipment=models.OuterRef('pk'),
+            action_type='liquidation',
+        ).order_by('-action_date').values('action_date')[:1]
+        return self.update(liquidated_at=models.Subquery(latest_liquidation))
+
+
 class Equipment(models.Model):
     """Thiết bị"""
     EQUIPMENT_TYPES = [
@@ -85,15 +95,30 @@ class Equipment(models.Model):
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Ngày tạo")
     updated_at = models.DateTimeField(auto_now=True, verbose_name="Ngày cập nhật")
     is_active = models.BooleanField(default=True, verbose_name="Đang hoạt động")
+    # Ngày thanh lý gần nhất, tự cập nhật từ EquipmentHistory (xem signals.py)
+    liquidated_at = models.DateField(null=True, blank=True, db_index=True, editable=False, verbose_name="Ngày thanh lý")
+    # Số thứ tự thay đổi cho đồng bộ delta của mobile app (xem api/sync.py)
+    change_id = models.BigIntegerField(default=0, editable=False, verbose_name="Số thứ tự thay đổi")
+
+    objects = EquipmentQuerySet.as_manager()
 
     class Meta:
         verbose_name = "Thiết bị"
         verbose_name_plural = "Thiết bị"
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-created_at', '-id']),
+            models.Index(fields=['change_id', 'id']),
+        ]
 
     def __str__(self):
         return f"{self.name} ({self.code})"
 
+    @property
+    def has_liquidation(self):
+        """Thiết bị đã có lịch sử thanh lý"""
+        return self.liquidated_at is not None
+
 
 class EquipmentHistory(models.Model):
     """Lịch sử thiết bị - sửa chữa, thay thế, di chuyển, thanh lý"""
@@ -124,3 +149,93 @@ class EquipmentHistory(models.Model):
     def __str__(self):
         return f"{self.equipment.name} - {self.get_action_type_display()} - {self.action_date}"
 
+
+class EquipmentAssignment(models.Model):
+    """Sổ giao máy: mỗi dòng là 1 lần thiết bị được giao cho 1 người, end_date trống là đang sử dụng"""
+    equipment = models.ForeignKey(Equipment, on_delete=models.CASCADE, related_name='assignments', verbose_name="Thiết bị")
+    # Không cho xóa user còn trong sổ giao máy (mất dấu ai đã giữ thiết bị): vô hiệu hóa user thay vì xóa
+    user = models.ForeignKey(User, on_delete=models.PROTECT, related_name='equipment_assignments', verbose_name="Người sử dụng")
+    start_date = models.DateField(verbose_name="Ngày giao")
+    end_date = models.DateField(null=True, blank=True, verbose_name="Ngày trả")
+    # Dòng lịch sử đã mở/đóng lần giao này (xem assignments.link_history / revert)
+    opened_by = models.ForeignKey(
+        EquipmentHistory, on_delete=models.SET_NULL, null=True, blank=True, editable=False,
+        related_name='opened_assignments', verbose_name="Lịch sử giao máy",
+    )
+    closed_by = models.ForeignKey(
+        EquipmentHistory, on_delete=models.SET_NULL, null=True, blank=True, editable=False,
+        related_name='closed_assignments', verbose_name="Lịch sử trả máy",
+    )
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Ngày tạo")
+
+    class Meta:
+        verbose_name = "Giao máy"
+        verbose_name_plural = "Sổ giao máy"
+        ordering = ['-start_date', '-id']
+        indexes = [
+            models.Index(fields=['equipment', 'user']),
+            models.Index(fields=['user', 'equipment']),
+            models.Index(fields=['equipment', 'end_date']),
+        ]
+
+    def __str__(self):
+        return f"{self.equipment} - {self.user} ({self.start_date} → {self.end_date or '...'})"
+
+
+class EquipmentCodeSequence(models.Model):
+    """Số thứ tự mã thiết bị theo miền (MN-001, MN-002...), cấp phát nguyên tử để không trùng mã"""
+    region = models.CharField(max_length=2, choices=Equipment.REGIONS, primary_key=True, verbose_name="Miền")
+    last_value = models.PositiveIntegerField(default=0, verbose_name="Số đã cấp gần nhất")
+
+    class Meta:
+        verbose_name = "Số thứ tự mã thiết bị"
+        verbose_name_plural = "Số thứ tự mã thiết bị"
+
+    def __str__(self):
+        return f"{self.region}: {self.last_value}"
+
+    @staticmethod
+    def format_code(region, number):
+        return f"{region}-{number:03d}"
+
+    @classmethod
+    def peek(cls, region):
+        """Mã tiếp theo dự kiến (chỉ để hiển thị, không cấp phát)"""
+        last_value = cls.objects.filter(region=region).values_list('last_value', flat=True).first() or 0
+        return cls.format_code(region, last_value + 1)
+
+    @classmethod
+    def allocate(cls, region):
+        """
+        Cấp mã mới cho miền: UPDATE tăng số trước (khóa dòng tới hết transaction) rồi mới đọc lại,
+        nên 2 request đồng thời luôn nhận 2 số khác nhau. Bỏ qua số đã bị dùng bởi mã nhập tay/import
+        """
+        with transaction.atomic():
+            while True:
+                if not cls.objects.filter(region=region).update(last_value=models.F('last_value') + 1):
+                    # Miền chưa có dòng số thứ tự (migration đã tạo sẵn cho các miền hiện có)
+                    cls.objects.get_or_create(region=region)
+                    continue
+                number = cls.objects.filter(region=region).values_list('last_value', flat=True).get()
+                code = cls.format_code(region, number)
+                if not Equipment.objects.filter(code=code).exists():
+                    return code
+
+    @classmethod
+    def allocate_many(cls, region, count):
+        """
+        Cấp 1 lần count mã liên tiếp (dùng khi import hàng loạt): 1 UPDATE tăng count thay vì count lần,
+        các số đã bị dùng thì bỏ qua và xin thêm cho đủ
+        """
+        codes = []
+        with transaction.atomic():
+            while len(codes) < count:
+                needed = count - len(codes)
+                if not cls.objects.filter(region=region).update(last_value=models.F('last_value') + needed):
+                    cls.objects.get_or_create(region=region)
+                    continue
+                last_value = cls.objects.filter(region=region).values_list('last_value', flat=True).get()
+                candidates = [cls.format_code(region, number) for number in range(last_value - needed + 1, last_value + 1)]
+                taken = set(Equipment.objects.filter(code__in=candidates).values_list('code', flat=True))
+                codes += [code for code in candidates if code not in taken]
+        return codes
@@ -1,13 +1,167 @@
 """
 Parser cho file DxDiag.txt để trích xuất thông tin hệ thống
+Đọc file 1 lần theo từng dòng (không nạp cả file vào bộ nhớ), nhận biết encoding qua BOM (DxDiag hay lưu UTF-16),
+ghi nhận mục đang đọc (System Information, Display Devices, Disk & DVD/CD-ROM Drives) và dừng khi đã qua các mục cần lấy
 """
-import re
-from datetime import datetime
+import codecs
+import io
+
+# Các field lấy từ mục System Information: key trong file (chữ thường) -> key trong kết quả
+SYSTEM_FIELDS = {
+    'machine name': 'machine_name',
+    'operating system': 'operating_system',
+    'system manufacturer': 'system_manufacturer',
+    'system model': 'system_model',
+    'processor': 'processor',
+    'memory': 'memory',
+    'bios': 'bios',
+    'directx version': 'directx_version',
+}
+
+# Các field của 1 card màn hình (mục Display Devices)
+DISPLAY_FIELDS = {
+    'card name': 'card_name',
+    'manufacturer': 'manufacturer',
+    'chip type': 'chip_type',
+    'display memory': 'display_memory',
+    'dedicated memory': 'dedicated_memory',
+    'current mode': 'current_mode',
+    'monitor name': 'monitor_name',
+    'monitor model': 'monitor_model',
+}
+
+# Các field của 1 ổ đĩa (mục Disk & DVD/CD-ROM Drives)
+DRIVE_FIELDS = {
+    'drive': 'drive',
+    'free space': 'free_space',
+    'total space': 'total_space',
+    'file system': 'file_system',
+    'model': 'model',
+}
+
+SYSTEM_SECTION = 'system information'
+DISPLAY_SECTION = 'display devices'
+DRIVE_SECTION = 'disk & dvd/cd-rom drives'
+SECTIONS = (SYSTEM_SECTION, DISPLAY_SECTION, DRIVE_SECTION)
+
+SSD_KEYWORDS = ['SSD', 'SOLID', 'SA400', 'MX500', '860', '870', '970', '980', 'NVME', 'M.2']
+
+# Độ dài tối đa của các CharField trên Equipment (ghép nhiều card/màn hình không được vượt quá)
+MAX_FIELD_LENGTH = 200
+
+BOMS = [
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+]
+
+
+def detect_encoding(head):
+    """Encoding từ vài byte đầu file: BOM, hoặc UTF-16 LE không BOM (byte 0 xen kẽ), mặc định UTF-8"""
+    for bom, encoding in BOMS:
+        if head.startswith(bom):
+            return encoding
+    if len(head) >= 4 and head[1::2].count(0) >= len(head) // 4:
+        return 'utf-16-le'
+    return 'utf-8'
+
+
+def iter_lines(file_path):
+    """Các dòng của file (đã decode), đọc dần theo buffer"""
+    with open(file_path, 'rb') as raw:
+        encoding = detect_encoding(raw.read(64))
+        raw.seek(0)
+        yield from io.TextIOWrapper(raw, encoding=encoding, errors='ignore')
+
+
+def _drive_type(model):
+    model = model.upper()
+    if 'HDD' in model or 'HARD' in model:
+        return 'HDD'
+    if any(keyword in model for keyword in SSD_KEYWORDS):
+        return 'SSD'
+    return 'HDD'
+
+
+def _join(values, limit=MAX_FIELD_LENGTH):
+    """Ghép các giá trị khác nhau (giữ thứ tự), cắt cho vừa CharField"""
+    unique = list(dict.fromkeys(value for value in values if value))
+    return ' | '.join(unique)[:limit]
+
+
+def _format_memory(memory):
+    """'16384MB RAM' -> '16384 MB (16.0 GB)', định dạng khác giữ nguyên"""
+    number = memory.upper().replace('RAM', '').replace('MB', '').strip()
+    if number.isdigit():
+        memory_mb = int(number)
+        return f"{memory_mb} MB ({memory_mb / 1024:.1f} GB)"
+    return memory
+
+
+def scan(lines):
+    """
+    Đọc các dòng DxDiag, trả về (system, display_devices, drives)
+    Mỗi mục bắt đầu bằng 1 dòng tiêu đề kẹp giữa 2 dòng '-----'; mỗi card bắt đầu bằng 'Card name', mỗi ổ bằng 'Drive'
+    """
+    system = {}
+    display_devices = []
+    drives = []
+    section = None
+    previous_rule = False
+    title = None
+    seen = set()
+
+    for line in lines:
+        stripped = line.strip()
+        if stripped and set(stripped) == {'-'}:
+            if title is not None:
+                section = title
+                seen.add(section)
+                title = None
+            else:
+                previous_rule = True
+            continue
+        if previous_rule:
+            previous_rule = False
+            title = stripped.lower()
+            if section == DRIVE_SECTION or (title not in SECTIONS and seen >= set(SECTIONS)):
+                # Đã qua mục ổ đĩa (các mục sau như DirectShow Filters rất dài và không cần)
+                break
+            continue
+        title = None
+
+        key, sep, value = stripped.partition(':')
+        if not sep:
+            continue
+        key = key.strip().lower()
+        value = value.strip()
+
+        if section == SYSTEM_SECTION:
+            field = SYSTEM_FIELDS.get(key)
+            if field and field not in system:
+                system[field] = value
+        elif section == DISPLAY_SECTION:
+            field = DISPLAY_FIELDS.get(key)
+            if field == 'card_name' or (field and not display_devices):
+                display_devices.append({})
+            if field:
+                display_devices[-1].setdefault(field, value)
+        elif section == DRIVE_SECTION:
+            field = DRIVE_FIELDS.get(key)
+            if field == 'drive' or (field and not drives):
+                drives.append({})
+            if field:
+                drives[-1].setdefault(field, value)
+
+    for drive in drives:
+        drive['type'] = _drive_type(drive.get('model', ''))
+    return system, display_devices, drives
 
 
 def parse_dxdiag(file_path):
     """
     Parse file DxDiag.txt và trả về dictionary chứa thông tin hệ thống
+    Ngoài các field của Equipment còn có display_devices và drives (tất cả card màn hình/ổ đĩa trong file)
     """
     result = {
         'machine_name': '',
@@ -19,134 +173,57 @@ def parse_dxdiag(file_path):
         'graphics_card': '',
         'monitor_name': '',
         'monitor_model': '',
-        'technical_specs': {}
+        'technical_specs': {},
+        'display_devices': [],
+        'drives': [],
     }
-    
+
     try:
-        with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-            content = f.read()
-    except Exception as e:
+        system, display_devices, drives = scan(iter_lines(file_path))
+    except (OSError, UnicodeError):
         return result
-    
-    # Parse Machine name
-    machine_match = re.search(r'Machine name:\s*(.+)', content, re.IGNORECASE)
-    if machine_match:
-        result['machine_name'] = machine_match.group(1).strip()
-    
-    # Parse Operating System
-    os_match = re.search(r'Operating System:\s*(.+)', content, re.IGNORECASE)
-    if os_match:
-        result['operating_system'] = os_match.group(1).strip()
-    
-    # Parse System Manufacturer
-    manufacturer_match = re.search(r'System Manufacturer:\s*(.+)', content, re.IGNORECASE)
-    if manufacturer_match:
-        result['system_manufacturer'] = manufacturer_match.group(1).strip()
-    
-    # Parse System Model
-    model_match = re.search(r'System Model:\s*(.+)', content, re.IGNORECASE)
-    if model_match:
-        result['system_model'] = model_match.group(1).strip()
-    
-    # Parse Processor
-    processor_match = re.search(r'Processor:\s*(.+)', content, re.IGNORECASE)
-    if processor_match:
-        result['processor'] = processor_match.group(1).strip()
-    
-    # Parse Memory
-    memory_match = re.search(r'Memory:\s*(\d+)\s*MB\s*RAM', content, re.IGNORECASE)
-    if memory_match:
-        memory_mb = int(memory_match.group(1))
-        memory_gb = memory_mb / 1024
-        result['memory'] = f"{memory_mb} MB ({memory_gb:.1f} GB)"
-    else:
-        # Try alternative format
-        memory_match = re.search(r'Memory:\s*(.+)', content, re.IGNORECASE)
-        if memory_match:
-            result['memory'] = memory_match.group(1).strip()
-    
-    # Parse Graphics Card (first display device - Card name)
-    graphics_match = re.search(r'Card name:\s*(.+)', content, re.IGNORECASE)
-    if graphics_match:
-        card_name = graphics_match.group(1).strip()
-        result['graphics_card'] = card_name
-        result['technical_specs']['Card name'] = card_name
-    
+
+    for field in ('machine_name', 'operating_system', 'system_manufacturer', 'system_model', 'processor'):
+        result[field] = system.get(field, '')
+    if system.get('memory'):
+        result['memory'] = _format_memory(system['memory'])
+    result['display_devices'] = display_devices
+    result['drives'] = drives
+
+    result['graphics_card'] = _join(device.get('card_name') for device in display_devices)
+    result['monitor_name'] = _join(device.get('monitor_name') for device in display_devices)
+    result['monitor_model'] = _join(device.get('monitor_model') for device in display_devices)
+
     # Lưu các thông số chính vào technical_specs
+    specs = result['technical_specs']
+    if result['graphics_card']:
+        specs['Card name'] = result['graphics_card']
     if result['processor']:
-        result['technical_specs']['Processor'] = result['processor']
-    
+        specs['Processor'] = result['processor']
     if result['memory']:
-        result['technical_specs']['Memory'] = result['memory']
-    
+        specs['Memory'] = result['memory']
     if result['system_manufacturer']:
-        result['technical_specs']['System Manufacturer'] = result['system_manufacturer']
-    
+        specs['System Manufacturer'] = result['system_manufacturer']
     if result['system_model']:
-        result['technical_specs']['System Model'] = result['system_model']
-    
-    # Parse Disk & DVD/CD-ROM Drives để lấy SSD/HDD
-    disk_section_match = re.search(r'Disk & DVD/CD-ROM Drives\s*-+\s*(.+?)(?=\n-{3,}|\Z)', content, re.IGNORECASE | re.DOTALL)
-    if disk_section_match:
-        disk_section = disk_section_match.group(1)
-        # Tìm tất cả các ổ đĩa
-        drives = []
-        drive_pattern = r'Drive:\s*([A-Z]:)\s*\n\s*Free Space:\s*(.+?)\s*\n\s*Total Space:\s*(.+?)\s*\n\s*File System:\s*(.+?)\s*\n\s*Model:\s*(.+?)(?=\n\s*Drive:|\n-{3,}|\Z)'
-        for match in re.finditer(drive_pattern, disk_section, re.IGNORECASE | re.MULTILINE):
-            drive_letter = match.group(1)
-            free_space = match.group(2).strip()
-            total_space = match.group(3).strip()
-            file_system = match.group(4).strip()
-            model = match.group(5).strip()
-            
-            # Xác định loại ổ đĩa (SSD hoặc HDD) dựa trên model
-            drive_type = 'Unknown'
-            if 'SSD' in model.upper() or 'SOLID' in model.upper():
-                drive_type = 'SSD'
-            elif 'HDD' in model.upper() or 'HARD' in model.upper():
-                drive_type = 'HDD'
-            else:
-                # Một số model phổ biến của SSD
-                ssd_keywords = ['SA400', 'MX500', '860', '870', '970', '980', 'NVMe', 'M.2']
-                if any(keyword in model.upper() for keyword in ssd_keywords):
-                    drive_type = 'SSD'
-                else:
-                    drive_type = 'HDD'
-            
-            drive_info = f"{drive_letter} - {model} ({drive_type}) - Total: {total_space}, Free: {free_space}"
-            drives.append(drive_info)
-        
-        if drives:
-            result['technical_specs']['Storage (SSD/HDD)'] = ' | '.join(drives)
-    
-    # Parse BIOS
-    bios_match = re.search(r'BIOS:\s*(.+)', content, re.IGNORECASE)
-    if bios_match:
-        result['technical_specs']['BIOS'] = bios_match.group(1).strip()
-    
-    # Parse DirectX Version
-    directx_match = re.search(r'DirectX Version:\s*(.+)', content, re.IGNORECASE)
-    if directx_match:
-        result['technical_specs']['DirectX Version'] = directx_match.group(1).strip()
-    
-    # Parse Monitor Name
-    monitor_match = re.search(r'Monitor Name:\s*(.+)', content, re.IGNORECASE)
-    if monitor_match:
-        monitor_name = monitor_match.group(1).strip()
-        result['monitor_name'] = monitor_name
-        result['technical_specs']['Monitor'] = monitor_name
-    
-    # Parse Monitor Model
-    monitor_model_match = re.search(r'Monitor Model:\s*(.+)', content, re.IGNORECASE)
-    if monitor_model_match:
-        monitor_model = monitor_model_match.group(1).strip()
-        result['monitor_model'] = monitor_model
-        result['technical_specs']['Monitor Model'] = monitor_model
-    
-    # Parse Current Mode (resolution)
-    resolution_match = re.search(r'Current Mode:\s*(.+)', content, re.IGNORECASE)
-    if resolution_match:
-        result['technical_specs']['Resolution'] = resolution_match.group(1).strip()
-    
-    return result
+        specs['System Model'] = result['system_model']
+    # Chỉ các ổ có dung lượng (bỏ ổ DVD/CD-ROM)
+    storage = [
+        f"{drive.get('drive', '')} - {drive.get('model', '')} ({drive['type']}) - "
+        f"Total: {drive['total_space']}, Free: {drive.get('free_space', '')}"
+        for drive in drives if drive.get('total_space')
+    ]
+    if storage:
+        specs['Storage (SSD/HDD)'] = ' | '.join(storage)
+    if system.get('bios'):
+        specs['BIOS'] = system['bios']
+    if system.get('directx_version'):
+        specs['DirectX Version'] = system['directx_version']
+    if result['monitor_name']:
+        specs['Monitor'] = result['monitor_name']
+    if result['monitor_model']:
+        specs['Monitor Model'] = result['monitor_model']
+    resolution = _join(device.get('current_mode') for device in display_devices)
+    if resolution:
+        specs['Resolution'] = resolution
 
+    return result
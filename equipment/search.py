@@ -0,0 +1,166 @@
+"""
+Chỉ mục tìm kiếm thiết bị theo tên, mã, tên máy, người sử dụng và công ty
+SQLite: bảng FTS5 (bỏ dấu tiếng Việt, xếp hạng bm25). Postgres: bảng document + index trigram (pg_trgm)
+Database khác tìm bằng icontains như cũ
+Chỉ mục được cập nhật qua signals (xem signals.py), dựng lại toàn bộ bằng `manage.py rebuild_equipment_search`
+"""
+import re
+
+from django.db import connections
+from django.db.models import Q
+
+TABLE = 'equipment_search'
+SUPPORTED_VENDORS = ('sqlite', 'postgresql')
+BATCH_SIZE = 1000
+TOKEN_RE = re.compile(r'\w+')
+
+# Các cột của chỉ mục, lấy từ Equipment qua values_list
+DOCUMENT_FIELDS = [
+    'id', 'name', 'code', 'machine_name',
+    'current_user__username', 'current_user__first_name', 'current_user__last_name',
+    'company__name',
+]
+
+
+def is_supported(connection):
+    return connection.vendor in SUPPORTED_VENDORS
+
+
+def create_index(connection):
+    """Tạo bảng chỉ mục (chạy trong migration)"""
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {TABLE} USING fts5("
+                f"name, code, machine_name, user_names, company_name, "
+                f"tokenize='unicode61 remove_diacritics 2')"
+            )
+            # Trọng số bm25 theo cột: tên/mã quan trọng hơn người dùng/công ty
+            cursor.execute(f"INSERT INTO {TABLE}({TABLE}, rank) VALUES('rank', 'bm25(10.0, 10.0, 5.0, 3.0, 1.0)')")
+        elif connection.vendor == 'postgresql':
+            cursor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+            cursor.execute(
+                f'CREATE TABLE IF NOT EXISTS {TABLE} ('
+                f'equipment_id bigint PRIMARY KEY REFERENCES equipment_equipment(id) '
+                f'ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED, '
+                f'document text NOT NULL)'
+            )
+            cursor.execute(
+                f'CREATE INDEX IF NOT EXISTS {TABLE}_document_trgm ON {TABLE} USING gin (document gin_trgm_ops)'
+            )
+
+
+def drop_index(connection):
+    if is_supported(connection):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DROP TABLE IF EXISTS {TABLE}')
+
+
+def _document(row):
+    """(id, name, code, machine_name, user_names, company_name) từ 1 dòng values_list"""
+    equipment_id, name, code, machine_name, username, first_name, last_name, company_name = row
+    user_names = ' '.join(part for part in (username, first_name, last_name) if part)
+    return equipment_id, name or '', code or '', machine_name or '', user_names, company_name or ''
+
+
+def _write(connection, rows):
+    documents = [_document(row) for row in rows]
+    if not documents:
+        return
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.executemany(
+                f'INSERT INTO {TABLE}(rowid, name, code, machine_name, user_names, company_name) VALUES (%s, %s, %s, %s, %s, %s)',
+                documents,
+            )
+        else:
+            cursor.executemany(
+                f'INSERT INTO {TABLE}(equipment_id, document) VALUES (%s, %s)',
+                [(doc[0], ' '.join(doc[1:]).lower()) for doc in documents],
+            )
+
+
+def _delete(connection, equipment_ids):
+    id_column = 'rowid' if connection.vendor == 'sqlite' else 'equipment_id'
+    with connection.cursor() as cursor:
+        cursor.executemany(f'DELETE FROM {TABLE} WHERE {id_column} = %s', [(pk,) for pk in equipment_ids])
+
+
+def index_equipment(queryset):
+    """Cập nhật chỉ mục cho các thiết bị trong queryset (1 query đọc + ghi theo lô)"""
+    connection = connections[queryset.db]
+    if not is_supported(connection):
+        return
+    rows = list(queryset.order_by().values_list(*DOCUMENT_FIELDS))
+    _delete(connection, [row[0] for row in rows])
+    _write(connection, rows)
+
+
+def remove_equipment(equipment_ids, using='default'):
+    connection = connections[using]
+    if is_supported(connection) and equipment_ids:
+        _delete(connection, equipment_ids)
+
+
+def rebuild(queryset):
+    """Xóa và dựng lại toàn bộ chỉ mục từ queryset Equipment, trả về số thiết bị đã đánh chỉ mục"""
+    connection = connections[queryset.db]
+    if not is_supported(connection):
+        return 0
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {TABLE}')
+
+    count = 0
+    batch = []
+    for row in queryset.order_by().values_list(*DOCUMENT_FIELDS).iterator(chunk_size=BATCH_SIZE):
+        batch.append(row)
+        if len(batch) >= BATCH_SIZE:
+            _write(connection, batch)
+            count += len(batch)
+            batch = []
+    _write(connection, batch)
+    return count + len(batch)
+
+
+def legacy_filter(queryset, text):
+    """Tìm bằng icontains trên các cột (dùng cho database không hỗ trợ chỉ mục)"""
+    return queryset.filter(
+        Q(name__icontains=text) |
+        Q(code__icontains=text) |
+        Q(machine_name__icontains=text) |
+        Q(current_user__username__icontains=text) |
+        Q(current_user__first_name__icontains=text) |
+        Q(current_user__last_name__icontains=text) |
+        Q(company__name__icontains=text)
+    )
+
+
+def filter_queryset(queryset, text):
+    """
+    Lọc queryset Equipment theo từ khóa qua chỉ mục, mỗi từ khớp theo tiền tố (AND giữa các từ)
+    Kết quả xếp theo độ liên quan (cột search_rank, nhỏ hơn = liên quan hơn), sau đó theo thứ tự cũ
+    """
+    connection = connections[queryset.db]
+    tokens = TOKEN_RE.findall(text.lower())
+    if not tokens or not is_supported(connection):
+        return legacy_filter(queryset, text)
+
+    # Join thẳng bảng chỉ mục (1 lần quét chỉ mục), không dùng subquery tương quan cho từng dòng
+    equipment_table = connection.ops.quote_name(queryset.model._meta.db_table)
+    if connection.vendor == 'sqlite':
+        match = ' '.join(f'"{token}"*' for token in tokens)
+        where = [f'{TABLE} MATCH %s', f'{TABLE}.rowid = {equipment_table}."id"']
+        params = [match]
+        select = {'search_rank': f'{TABLE}.rank'}
+        select_params = []
+    else:
+        where = [f'{TABLE}.equipment_id = {equipment_table}."id"']
+        where += [f'{TABLE}.document LIKE %s'] * len(tokens)
+        params = [f'%{token}%' for token in tokens]
+        select = {'search_rank': f'-word_similarity(%s, {TABLE}.document)'}
+        select_params = [' '.join(tokens)]
+
+    ordering = list(queryset.query.order_by or queryset.model._meta.ordering)
+    return queryset.extra(
+        tables=[TABLE], where=where, params=params, select=select, select_params=select_params,
+    ).order_by('search_rank', *ordering)
@@ -0,0 +1,94 @@
+from django.contrib.auth.models import User
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from . import assignments, search, stats
+from .models import Company, Equipment, EquipmentHistory
+
+# Các field của User có trong chỉ mục tìm kiếm thiết bị
+USER_SEARCH_FIELDS = {'username', 'first_name', 'last_name'}
+
+
+@receiver(post_save, sender=Equipment)
+def index_saved_equipment(sender, instance, raw=False, using='default', **kwargs):
+    """Thiết bị được thêm/sửa thì cập nhật chỉ mục tìm kiếm"""
+    if not raw:
+        search.index_equipment(Equipment.objects.using(using).filter(pk=instance.pk))
+
+
+@receiver(post_delete, sender=Equipment)
+def remove_deleted_equipment(sender, instance, using='default', **kwargs):
+    search.remove_equipment([instance.pk], using=using)
+
+
+@receiver(post_save, sender=Company)
+def reindex_company_equipment(sender, instance, created=False, raw=False, using='default', **kwargs):
+    """Đổi tên công ty thì cập nhật chỉ mục các thiết bị của công ty"""
+    if not created and not raw:
+        search.index_equipment(Equipment.objects.using(using).filter(company=instance))
+
+
+@receiver(post_save, sender=User)
+def reindex_user_equipment(sender, instance, created=False, raw=False, update_fields=None, using='default', **kwargs):
+    """Đổi tên người dùng thì cập nhật chỉ mục các thiết bị họ đang sử dụng (bỏ qua khi chỉ cập nhật last_login...)"""
+    if created or raw or (update_fields and not USER_SEARCH_FIELDS & set(update_fields)):
+        return
+    search.index_equipment(Equipment.objects.using(using).filter(current_user=instance))
+
+
+@receiver(pre_delete, sender=User)
+def remember_user_equipment(sender, instance, using='default', **kwargs):
+    instance._search_equipment_ids = list(
+        Equipment.objects.using(using).filter(current_user=instance).values_list('id', flat=True)
+    )
+
+
+@receiver(post_delete, sender=User)
+def reindex_user_equipment_after_delete(sender, instance, using='default', **kwargs):
+    """Xóa user thì current_user của thiết bị thành NULL (SET_NULL không gửi signal) nên cập nhật lại chỉ mục"""
+    equipment_ids = getattr(instance, '_search_equipment_ids', None)
+    if equipment_ids:
+        search.index_equipment(Equipment.objects.using(using).filter(id__in=equipment_ids))
+
+
+@receiver(post_save, sender=EquipmentHistory)
+def link_history_assignments(sender, instance, created=False, raw=False, using='default', **kwargs):
+    """Lịch sử giao/trả máy mới thì gắn với các lần giao vừa được mở/đóng trong sổ giao máy"""
+    if created and not raw and instance.action_type in assignments.LEDGER_ACTION_TYPES:
+        assignments.link_history(instance, using)
+
+
+@receiver(pre_save, sender=EquipmentHistory)
+def remember_history_equipment(sender, instance, raw=False, using='default', **kwargs):
+    """Lưu thiết bị cũ của lịch sử (khi sửa lịch sử sang thiết bị khác thì thiết bị cũ cũng phải tính lại)"""
+    if instance.pk and not raw:
+        instance._previous_equipment_id = EquipmentHistory.objects.using(using).filter(
+            pk=instance.pk
+        ).values_list('equipment_id', flat=True).first()
+
+
+@receiver(post_save, sender=EquipmentHistory)
+@receiver(post_delete, sender=EquipmentHistory)
+def refresh_equipment_liquidation(sender, instance, raw=False, using='default', **kwargs):
+    """Thêm/sửa/xóa lịch sử thì cập nhật Equipment.liquidated_at"""
+    if raw:
+        return
+    equipment_ids = {instance.equipment_id, getattr(instance, '_previous_equipment_id', None)} - {None}
+    Equipment.objects.using(using).filter(pk__in=equipment_ids).refresh_liquidation()
+
+
+@receiver(post_save, sender=Equipment)
+@receiver(post_delete, sender=Equipment)
+@receiver(post_save, sender=EquipmentHistory)
+@receiver(post_delete, sender=EquipmentHistory)
+def invalidate_report_stats(sender, using='default', **kwargs):
+    """Thiết bị hoặc lịch sử (thanh lý) thay đổi thì bỏ snapshot thống kê báo cáo"""
+    stats.invalidate(using)
+
+
+@receiver(post_save, sender=Equipment)
+def sync_equipment_assignment(sender, instance, created=False, raw=False, using='default', **kwargs):
+    """Đổi người sử dụng thì ghi sổ giao máy (ngày giao lấy từ _assignment_date nếu view có đặt, mặc định hôm nay)"""
+    if raw or (created and not instance.current_user_id):
+        return
+    assignments.sync(instance, getattr(instance, '_assignment_date', None), using)
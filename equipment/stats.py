@@ -0,0 +1,55 @@
+"""
+Thống kê tổng quan cho trang báo cáo thiết bị
+Tính bằng 1 câu aggregate (Count có điều kiện) và cache thành snapshot theo version:
+lưu/xóa Equipment hoặc EquipmentHistory thì tăng version (xem signals.py), snapshot cũ tự bị bỏ qua
+Version lưu trong database (equipment_management.versions) nên tăng ở process nào thì mọi process đều thấy,
+kể cả khi cache là LocMemCache riêng của từng process
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q
+
+from equipment_management import versions
+
+from .models import Equipment
+
+VERSION_KEY = 'equipment_report_stats'
+
+# Thời gian giữ snapshot (giây), để phòng dữ liệu bị sửa thẳng trong database không qua signals
+SNAPSHOT_TTL = getattr(settings, 'EQUIPMENT_REPORT_STATS_TTL', 3600)
+
+
+def compute():
+    """Đếm tổng, hoạt động, đang sử dụng, đã thanh lý, theo miền và theo loại trong 1 query"""
+    aggregates = {
+        'total_equipment': Count('id'),
+        'active_equipment': Count('id', filter=Q(is_active=True)),
+        'inactive_equipment': Count('id', filter=Q(is_active=False)),
+        'in_use': Count('id', filter=Q(current_user__isnull=False)),
+        'liquidation_equipment': Count('id', filter=Q(liquidated_at__isnull=False)),
+    }
+    for code, _ in Equipment.REGIONS:
+        aggregates[f'region_{code}'] = Count('id', filter=Q(region=code))
+    for code, _ in Equipment.EQUIPMENT_TYPES:
+        aggregates[f'type_{code}'] = Count('id', filter=Q(equipment_type=code))
+
+    row = Equipment.objects.order_by().aggregate(**aggregates)
+    stats = {key: value for key, value in row.items() if not key.startswith(('region_', 'type_'))}
+    stats['region_stats'] = {code: row[f'region_{code}'] for code, _ in Equipment.REGIONS}
+    stats['type_stats'] = {code: row[f'type_{code}'] for code, _ in Equipment.EQUIPMENT_TYPES}
+    return stats
+
+
+def get_stats():
+    """Snapshot thống kê hiện tại (lấy từ cache, chưa có thì tính lại)"""
+    key = f'equipment_report_stats:{versions.get(VERSION_KEY)}'
+    stats = cache.get(key)
+    if stats is None:
+        stats = compute()
+        cache.set(key, stats, SNAPSHOT_TTL)
+    return stats
+
+
+def invalidate(using='default'):
+    """Bỏ snapshot hiện tại: tăng version trong transaction đang chạy, có hiệu lực cùng lúc với dữ liệu khi commit"""
+    versions.bump(VERSION_KEY, using=using)
@@ -0,0 +1,121 @@
+from datetime import date
+
+from django.contrib.auth.models import User
+from django.db.models import ProtectedError
+from django.test import TestCase
+from django.urls import reverse
+
+from .forms import EquipmentForm
+from .models import Company, Equipment, EquipmentAssignment, EquipmentCodeSequence, EquipmentHistory
+
+
+class EquipmentFormCodeTests(TestCase):
+    """Mã xem trước được thay bằng mã cấp khi lưu, mã nhập tay được giữ nguyên"""
+
+    def setUp(self):
+        self.company = Company.objects.create(name='Công ty A', code='A')
+
+    def save(self, **data):
+        form = EquipmentForm(data={
+            'company': self.company.pk, 'region': 'MN', 'name': 'Máy', 'equipment_type': 'desktop',
+            'is_active': True, **data,
+        })
+        self.assertTrue(form.is_valid(), form.errors)
+        return form.save()
+
+    def test_blank_code_allocated(self):
+        self.assertEqual(self.save(code='').code, 'MN-001')
+
+    def test_stale_preview_replaced(self):
+        preview = EquipmentCodeSequence.peek('MN')
+        # Người khác lưu trước, lấy mất mã đang xem trước
+        self.save(code=preview)
+        self.assertEqual(self.save(code=preview, code_preview=preview).code, 'MN-002')
+
+    def test_manual_code_kept(self):
+        self.assertEqual(self.save(code='MN-050').code, 'MN-050')
+        self.assertEqual(self.save(code='').code, 'MN-001')
+
+    def test_duplicate_manual_code_rejected(self):
+        self.save(code='MN-050')
+        form = EquipmentForm(data={
+            'company': self.company.pk, 'region': 'MN', 'name': 'Máy', 'equipment_type': 'desktop', 'code': 'MN-050',
+        })
+        self.assertFalse(form.is_valid())
+        self.assertIn('code', form.errors)
+        self.assertEqual(Equipment.objects.count(), 1)
+
+
+class HistoryDeleteAssignmentTests(TestCase):
+    """Xóa lịch sử giao/trả máy thì sổ giao máy bỏ lần giao/trả tương ứng"""
+
+    def setUp(self):
+        self.client.force_login(User.objects.create_user('staff', is_staff=True))
+        self.first = User.objects.create_user('first')
+        self.second = User.objects.create_user('second')
+        company = Company.objects.create(name='Công ty A', code='A')
+        self.equipment = Equipment.objects.create(company=company, name='Máy', code='MN-001', equipment_type='desktop')
+
+    def record(self, action_date, action_type, description, user):
+        """Giống history_add: lưu thiết bị rồi mới tạo lịch sử"""
+        self.equipment.current_user = user
+        self.equipment._assignment_date = action_date
+        self.equipment.save()
+        return EquipmentHistory.objects.create(
+            equipment=self.equipment, action_date=action_date, action_type=action_type, description=description,
+        )
+
+    def delete(self, history):
+        response = self.client.post(reverse('equipment:history_delete', args=[history.pk]))
+        self.assertEqual(response.status_code, 302)
+
+    def ledger(self):
+        return list(EquipmentAssignment.objects.filter(equipment=self.equipment).order_by('start_date', 'id').values_list(
+            'user__username', 'start_date', 'end_date',
+        ))
+
+    def test_deleted_return_reopens_assignment(self):
+        self.record(date(2025, 1, 1), 'user_assignment', 'Giao máy cho first', self.first)
+        wrong_return = self.record(date(2025, 2, 1), 'user_return', 'Trả máy từ first', None)
+        self.record(date(2025, 3, 1), 'user_assignment', 'Giao máy cho second', self.second)
+        self.assertEqual(self.ledger(), [
+            ('first', date(2025, 1, 1), date(2025, 2, 1)),
+            ('second', date(2025, 3, 1), None),
+        ])
+
+        self.delete(wrong_return)
+        self.assertEqual(self.ledger(), [
+            ('first', date(2025, 1, 1), date(2025, 3, 1)),
+            ('second', date(2025, 3, 1), None),
+        ])
+
+    def test_deleted_transfer_removes_only_its_assignment(self):
+        self.record(date(2025, 1, 1), 'user_assignment', 'Giao máy cho first', self.first)
+        transfer = self.record(date(2025, 2, 1), 'movement', 'Chuyển máy từ first sang second', self.second)
+        self.record(date(2025, 3, 1), 'user_return', 'Trả máy từ second', None)
+
+        self.delete(transfer)
+        self.assertEqual(self.ledger(), [('first', date(2025, 1, 1), date(2025, 3, 1))])
+
+    def test_unlinked_assignments_kept(self):
+        # Đổi người sử dụng không qua lịch sử (vd. API), sau đó thêm rồi xóa 1 lịch sử di chuyển không đổi người
+        self.equipment.current_user = self.first
+        self.equipment._assignment_date = date(2025, 1, 1)
+        self.equipment.save()
+        self.equipment.current_user = self.second
+        self.equipment._assignment_date = date(2025, 2, 1)
+        self.equipment.save()
+        before = self.ledger()
+        movement = EquipmentHistory.objects.create(
+            equipment=Equipment.objects.get(pk=self.equipment.pk), action_date=date(2025, 3, 1),
+            action_type='movement', description='Chuyển sang phòng kế toán',
+        )
+
+        self.delete(movement)
+        self.assertEqual(self.ledger(), before)
+        self.assertEqual(len(before), 2)
+
+    def test_user_in_ledger_protected(self):
+        self.record(date(2025, 1, 1), 'user_assignment', 'Giao máy cho first', self.first)
+        with self.assertRaises(ProtectedError):
+            self.first.delete()
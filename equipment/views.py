@@ -5,24 +5,24 @@ from django.contrib.auth.decorators import login_required
 from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth.forms import AuthenticationForm
 from django.contrib.auth.models import User
-from django.db.models import Q, Count, Exists, OuterRef
-from django.core.paginator import Paginator
+from django.db import transaction
+from django.db.models import Q, Count
 from django.utils import timezone
-from django.http import JsonResponse, HttpResponse
+from django.http import JsonResponse
 from django.views.decorators.http import require_http_methods
 from datetime import date
-from openpyxl import Workbook
-from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
-from openpyxl.utils import get_column_letter
-from .models import Company, Equipment, EquipmentHistory
+from .models import Company, Equipment, EquipmentCodeSequence, EquipmentHistory
 from .forms import EquipmentForm, EquipmentHistoryForm
+from . import assignments as equipment_assignments
+from . import search as equipment_search
+from . import stats as equipment_stats
+from . import export as equipment_export
+from equipment_management.pagination import KeysetPaginator
 
 
 @login_required
 def index(request):
     """Trang chủ - danh sách thiết bị"""
-    from django.db.models import Exists, OuterRef
-    
     companies = Company.objects.all()
     equipment_list = Equipment.objects.select_related('company', 'current_user').all()
     
@@ -39,28 +39,12 @@ def index(request):
     # Search
     search = request.GET.get('search', '').strip()
     if search:
-        equipment_list = equipment_list.filter(
-            Q(name__icontains=search) |
-            Q(code__icontains=search) |
-            Q(machine_name__icontains=search) |
-            Q(current_user__username__icontains=search) |
-            Q(current_user__first_name__icontains=search) |
-            Q(current_user__last_name__icontains=search) |
-            Q(company__name__icontains=search)
-        )
+        equipment_list = equipment_search.filter_queryset(equipment_list, search)
     
-    # Kiểm tra xem thiết bị nào có lịch sử thanh lý (tối ưu query)
-    from equipment.models import EquipmentHistory
-    liquidation_exists = EquipmentHistory.objects.filter(
-        equipment=OuterRef('pk'),
-        action_type='liquidation'
-    )
-    equipment_list = equipment_list.annotate(has_liquidation=Exists(liquidation_exists))
-    
-    # Phân trang
-    paginator = Paginator(equipment_list, 20)  # 20 items per page
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    # Phân trang keyset theo (created_at, id); kết quả tìm kiếm giữ thứ tự theo độ liên quan
+    ordering = None if search else ('-created_at', '-id')
+    paginator = KeysetPaginator(equipment_list, 20, ordering=ordering)  # 20 items per page
+    page_obj = paginator.get_page(request.GET.get('cursor'))
     
     context = {
         'companies': companies,
@@ -77,43 +61,21 @@ def index(request):
 def equipment_detail(request, pk):
     """Chi tiết thiết bị"""
     equipment = get_object_or_404(Equipment, pk=pk)
-    histories = equipment.histories.all()
+    # Lấy lịch sử 1 lần (đã xếp theo ngày mới nhất), lịch sử giao/trả máy lọc lại từ danh sách này
+    histories = list(equipment.histories.all())
+    user_histories = [
+        history for history in histories if history.action_type in ('user_assignment', 'user_return')
+    ]
     
-    # Lấy danh sách người đã sử dụng (từ history)
-    user_histories = histories.filter(
-        action_type__in=['user_assignment', 'user_return']
-    ).order_by('-action_date')
-    
-    # Kiểm tra xem có lịch sử thanh lý không
-    has_liquidation = histories.filter(action_type='liquidation').exists()
-    
-    # Đếm số người đã sử dụng (unique users)
-    users_used = set()
-    for history in user_histories:
-        # Parse description để lấy tên user
-        desc = history.description
-        if 'Giao máy cho' in desc or 'Chuyển máy' in desc:
-            # Extract username từ description
-            if 'sang' in desc:
-                # Chuyển máy từ A sang B
-                parts = desc.split('sang')
-                if len(parts) > 1:
-                    users_used.add(parts[1].strip())
-            elif 'Giao máy cho' in desc:
-                parts = desc.split('Giao máy cho')
-                if len(parts) > 1:
-                    users_used.add(parts[1].strip())
-        elif 'Trả máy từ' in desc:
-            parts = desc.split('Trả máy từ')
-            if len(parts) > 1:
-                users_used.add(parts[1].strip())
+    # Số người đã sử dụng lấy từ sổ giao máy
+    users_count = equipment.assignments.aggregate(count=Count('user', distinct=True))['count']
     
     context = {
         'equipment': equipment,
         'histories': histories,
         'user_histories': user_histories,
-        'users_count': len(users_used),
-        'has_liquidation': has_liquidation,
+        'users_count': users_count,
+        'has_liquidation': equipment.has_liquidation,
     }
     return render(request, 'equipment/equipment_detail.html', context)
 
@@ -250,25 +212,8 @@ def get_next_code(request):
     if region not in ['MN', 'MT', 'MB']:
         return JsonResponse({'success': False, 'error': 'Invalid region'}, status=400)
     
-    import re
-    prefix = region
-    
-    # Tìm số lớn nhất trong miền này
-    existing_codes = Equipment.objects.filter(
-        code__startswith=f"{prefix}-"
-    ).values_list('code', flat=True)
-    
-    max_num = 0
-    for code in existing_codes:
-        match = re.match(rf'^{prefix}-(\d+)$', code)
-        if match:
-            num = int(match.group(1))
-            if num > max_num:
-                max_num = num
-    
-    # Tạo code mới
-    new_num = max_num + 1
-    next_code = f"{prefix}-{new_num:03d}"
+    # Chỉ xem trước, mã thật được cấp khi lưu form (EquipmentCodeSequence.allocate)
+    next_code = EquipmentCodeSequence.peek(region)
     
     return JsonResponse({
         'success': True,
@@ -409,6 +354,8 @@ def history_add(request, equipment_pk):
             
             # Tự động cập nhật trạng thái thiết bị dựa trên loại hành động
             action_type_value = form.cleaned_data.get('action_type')
+            # Nếu người sử dụng thay đổi, sổ giao máy ghi theo ngày của lịch sử (xem signals.py)
+            equipment._assignment_date = form.cleaned_data.get('action_date')
             description = form.cleaned_data.get('description', '')
             to_user = form.cleaned_data.get('to_user')
             
@@ -492,6 +439,8 @@ def history_edit(request, pk):
         if form.is_valid():
             # Tự động cập nhật trạng thái thiết bị dựa trên loại hành động
             action_type_value = form.cleaned_data.get('action_type')
+            # Nếu người sử dụng thay đổi, sổ giao máy ghi theo ngày của lịch sử (xem signals.py)
+            equipment._assignment_date = form.cleaned_data.get('action_date')
             description = form.cleaned_data.get('description', '')
             to_user = form.cleaned_data.get('to_user')
             
@@ -574,9 +523,13 @@ def history_delete(request, pk):
     equipment_pk = history.equipment.pk
     
     if request.method == 'POST':
-        history.delete()
+        with transaction.atomic():
+            if history.action_type in equipment_assignments.LEDGER_ACTION_TYPES:
+                # Hoàn tác các lần giao/trả máy mà dòng lịch sử này đã ghi vào sổ giao máy
+                equipment_assignments.revert(history)
+            history.delete()
         messages.success(request, 'Đã xóa lịch sử thiết bị!')
-        return redirect('equipment_history', pk=equipment_pk)
+        return redirect('equipment:equipment_history', pk=equipment_pk)
     
     context = {
         'history': history,
@@ -587,8 +540,6 @@ def history_delete(request, pk):
 @login_required
 def report(request):
     """Trang báo cáo thiết bị với khả năng xuất Excel"""
-    from django.db.models import Exists, OuterRef
-    
     # Lấy tất cả thiết bị
     equipment_list = Equipment.objects.select_related('company', 'current_user').all()
     
@@ -613,51 +564,20 @@ def report(request):
         equipment_list = equipment_list.filter(is_active=True)
     elif status == 'inactive':
         equipment_list = equipment_list.filter(is_active=False)
+    elif status == 'liquidated':
+        equipment_list = equipment_list.filter(liquidated_at__isnull=False)
     
     # Search
     search = request.GET.get('search', '').strip()
     if search:
-        equipment_list = equipment_list.filter(
-            Q(name__icontains=search) |
-            Q(code__icontains=search) |
-            Q(machine_name__icontains=search) |
-            Q(current_user__username__icontains=search) |
-            Q(current_user__first_name__icontains=search) |
-            Q(current_user__last_name__icontains=search) |
-            Q(company__name__icontains=search)
-        )
-    
-    # Kiểm tra xem thiết bị nào có lịch sử thanh lý
-    liquidation_exists = EquipmentHistory.objects.filter(
-        equipment=OuterRef('pk'),
-        action_type='liquidation'
-    )
-    equipment_list = equipment_list.annotate(has_liquidation=Exists(liquidation_exists))
-    
-    # Nếu có parameter export=excel, xuất file Excel
-    if request.GET.get('export') == 'excel':
-        return export_to_excel(equipment_list)
-    
-    # Thống kê tổng quan
-    total_equipment = Equipment.objects.count()
-    active_equipment = Equipment.objects.filter(is_active=True).count()
-    inactive_equipment = Equipment.objects.filter(is_active=False).count()
-    
-    # Đếm theo miền
-    region_stats = Equipment.objects.values('region').annotate(count=Count('id'))
-    region_dict = {r['region']: r['count'] for r in region_stats}
-    
-    # Đếm theo loại thiết bị
-    type_stats = Equipment.objects.values('equipment_type').annotate(count=Count('id'))
-    type_dict = {t['equipment_type']: t['count'] for t in type_stats}
+        equipment_list = equipment_search.filter_queryset(equipment_list, search)
     
-    # Đếm thiết bị đang được sử dụng
-    in_use = Equipment.objects.filter(current_user__isnull=False).count()
-    
-    # Đếm thiết bị đã thanh lý
-    liquidation_equipment = Equipment.objects.filter(
-        histories__action_type='liquidation'
-    ).distinct().count()
+    # Nếu có parameter export=excel/csv, xuất file
+    export_format = request.GET.get('export')
+    if export_format == 'excel':
+        return equipment_export.xlsx_response(equipment_list)
+    if export_format == 'csv':
+        return equipment_export.csv_response(equipment_list)
     
     companies = Company.objects.all()
     
@@ -669,134 +589,7 @@ def report(request):
         'selected_region': region,
         'selected_status': status,
         'search_query': search,
-        'total_equipment': total_equipment,
-        'active_equipment': active_equipment,
-        'inactive_equipment': inactive_equipment,
-        'region_stats': region_dict,
-        'type_stats': type_dict,
-        'in_use': in_use,
-        'liquidation_equipment': liquidation_equipment,
+        # Thống kê tổng quan (snapshot cache, xem stats.py)
+        **equipment_stats.get_stats(),
     }
     return render(request, 'equipment/report.html', context)
-
-
-def export_to_excel(equipment_list):
-    """Xuất danh sách thiết bị ra file Excel"""
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Báo cáo thiết bị"
-    
-    # Định nghĩa style
-    header_fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
-    header_font = Font(bold=True, color="FFFFFF", size=11)
-    border_style = Border(
-        left=Side(style='thin'),
-        right=Side(style='thin'),
-        top=Side(style='thin'),
-        bottom=Side(style='thin')
-    )
-    center_alignment = Alignment(horizontal='center', vertical='center')
-    
-    # Tiêu đề
-    ws.merge_cells('A1:R1')
-    ws['A1'] = 'BÁO CÁO THIẾT BỊ IT'
-    ws['A1'].font = Font(bold=True, size=16)
-    ws['A1'].alignment = Alignment(horizontal='center', vertical='center')
-    ws.row_dimensions[1].height = 30
-    
-    # Header row
-    headers = [
-        'STT', 'Mã thiết bị', 'Tên thiết bị', 'Công ty', 'Miền', 'Loại thiết bị',
-        'Ngày đưa vào sử dụng', 'Tên máy', 'Hệ điều hành', 'Nhà sản xuất', 'Model', 'Bộ xử lý',
-        'Bộ nhớ', 'HDD/SSD', 'Card đồ họa', 'Người sử dụng', 'Email', 'Trạng thái'
-    ]
-    
-    for col_num, header in enumerate(headers, 1):
-        cell = ws.cell(row=3, column=col_num)
-        cell.value = header
-        cell.fill = header_fill
-        cell.font = header_font
-        cell.border = border_style
-        cell.alignment = center_alignment
-    
-    # Dữ liệu
-    row_num = 4
-    for idx, equipment in enumerate(equipment_list, 1):
-        # Kiểm tra trạng thái
-        has_liquidation = getattr(equipment, 'has_liquidation', False)
-        if has_liquidation:
-            status = 'Đã thanh lý'
-        elif equipment.is_active:
-            status = 'Hoạt động'
-        else:
-            status = 'Không hoạt động'
-        
-        # Người sử dụng
-        current_user = ''
-        user_email = ''
-        if equipment.current_user:
-            current_user = equipment.current_user.get_full_name() or equipment.current_user.username
-            user_email = equipment.current_user.email or ''
-        
-        # Miền
-        region_display = dict(Equipment.REGIONS).get(equipment.region, equipment.region)
-        
-        # Loại thiết bị
-        type_display = dict(Equipment.EQUIPMENT_TYPES).get(equipment.equipment_type, equipment.equipment_type)
-        
-        # Ngày đưa vào sử dụng
-        commission_date_str = ''
-        if equipment.commission_date:
-            commission_date_str = equipment.commission_date.strftime('%d/%m/%Y')
-        
-        data = [
-            idx,
-            equipment.code,
-            equipment.name,
-            equipment.company.name if equipment.company else '',
-            region_display,
-            type_display,
-            commission_date_str,
-            equipment.machine_name or '',
-            equipment.operating_system or '',
-            equipment.system_manufacturer or '',
-            equipment.system_model or '',
-            equipment.processor or '',
-            equipment.memory or '',
-            equipment.storage or '',
-            equipment.graphics_card or '',
-            current_user,
-            user_email,
-            status,
-        ]
-        
-        for col_num, value in enumerate(data, 1):
-            cell = ws.cell(row=row_num, column=col_num)
-            cell.value = value
-            cell.border = border_style
-            if col_num == 1:  # STT
-                cell.alignment = center_alignment
-            else:
-                cell.alignment = Alignment(vertical='center', wrap_text=True)
-        
-        row_num += 1
-    
-    # Điều chỉnh độ rộng cột
-    column_widths = [6, 15, 25, 20, 12, 15, 18, 20, 20, 20, 20, 25, 15, 20, 20, 20, 25, 15]
-    for col_num, width in enumerate(column_widths, 1):
-        ws.column_dimensions[get_column_letter(col_num)].width = width
-    
-    # Đặt chiều cao hàng
-    for row in range(3, row_num):
-        ws.row_dimensions[row].height = 25
-    
-    # Tạo response
-    response = HttpResponse(
-        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-    )
-    filename = f'bao_cao_thiet_bi_{date.today().strftime("%Y%m%d")}.xlsx'
-    response['Content-Disposition'] = f'attachment; filename="{filename}"'
-    
-    wb.save(response)
-    return response
-
@@ -0,0 +1,215 @@
+"""
+Phân trang keyset (seek) dùng chung cho các trang danh sách
+Trang sau lọc theo khóa của dòng cuối trang trước (vd. created_at < x OR (created_at = x AND id < y))
+thay vì OFFSET, nên trang 500 tốn như trang 1. Tổng số dòng là tùy chọn và được cache
+"""
+import base64
+import hashlib
+import json
+import math
+
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+# Số giây cache tổng số dòng của 1 danh sách (cùng bộ lọc)
+COUNT_CACHE_TIMEOUT = 60
+
+
+class InvalidCursor(Exception):
+    """Cursor không đọc được (bị sửa tay, link cũ...)"""
+
+
+def encode_cursor(state):
+    data = json.dumps(state, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(data).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        data = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        state = json.loads(data)
+    except (ValueError, TypeError) as e:
+        raise InvalidCursor(str(e))
+    if not isinstance(state, dict):
+        raise InvalidCursor('cursor phải là object')
+    return state
+
+
+class KeysetPage:
+    """1 trang kết quả, dùng trong template giống Page của Django (lặp, has_next, number...)"""
+
+    def __init__(self, paginator, object_list, number, next_cursor=None, previous_cursor=None):
+        self.paginator = paginator
+        self.object_list = object_list
+        self.number = number
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class KeysetPaginator:
+    """
+    ordering: các field khóa (không null, field cuối phải unique, thường là id), vd. ('-created_at', '-id')
+    ordering=None: giữ thứ tự sẵn có của queryset (vd. kết quả tìm kiếm xếp theo độ liên quan) và phân trang bằng offset
+    with_count: có tính tổng số dòng không (tính khi template dùng tới, cache COUNT_CACHE_TIMEOUT giây)
+    scope: chuỗi gắn vào cursor (vd. dấu vân tay của bộ lọc); cursor tạo với scope khác bị coi là không hợp lệ
+    """
+
+    def __init__(self, queryset, per_page, ordering=('-created_at', '-id'), with_count=True,
+                 count_timeout=COUNT_CACHE_TIMEOUT, scope=None):
+        self.queryset = queryset
+        self.per_page = per_page
+        self.ordering = tuple(ordering) if ordering else None
+        self.with_count = with_count
+        self.count_timeout = count_timeout
+        self.scope = scope
+
+    @cached_property
+    def count(self):
+        """Tổng số dòng (None nếu with_count=False)"""
+        if not self.with_count:
+            return None
+        sql, params = self.queryset.order_by().query.sql_with_params()
+        key = 'keyset_count:' + hashlib.sha1(f'{sql}{params!r}'.encode()).hexdigest()
+        return cache.get_or_set(key, self.queryset.order_by().count, self.count_timeout)
+
+    @property
+    def num_pages(self):
+        if self.count is None:
+            return None
+        return max(math.ceil(self.count / self.per_page), 1)
+
+    def get_page(self, cursor=None):
+        """Trang theo cursor (next_cursor/previous_cursor của trang khác), cursor rỗng/sai thì trả về trang đầu"""
+        state = {}
+        if cursor:
+            try:
+                state = self.decode(cursor)
+            except InvalidCursor:
+                state = {}
+
+        try:
+            number = max(int(state.get('n', 1)), 1)
+        except (TypeError, ValueError):
+            number = 1
+
+        if self.ordering is None:
+            return self._offset_page(state, number)
+        return self._keyset_page(state, number)
+
+    def decode(self, cursor):
+        """State của cursor, InvalidCursor nếu không đọc được hoặc khác scope"""
+        state = decode_cursor(cursor)
+        if state.get('s') != self.scope:
+            raise InvalidCursor('cursor thuộc bộ lọc khác')
+        return state
+
+    def _encode(self, state):
+        if self.scope is not None:
+            state['s'] = self.scope
+        return encode_cursor(state)
+
+    def _keyset_page(self, state, number):
+        values = state.get('k')
+        if not isinstance(values, list) or len(values) != len(self.ordering):
+            values = None
+            number = 1
+        backwards = bool(values) and state.get('d') == 'p'
+
+        ordering = [self._reverse(field) for field in self.ordering] if backwards else list(self.ordering)
+        queryset = self.queryset.order_by(*ordering)
+        try:
+            if values:
+                queryset = queryset.filter(self._seek(values, backwards))
+            rows = list(queryset[:self.per_page + 1])
+        except (ValidationError, ValueError, TypeError):
+            # Giá trị trong cursor sai kiểu
+            return self._keyset_page({}, 1)
+
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if values and not rows:
+            # Các dòng của cursor đã bị xóa hết: quay về trang đầu
+            return self._keyset_page({}, 1)
+
+        if backwards:
+            rows.reverse()
+            has_next, has_previous = True, has_more
+            if not has_previous:
+                number = 1
+        else:
+            has_next, has_previous = has_more, bool(values)
+
+        next_cursor = previous_cursor = None
+        if has_next:
+            next_cursor = self._encode({'k': self._key(rows[-1]), 'n': number + 1})
+        if has_previous:
+            previous_cursor = self._encode({'k': self._key(rows[0]), 'd': 'p', 'n': number - 1})
+        return KeysetPage(self, rows, number, next_cursor, previous_cursor)
+
+    def _offset_page(self, state, number):
+        try:
+            offset = max(int(state.get('o', 0)), 0)
+        except (TypeError, ValueError):
+            offset = 0
+        if not offset:
+            number = 1
+
+        rows = list(self.queryset[offset:offset + self.per_page + 1])
+        next_cursor = previous_cursor = None
+        if len(rows) > self.per_page:
+            next_cursor = self._encode({'o': offset + self.per_page, 'n': number + 1})
+        if offset:
+            previous_cursor = self._encode({'o': max(offset - self.per_page, 0), 'n': number - 1})
+        return KeysetPage(self, rows[:self.per_page], number, next_cursor, previous_cursor)
+
+    @staticmethod
+    def _reverse(field):
+        return field[1:] if field.startswith('-') else f'-{field}'
+
+    def _key(self, obj):
+        """Giá trị các field khóa của 1 dòng (datetime giữ nguyên micro giây để so sánh bằng chính xác)"""
+        opts = self.queryset.model._meta
+        key = []
+        for field in self.ordering:
+            value = getattr(obj, opts.get_field(field.lstrip('-')).attname)
+            if hasattr(value, 'isoformat'):
+                value = value.isoformat()
+            elif not isinstance(value, (int, float, str)):
+                value = str(value)
+            key.append(value)
+        return key
+
+    def _seek(self, values, backwards):
+        """Điều kiện lấy các dòng đứng sau (hoặc trước nếu backwards) khóa values"""
+        condition = Q()
+        equal = {}
+        for field, value in zip(self.ordering, values):
+            name = field.lstrip('-')
+            descending = field.startswith('-') != backwards
+            condition |= Q(**equal, **{f'{name}__{"lt" if descending else "gt"}': value})
+            equal[name] = value
+
+        # Thêm cận cho field đầu để database dùng được index (điều kiện OR ở trên không dùng index được)
+        first = self.ordering[0]
+        descending = first.startswith('-') != backwards
+        return Q(**{f'{first.lstrip("-")}__{"lte" if descending else "gte"}': values[0]}) & condition
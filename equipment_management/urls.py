@@ -19,6 +19,7 @@ urlpatterns = [
     path('tickets/', include('tickets.urls')),
     path('renewals/', include('renewals.urls')),
     path('nas/', include('nas_management.urls')),
+    path('api/', include('api.urls')),
 ]
 
 if settings.DEBUG:
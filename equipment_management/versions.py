@@ -0,0 +1,65 @@
+"""
+Phiên bản theo model (hoặc theo khóa tự đặt cho dữ liệu được cache, vd. số liệu báo cáo), lưu trong database (bảng api.DataVersion) nên mọi process đều thấy cùng 1 giá trị
+Tăng 1 mỗi khi model có dòng được thêm/sửa/xóa (qua signals, xem api/signals.py)
+Code ghi hàng loạt không qua signals (bulk_create/bulk_update/update) phải tự gọi bump()
+Cũng cấp số thứ tự thay đổi cho đồng bộ delta (next_change_id, xem api/sync.py)
+"""
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+
+def _key(model):
+    return model if isinstance(model, str) else model._meta.label_lower
+
+
+def get_many(models):
+    """{model: phiên bản} trong 1 query; model chưa từng đổi có phiên bản 0"""
+    from api.models import DataVersion
+
+    keys = {_key(model): model for model in models}
+    versions = dict(DataVersion.objects.filter(key__in=keys).values_list('key', 'version'))
+    return {model: versions.get(key, 0) for key, model in keys.items()}
+
+
+def get(model):
+    return get_many([model])[model]
+
+
+def bump(model, using='default'):
+    """
+    Tăng phiên bản của model trong transaction đang chạy: dữ liệu và phiên bản mới cùng hiện ra khi commit
+    (rollback thì phiên bản cũng không đổi)
+    """
+    from api.models import DataVersion
+
+    versions = DataVersion.objects.using(using)
+    key = _key(model)
+    if versions.filter(key=key).update(version=F('version') + 1):
+        return
+    try:
+        with transaction.atomic(using=using):
+            versions.create(key=key, version=1)
+    except IntegrityError:
+        # Process khác vừa tạo dòng này
+        versions.filter(key=key).update(version=F('version') + 1)
+
+
+def _change_key(model):
+    return f'sync:{_key(model)}'
+
+
+def next_change_id(model, using='default'):
+    """
+    Số thứ tự thay đổi tiếp theo của model, phải gọi trong transaction ghi dòng thay đổi
+    Dòng đếm bị khóa (UPDATE) tới khi transaction commit, nên số lớn hơn luôn được commit sau:
+    client đã nhận tới số N thì không còn dòng nào số <= N chưa commit
+    """
+    from api.models import DataVersion
+
+    bump(_change_key(model), using=using)
+    return DataVersion.objects.using(using).values_list('version', flat=True).get(key=_change_key(model))
+
+
+def last_change_id(model):
+    """Số thứ tự thay đổi lớn nhất đã commit của model"""
+    return get(_change_key(model))
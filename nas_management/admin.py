@@ -1,5 +1,6 @@
 from django.contrib import admin
-from .models import NASConfig, LoginHistory, SystemStats, NASLog, FileOperation
+from . import rollups
+from .models import NASConfig, LoginHistory, SystemStats, NASLog, NASLogDailyRollup, NASLogSyncCursor, LogImportJob, FileOperation
 
 
 @admin.register(NASConfig)
@@ -52,6 +53,41 @@ class NASLogAdmin(admin.ModelAdmin):
     readonly_fields = ['created_at']
     date_hierarchy = 'timestamp'
 
+    # Thống kê theo ngày (rollups) không tự cập nhật khi log bị sửa/xóa ngoài import/đồng bộ
+    def save_model(self, request, obj, form, change):
+        previous = NASLog.objects.filter(pk=obj.pk).first() if change else None
+        super().save_model(request, obj, form, change)
+        rollups.refresh_for_logs([log for log in (previous, obj) if log])
+
+    def delete_model(self, request, obj):
+        rollups.delete_logs(NASLog.objects.filter(pk=obj.pk))
+
+    def delete_queryset(self, request, queryset):
+        rollups.delete_logs(queryset)
+
+
+@admin.register(NASLogDailyRollup)
+class NASLogDailyRollupAdmin(admin.ModelAdmin):
+    list_display = ['nas', 'log_type', 'day', 'level', 'category', 'source', 'operation', 'log_count']
+    list_filter = ['nas', 'log_type', 'level', 'day']
+    search_fields = ['category', 'source', 'operation']
+    date_hierarchy = 'day'
+
+
+@admin.register(NASLogSyncCursor)
+class NASLogSyncCursorAdmin(admin.ModelAdmin):
+    list_display = ['nas', 'log_type', 'last_timestamp', 'last_offset', 'last_synced_at']
+    list_filter = ['nas', 'log_type']
+
+
+@admin.register(LogImportJob)
+class LogImportJobAdmin(admin.ModelAdmin):
+    list_display = ['id', 'nas', 'job_type', 'status', 'file_name', 'rows_parsed', 'rows_inserted', 'rows_skipped', 'created_at', 'finished_at']
+    list_filter = ['nas', 'job_type', 'status', 'created_at']
+    search_fields = ['file_name', 'message', 'error']
+    readonly_fields = ['created_at', 'started_at', 'finished_at', 'worker']
+    date_hierarchy = 'created_at'
+
 
 @admin.register(FileOperation)
 class FileOperationAdmin(admin.ModelAdmin):
@@ -0,0 +1,40 @@
+"""
+Cache kết quả dò API (SYNO.API.Info) của từng NAS
+Lưu API name/path/version đã chạy được cho mỗi thao tác, lần sau gọi thẳng endpoint đó thay vì thử lần lượt
+Khóa cache kèm version lưu trong database (equipment_management.versions): forget() ở process nào
+(signal khi sửa NAS, refresh_nas_capabilities...) thì mọi process (gunicorn worker, run_workers) đều bỏ cache cũ
+"""
+from django.conf import settings
+from django.core.cache import cache
+
+from equipment_management import versions
+
+# Số giây giữ kết quả dò API (mặc định 6 giờ), NAS cập nhật DSM/cài package thì chạy refresh_nas_capabilities
+CAPABILITY_TTL = getattr(settings, 'NAS_CAPABILITY_TTL', 6 * 3600)
+
+# Các thao tác được cache: danh sách API của NAS và endpoint lấy log
+OPERATIONS = ('api_info', 'logs')
+
+
+def _version_key(nas_id, operation):
+    return f'nas_capability:{nas_id}:{operation}'
+
+
+def _key(nas_id, operation):
+    version_key = _version_key(nas_id, operation)
+    return f'{version_key}:{versions.get(version_key)}'
+
+
+def get(nas_id, operation):
+    """Kết quả đã cache của thao tác, None nếu chưa có, đã hết hạn hoặc đã bị forget()"""
+    return cache.get(_key(nas_id, operation))
+
+
+def remember(nas_id, operation, value):
+    cache.set(_key(nas_id, operation), value, CAPABILITY_TTL)
+
+
+def forget(nas_id, operation=None):
+    """Bỏ cache của 1 thao tác hoặc toàn bộ thao tác của NAS (tăng version, có hiệu lực với mọi process)"""
+    for op in ([operation] if operation else OPERATIONS):
+        versions.bump(_version_key(nas_id, op))
@@ -0,0 +1,169 @@
+"""
+Pool SynologyAPIClient dùng chung trong process
+Giữ requests.Session (kết nối keep-alive) và SID của mỗi NAS giữa các request thay vì login/logout mỗi lần
+"""
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+
+from .synology_api import SynologyAPIClient, iter_response
+
+logger = logging.getLogger('nas_management')
+
+# Số giây không dùng thì bỏ session (DSM mặc định tự hết hạn session sau 15 phút không hoạt động)
+SESSION_TTL = getattr(settings, 'NAS_SESSION_TTL', 600)
+
+
+class _PoolEntry:
+    def __init__(self, client, fingerprint):
+        self.client = client
+        self.fingerprint = fingerprint
+        self.lock = threading.Lock()  # Mỗi client chỉ được 1 thread dùng tại 1 thời điểm
+        self.last_used = time.monotonic()
+        # Đã bị bỏ khỏi pool khi đang được dùng: thread đang giữ sẽ đăng xuất và đóng khi trả về
+        self.stale = False
+
+
+class SynologyClientPool:
+    """Pool client theo NAS, client hết hạn (TTL) hoặc NAS đổi cấu hình sẽ được đăng nhập lại"""
+
+    def __init__(self, ttl=SESSION_TTL):
+        self.ttl = ttl
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def fingerprint(nas):
+        """Các thông tin kết nối, thay đổi thì phải đăng nhập lại"""
+        return (nas.get_api_url(), nas.username, nas.password)
+
+    @contextmanager
+    def client(self, nas):
+        """Lấy client đã đăng nhập của NAS, dùng thay cho `with SynologyAPIClient(nas) as client`"""
+        client, release = self.checkout(nas)
+        try:
+            yield client
+        finally:
+            release()
+
+    def checkout(self, nas):
+        """
+        (client, release): client đã đăng nhập, giữ riêng cho tới khi gọi release()
+        Dùng khi client còn được dùng sau khi view trả về (vd. stream file download)
+        """
+        entry = self._checkout(nas)
+        if entry is None:
+            # Client của NAS đang được thread khác dùng: dùng client riêng, đóng khi release
+            client = SynologyAPIClient(nas)
+            client.login()
+            return client, lambda: self._close_client(client)
+        return entry.client, lambda: self._release(entry)
+
+    def _release(self, entry):
+        entry.last_used = time.monotonic()
+        entry.lock.release()
+        # stale được đặt trước khi invalidate/clear thử lấy lock, nên 1 trong 2 bên chắc chắn thấy và đóng entry
+        if entry.stale and entry.lock.acquire(blocking=False):
+            self._close(entry)
+
+    def _checkout(self, nas):
+        """Lấy entry của NAS và giữ lock, trả về None nếu entry đang bận"""
+        fingerprint = self.fingerprint(nas)
+        stale = None
+        with self._lock:
+            entry = self._entries.get(nas.id)
+            if entry is not None:
+                if not entry.lock.acquire(blocking=False):
+                    return None
+                expired = time.monotonic() - entry.last_used > self.ttl
+                if expired or entry.fingerprint != fingerprint:
+                    del self._entries[nas.id]
+                    stale = entry
+                    entry = None
+                else:
+                    entry.client.nas_config = nas
+                    return entry
+
+            entry = _PoolEntry(SynologyAPIClient(nas), fingerprint)
+            entry.lock.acquire()
+            self._entries[nas.id] = entry
+
+        if stale is not None:
+            self._close(stale)
+
+        # Đăng nhập ngoài lock chung để không chặn các NAS khác
+        try:
+            entry.client.login()
+        except Exception:
+            with self._lock:
+                if self._entries.get(nas.id) is entry:
+                    del self._entries[nas.id]
+            entry.lock.release()
+            raise
+        return entry
+
+    def invalidate(self, nas_id):
+        """Bỏ client của NAS (khi NASConfig bị sửa/xóa)"""
+        with self._lock:
+            entry = self._entries.pop(nas_id, None)
+        if entry is not None:
+            self._discard(entry)
+
+    def clear(self):
+        """Đăng xuất và bỏ toàn bộ client"""
+        with self._lock:
+            entries = list(self._entries.values())
+            self._entries.clear()
+        for entry in entries:
+            self._discard(entry)
+
+    def _discard(self, entry):
+        """Đóng entry đã bỏ khỏi pool; entry đang được dùng thì đóng khi được trả về (xem _release)"""
+        entry.stale = True
+        if entry.lock.acquire(blocking=False):
+            self._close(entry)
+
+    def _close(self, entry):
+        self._close_client(entry.client)
+
+    @staticmethod
+    def _close_client(client):
+        try:
+            client.logout()
+            client.session.close()
+        except Exception as e:
+            logger.debug(f"Error closing NAS session: {str(e)}")
+
+
+class HeldResponseStream:
+    """
+    Nội dung response của NAS đọc dần cho StreamingHttpResponse, client được giữ tới khi stream đóng
+    StreamingHttpResponse gọi close() khi gửi xong hoặc người dùng ngắt tải, kể cả khi chưa đọc byte nào
+    """
+
+    def __init__(self, response, release):
+        self.response = response
+        self._release = release
+
+    def __iter__(self):
+        return iter_response(self.response)
+
+    def close(self):
+        if self._release is None:
+            return
+        release, self._release = self._release, None
+        try:
+            self.response.close()
+        finally:
+            release()
+
+
+client_pool = SynologyClientPool()
+
+
+def pooled_client(nas):
+    """Client đã đăng nhập lấy từ pool dùng chung của process"""
+    return client_pool.client(nas)
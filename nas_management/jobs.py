@@ -0,0 +1,167 @@
+"""
+Hàng đợi job đồng bộ/import log NAS lưu trong database (LogImportJob)
+View chỉ tạo job, `manage.py run_workers` lấy job ra xử lý ngoài HTTP request
+"""
+import logging
+import os
+import socket
+import threading
+from contextlib import contextmanager
+
+from django.db import DatabaseError, connection
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import LogImportJob
+from . import log_import, log_sync
+from .synology_api import SynologyAPIError
+
+logger = logging.getLogger('nas_management')
+
+# Số giây giữa 2 lần job đang chạy cập nhật heartbeat_at
+HEARTBEAT_INTERVAL = 30
+
+
+def enqueue_sync(nas, user=None):
+    """Tạo job đồng bộ log từ NAS"""
+    return LogImportJob.objects.create(nas=nas, job_type='sync', created_by=user)
+
+
+def enqueue_csv_import(nas, uploaded_file, user=None):
+    """Lưu file upload và tạo job import CSV"""
+    job = LogImportJob(nas=nas, job_type='csv', file_name=uploaded_file.name, created_by=user)
+    job.csv_file.save(uploaded_file.name, uploaded_file, save=False)
+    job.save()
+    return job
+
+
+def worker_name():
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def claim_next(worker):
+    """
+    Lấy job pending cũ nhất và chuyển sang running
+    Dùng UPDATE có điều kiện status='pending' nên nhiều worker không nhận trùng job (chạy được cả SQLite)
+    """
+    while True:
+        job_id = LogImportJob.objects.filter(status='pending').order_by('created_at', 'id').values_list('id', flat=True).first()
+        if job_id is None:
+            return None
+        now = timezone.now()
+        claimed = LogImportJob.objects.filter(id=job_id, status='pending').update(
+            status='running', worker=worker, started_at=now, heartbeat_at=now
+        )
+        if claimed:
+            return LogImportJob.objects.select_related('nas').get(id=job_id)
+
+
+def fail_stale_jobs(older_than):
+    """
+    Đánh dấu lỗi các job running mà worker không báo sống (heartbeat_at) quá older_than (worker bị dừng giữa chừng)
+    Job đang chạy lâu trên worker/máy khác vẫn cập nhật heartbeat nên không bị đụng tới
+    """
+    cutoff = timezone.now() - older_than
+    return LogImportJob.objects.filter(status='running').filter(
+        Q(heartbeat_at__lt=cutoff) | Q(heartbeat_at__isnull=True, started_at__lt=cutoff)
+    ).update(status='failed', error='Worker bị dừng khi đang xử lý job', finished_at=timezone.now())
+
+
+def _beat(job_id, stopped):
+    try:
+        while not stopped.wait(HEARTBEAT_INTERVAL):
+            try:
+                LogImportJob.objects.filter(id=job_id, status='running').update(heartbeat_at=timezone.now())
+            except DatabaseError as e:
+                # Lỗi tạm thời (vd. SQLite đang khóa): lần sau thử lại
+                logger.warning(f"Heartbeat of import job #{job_id} failed: {str(e)}")
+    finally:
+        connection.close()
+
+
+@contextmanager
+def heartbeat(job):
+    """Cập nhật heartbeat_at của job trên thread riêng trong lúc job chạy (kể cả khi job đang chờ NAS trả lời)"""
+    stopped = threading.Event()
+    thread = threading.Thread(target=_beat, args=(job.id, stopped), daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stopped.set()
+        thread.join()
+
+
+def _save_progress(job, parsed, inserted, skipped):
+    LogImportJob.objects.filter(id=job.id).update(
+        rows_parsed=parsed, rows_inserted=inserted, rows_skipped=skipped
+    )
+
+
+def _run_csv(job):
+    def progress(result):
+        _save_progress(job, result['parsed'], result['count'], _csv_skipped(result))
+
+    with job.csv_file.open('rb') as f:
+        result = log_import.import_log_csv(job.nas, job.file_name, f.chunks(), progress=progress)
+    progress(result)
+    return log_import.summary(job.nas, result)
+
+
+def _csv_skipped(result):
+    return result['skipped'] + result['skipped_old'] + result['skipped_existing'] + result['errors']
+
+
+def _run_sync(job):
+    def progress(result):
+        skipped = result['duplicates'] + result['skipped_invalid'] + result['skipped_short'] + result['errors']
+        _save_progress(job, result['fetched'], result['new'], skipped)
+
+    result = log_sync.sync_nas_logs(job.nas, progress=progress)
+    progress(result)
+    return result['message']
+
+
+JOB_RUNNERS = {
+    'sync': _run_sync,
+    'csv': _run_csv,
+}
+
+
+def run_job(job):
+    """Chạy 1 job đã được claim, lưu kết quả/lỗi vào job"""
+    try:
+        with heartbeat(job):
+            message = JOB_RUNNERS[job.job_type](job)
+        LogImportJob.objects.filter(id=job.id).update(status='done', message=message, finished_at=timezone.now())
+    except (log_import.CSVImportError, SynologyAPIError) as e:
+        LogImportJob.objects.filter(id=job.id).update(status='failed', error=str(e), finished_at=timezone.now())
+    except Exception as e:
+        logger.exception(f"Error running import job #{job.id}")
+        LogImportJob.objects.filter(id=job.id).update(status='failed', error=f'Lỗi: {str(e)}', finished_at=timezone.now())
+    finally:
+        # File CSV chỉ cần trong lúc import
+        if job.csv_file:
+            job.csv_file.delete(save=False)
+            LogImportJob.objects.filter(id=job.id).update(csv_file='')
+
+
+def job_progress(job):
+    """Dữ liệu JSON cho endpoint theo dõi tiến độ"""
+    return {
+        'id': job.id,
+        'nas': job.nas_id,
+        'job_type': job.job_type,
+        'status': job.status,
+        'status_display': job.get_status_display(),
+        'file_name': job.file_name,
+        'rows_parsed': job.rows_parsed,
+        'rows_inserted': job.rows_inserted,
+        'rows_skipped': job.rows_skipped,
+        'message': job.message,
+        'error': job.error,
+        'created_at': job.created_at.isoformat(),
+        'started_at': job.started_at.isoformat() if job.started_at else None,
+        'finished_at': job.finished_at.isoformat() if job.finished_at else None,
+        'is_finished': job.status in ('done', 'failed'),
+    }
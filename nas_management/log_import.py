@@ -0,0 +1,295 @@
+"""
+Import log NAS từ file CSV export trên DSM (syslog, connectlog, filexferlog)
+File được đọc theo từng chunk và ghi theo batch, bộ nhớ chỉ phụ thuộc kích thước batch
+"""
+import codecs
+import csv
+from datetime import datetime
+from itertools import chain, islice
+
+from django.db import transaction
+from django.utils import timezone
+
+from equipment_management import versions
+
+from .models import NASLog
+from . import rollups
+
+BATCH_SIZE = 1000
+# Số dòng đầu file dùng để nhận diện loại log và dòng header
+HEAD_ROWS = 4
+# Số cột tối thiểu của 1 dòng dữ liệu theo loại log
+MIN_COLUMNS = {'syslog': 5, 'connectlog': 5, 'filexferlog': 8}
+TIME_FORMATS = ('%Y/%m/%d %H:%M:%S', '%Y-%m-%d %H:%M:%S')
+LOG_LEVELS = [level for level, _ in NASLog.LOG_LEVEL_CHOICES]
+
+
+class CSVImportError(Exception):
+    """File CSV không đúng format"""
+    pass
+
+
+def iter_lines(chunks, encoding='utf-8-sig'):
+    """Decode dần từng chunk bytes (bỏ BOM nếu có), trả về từng dòng kèm ký tự xuống dòng"""
+    decoder = codecs.getincrementaldecoder(encoding)()
+    pending = ''
+    for chunk in chunks:
+        pending += decoder.decode(chunk)
+        lines = pending.split('\n')
+        pending = lines.pop()
+        for line in lines:
+            yield line + '\n'
+    pending += decoder.decode(b'', final=True)
+    if pending:
+        yield pending
+
+
+def iter_rows(chunks):
+    """Generator các dòng CSV đã parse từ các chunk bytes"""
+    return csv.reader(iter_lines(chunks))
+
+
+def detect_log_type(filename, head):
+    """Xác định loại log từ tên file, dòng tiêu đề hoặc header"""
+    filename_lower = filename.lower()
+    if 'syslog' in filename_lower:
+        return 'syslog'
+    if 'connectlog' in filename_lower:
+        return 'connectlog'
+    if 'filexferlog' in filename_lower or 'filexfer' in filename_lower:
+        return 'filexferlog'
+
+    first_row = head[0] if head else []
+    if len(first_row) == 1:
+        if first_row[0] == 'System':
+            return 'syslog'
+        if first_row[0] == 'Connection':
+            return 'connectlog'
+        if first_row[0] == 'File Transfer':
+            return 'filexferlog'
+
+    for i, row in enumerate(head[:3]):
+        if len(row) >= 2:
+            header_lower = ' '.join(row).lower()
+            if 'ip address' in header_lower and 'file' in header_lower:
+                return 'filexferlog'
+            if 'level' in header_lower and 'log' in header_lower:
+                # Có thể là syslog hoặc connectlog
+                if i > 0 and len(head[i - 1]) == 1:
+                    if head[i - 1][0] == 'System':
+                        return 'syslog'
+                    if head[i - 1][0] == 'Connection':
+                        return 'connectlog'
+                    return None
+                return 'syslog'  # Default
+    return None
+
+
+def find_header(log_type, head):
+    """Vị trí dòng header trong các dòng đầu file"""
+    if log_type == 'filexferlog':
+        # Format: Log,Time,IP address,User,Event,File/Folder,File size,File name
+        for i, row in enumerate(head[:3]):
+            if len(row) >= 8:
+                header_lower = ' '.join(row).lower()
+                if 'ip address' in header_lower and 'file' in header_lower:
+                    return i
+        raise CSVImportError('Không tìm thấy header trong file filexferlog. Format cần: Log,Time,IP address,User,Event,File/Folder,File size,File name')
+
+    # Format: Level,Log,Time,User,Event
+    start_row = 1 if head and len(head[0]) == 1 and head[0][0] in ['System', 'Connection'] else 0
+    for i in range(start_row, min(start_row + 3, len(head))):
+        if len(head[i]) >= 5:
+            return i
+    raise CSVImportError(f'Không tìm thấy header trong file CSV {log_type}. Format cần: Level,Log,Time,User,Event')
+
+
+def _parse_timestamp(time_str):
+    """Parse thời gian trong file, không parse được thì lấy thời điểm hiện tại"""
+    for fmt in TIME_FORMATS:
+        try:
+            return timezone.make_aware(datetime.strptime(time_str, fmt))
+        except ValueError:
+            continue
+    return timezone.now()
+
+
+def _normalize_level(level_str):
+    level = level_str.lower()
+    if level in LOG_LEVELS:
+        return level
+    if 'error' in level or 'failed' in level:
+        return 'error'
+    if 'warn' in level:
+        return 'warning'
+    return 'info'
+
+
+def _parse_event_row(nas, log_type, row):
+    """Dòng syslog/connectlog: Level,Log,Time,User,Event"""
+    level_str, category, time_str, user, event = (value.strip() for value in row[:5])
+
+    if len(event) < 5:
+        return None
+
+    return NASLog(
+        nas=nas,
+        log_type=log_type,
+        timestamp=_parse_timestamp(time_str),
+        message=event[:500],
+        level=_normalize_level(level_str),
+        category=category[:100] if category else log_type.capitalize(),
+        source=user[:200] if user else 'SYSTEM',
+    )
+
+
+def _parse_filexfer_row(nas, log_type, row):
+    """Dòng filexferlog: Log,Time,IP address,User,Event,File/Folder,File size,File name"""
+    log_protocol, time_str, ip_address, user, operation, file_type, file_size, file_path = (
+        value.strip() for value in row[:8]
+    )
+
+    if not time_str or not file_path:
+        return None
+
+    file_name = file_path.split('/')[-1]
+    return NASLog(
+        nas=nas,
+        log_type=log_type,
+        timestamp=_parse_timestamp(time_str),
+        message=f"{operation} {file_type}: {file_path}"[:500],
+        level='info',
+        category=log_protocol,
+        source=user[:200],
+        ip_address=ip_address or None,
+        operation=operation[:50],
+        file_path=file_path[:1000],
+        file_size=file_size[:100],
+        file_name=file_name[:500],
+    )
+
+
+def _previous_month_start():
+    now = timezone.localtime()
+    if now.month == 1:
+        return timezone.make_aware(datetime(now.year - 1, 12, 1))
+    return timezone.make_aware(datetime(now.year, now.month - 1, 1))
+
+
+def import_log_csv(nas, filename, chunks, batch_size=BATCH_SIZE, progress=None):
+    """
+    Import file CSV log vào NAS, chỉ lấy log của tháng hiện tại và tháng trước, mới hơn log cuối trong DB
+    chunks: iterable các chunk bytes (vd: UploadedFile.chunks())
+    progress: callback(result) được gọi sau mỗi batch
+    """
+    rows = iter_rows(chunks)
+    head = list(islice(rows, HEAD_ROWS))
+    if len(head) < 2:
+        raise CSVImportError('File CSV không hợp lệ. Cần có ít nhất header và 1 dòng dữ liệu.')
+
+    log_type = detect_log_type(filename, head)
+    if not log_type:
+        raise CSVImportError('Không thể xác định loại log. Vui lòng đặt tên file chứa: syslog, connectlog, hoặc filexferlog')
+
+    header_row = find_header(log_type, head)
+    parse_row = _parse_filexfer_row if log_type == 'filexferlog' else _parse_event_row
+    min_columns = MIN_COLUMNS[log_type]
+
+    previous_month_start = _previous_month_start()
+    last_log = NASLog.objects.filter(nas=nas, log_type=log_type).order_by('-timestamp').first()
+    last_timestamp = last_log.timestamp if last_log else None
+
+    result = {
+        'log_type': log_type,
+        'parsed': 0,
+        'count': 0,
+        'skipped': 0,
+        'skipped_old': 0,  # Log cũ hơn tháng trước
+        'skipped_existing': 0,  # Log có timestamp <= log cuối trong database
+        'errors': 0,
+        'first_error': None,
+    }
+    affected_days = set()
+    batch = []
+
+    def flush():
+        with transaction.atomic():
+            # bulk_create không gửi signals: cả lô dùng chung 1 số thứ tự thay đổi (đồng bộ delta của API)
+            change_id = versions.next_change_id(NASLog)
+            for log in batch:
+                log.change_id = change_id
+            NASLog.objects.bulk_create(batch, ignore_conflicts=True)
+        affected_days.update(timezone.localdate(log.timestamp) for log in batch)
+        batch.clear()
+        if progress:
+            progress(result)
+
+    data_rows = chain(head[header_row + 1:], rows)
+    try:
+        for row_number, row in enumerate(data_rows, start=header_row + 2):
+            if len(row) < min_columns:
+                continue
+            result['parsed'] += 1
+
+            try:
+                log = parse_row(nas, log_type, row)
+            except Exception as e:
+                result['errors'] += 1
+                if result['first_error'] is None:
+                    result['first_error'] = f"Row {row_number}: {str(e)}"
+                continue
+
+            if log is None:
+                result['skipped'] += 1
+                continue
+            if log.timestamp < previous_month_start:
+                result['skipped_old'] += 1
+                continue
+            if last_timestamp and log.timestamp <= last_timestamp:
+                result['skipped_existing'] += 1
+                continue
+
+            batch.append(log)
+            result['count'] += 1
+            if len(batch) >= batch_size:
+                flush()
+
+        if batch:
+            flush()
+    finally:
+        # Cập nhật thống kê cho các ngày đã ghi, kể cả khi import bị dừng giữa chừng
+        rollups.refresh_days(nas.id, log_type, affected_days)
+
+    return result
+
+
+def summary(nas, result):
+    """Thông báo kết quả import"""
+    log_type = result['log_type']
+    log_type_display = dict(NASLog.LOG_TYPE_CHOICES).get(log_type, log_type)
+    count = result['count']
+    skipped = result['skipped']
+    skipped_old = result['skipped_old']
+    skipped_existing = result['skipped_existing']
+
+    if count > 0:
+        msg = f'Đã import {count} {log_type_display} vào {nas.name}'
+        if skipped_existing > 0:
+            msg += f' ({skipped_existing} log đã tồn tại đã bỏ qua)'
+        if skipped > 0:
+            msg += f'. Đã bỏ qua {skipped} log không hợp lệ'
+        if skipped_old > 0:
+            msg += f'. Đã bỏ qua {skipped_old} log cũ (chỉ import tháng hiện tại và tháng trước)'
+        if result['errors']:
+            msg += f". Có {result['errors']} lỗi khi xử lý"
+        return msg
+
+    if skipped_existing > 0:
+        return f'Tất cả {skipped_existing} bản ghi đã tồn tại trong database (không có log mới).'
+    if skipped_old > 0:
+        return f'Tất cả logs trong file đều cũ hơn tháng hiện tại và tháng trước. Đã bỏ qua {skipped_old} log.'
+    msg = f'Không thể import {log_type_display}. Có thể format file không đúng hoặc không có dữ liệu hợp lệ.'
+    if result['errors']:
+        error_msg = result['first_error'] if result['errors'] == 1 else f"{result['errors']} lỗi"
+        msg += f' Lỗi: {error_msg}'
+    return msg
@@ -0,0 +1,294 @@
+"""
+Đồng bộ log từ NAS qua Synology API (chạy trong worker nền, xem jobs.py)
+"""
+import logging
+from datetime import datetime
+
+from django.db import transaction
+from django.utils import timezone
+
+from equipment_management import versions
+
+from .models import NASLog, NASLogSyncCursor
+from . import rollups
+from .client_pool import pooled_client
+
+logger = logging.getLogger('nas_management')
+
+TIME_FORMATS = ['%Y-%m-%d %H:%M:%S', '%Y/%m/%d %H:%M:%S', '%d/%m/%Y %H:%M:%S', '%Y-%m-%dT%H:%M:%S']
+# Dấu hiệu message là response lỗi của API chứ không phải log
+API_ERROR_INDICATORS = ['{"error":', '"success":false', '"code":', 'api error']
+# Log lấy từ API được lưu với log_type mặc định
+LOG_TYPE = 'syslog'
+PAGE_SIZE = 200
+# Lần đầu (chưa có mốc) lấy tối đa PAGE_SIZE * MAX_PAGES log gần nhất như trước
+MAX_PAGES = 5
+BATCH_SIZE = 500
+
+
+def _parse_timestamp(value):
+    """Timestamp từ NAS có thể là Unix timestamp (số) hoặc string nhiều format, None nếu không đọc được"""
+    timestamp = None
+    if value:
+        try:
+            if isinstance(value, (int, float)):
+                timestamp = datetime.fromtimestamp(value)
+            elif isinstance(value, str) and value.isdigit():
+                timestamp = datetime.fromtimestamp(int(value))
+            else:
+                for fmt in TIME_FORMATS:
+                    try:
+                        timestamp = datetime.strptime(str(value), fmt)
+                        break
+                    except ValueError:
+                        continue
+        except (ValueError, TypeError, OSError):
+            timestamp = None
+
+    if timestamp and timezone.is_naive(timestamp):
+        timestamp = timezone.make_aware(timestamp)
+    return timestamp
+
+
+def diagnose_empty_logs(client, nas):
+    """Thông báo hướng dẫn khi NAS không trả về log nào"""
+    try:
+        test_info = client.get_system_info()
+        logger.info(f"System info retrieved: {test_info}")
+
+        eventlog_info = client.get_api_info('SYNO.Core.EventLog')
+        all_apis = client.list_all_apis()
+        log_related_apis = [api for api in all_apis.keys() if 'log' in api.lower() or 'event' in api.lower()]
+
+        if not eventlog_info:
+            error_msg = (
+                f'Không tìm thấy API SYNO.Core.EventLog từ {nas.name}.\n\n'
+                f'⚠️ Log Center package có thể chưa được cài đặt hoặc chưa được kích hoạt trên NAS.\n\n'
+                f'📋 Hướng dẫn:\n'
+                f'1. Đăng nhập vào DSM của NAS\n'
+                f'2. Vào Package Center\n'
+                f'3. Tìm và cài đặt "Log Center"\n'
+                f'4. Sau khi cài đặt, mở Log Center và kích hoạt\n'
+                f'5. Đảm bảo user "{nas.username}" có quyền truy cập Log Center\n\n'
+            )
+            if log_related_apis:
+                error_msg += f'📌 Các API liên quan đến log tìm thấy: {", ".join(log_related_apis[:5])}\n\n'
+            error_msg += 'Hoặc chạy command để kiểm tra chi tiết:\n'
+            error_msg += f'python manage.py test_nas_logs --nas-id {nas.id}'
+            return error_msg
+
+        return (
+            f'Không tìm thấy log nào từ {nas.name}.\n\n'
+            f'Có thể:\n'
+            f'1. NAS không có log nào trong thời gian này\n'
+            f'2. User "{nas.username}" không có quyền truy cập logs\n'
+            f'3. Log Center chưa được cấu hình để thu thập logs\n\n'
+            f'Vui lòng kiểm tra Log Center trên NAS hoặc chạy command:\n'
+            f'python manage.py test_nas_logs --nas-id {nas.id}'
+        )
+    except Exception as e:
+        return (
+            f'Không thể kết nối đến NAS {nas.name}: {str(e)}\n\n'
+            f'Vui lòng kiểm tra:\n'
+            f'1. NAS có đang hoạt động không\n'
+            f'2. Thông tin đăng nhập có đúng không\n'
+            f'3. Firewall có chặn kết nối không'
+        )
+
+
+def _build_log(nas, log_entry, result):
+    """Chuyển 1 entry từ API thành NASLog chưa lưu, None nếu entry bị bỏ qua"""
+    level_raw = log_entry.get('level', 'info')
+    level = level_raw.lower() if isinstance(level_raw, str) else 'info'
+    if level not in ['info', 'warning', 'error', 'critical']:
+        level = 'info'
+
+    category = log_entry.get('category', '') or log_entry.get('program', '') or ''
+    message = log_entry.get('message', '') or log_entry.get('msg', '') or log_entry.get('content', '') or str(log_entry)
+    source = log_entry.get('source', '') or log_entry.get('host_name', '') or log_entry.get('module', '') or log_entry.get('program', '') or ''
+
+    # Bỏ qua các response lỗi API (chứa JSON error)
+    message_lower = message.lower()
+    if any(indicator in message_lower for indicator in API_ERROR_INDICATORS):
+        result['skipped_invalid'] += 1
+        logger.debug(f"Skipping invalid log entry (API error response): {message[:100]}")
+        return None
+
+    if len(message.strip()) < 5:
+        result['skipped_short'] += 1
+        return None
+
+    return NASLog(
+        nas=nas,
+        log_type=LOG_TYPE,
+        timestamp=_parse_timestamp(log_entry.get('time', '') or log_entry.get('timestamp', '')),
+        message=message[:500],
+        level=level,
+        category=category[:100],
+        source=source[:200],
+    )
+
+
+def _fetch_new_logs(client, nas, cursor, result, progress=None):
+    """
+    Lấy log theo trang (mới -> cũ) cho tới khi gặp mốc đồng bộ lần trước
+    Trả về danh sách NASLog chưa lưu có thời gian >= mốc (còn có thể trùng log đã lưu)
+    """
+    mark = cursor.last_timestamp
+    seen_at_mark = 0
+    logs = []
+    offset = 0
+    previous_page = None
+
+    for _ in range(MAX_PAGES):
+        page = client.get_logs(limit=PAGE_SIZE, offset=offset)
+        result['fetched'] += len(page)
+        offset += len(page)
+
+        reached_mark = False
+        for log_entry in page:
+            try:
+                log = _build_log(nas, log_entry, result)
+            except Exception as e:
+                result['errors'] += 1
+                logger.error(f"Error processing log entry: {str(e)}, Entry: {log_entry}")
+                continue
+            if log is None:
+                continue
+
+            if mark and log.timestamp:
+                if log.timestamp < mark:
+                    # Log cũ hơn mốc đã được lưu ở lần đồng bộ trước
+                    reached_mark = True
+                    result['duplicates'] += 1
+                    continue
+                if log.timestamp == mark:
+                    seen_at_mark += 1
+            logs.append(log)
+
+        if progress:
+            progress(result)
+
+        # Dừng khi đã đọc tới mốc, hết log, hoặc API bỏ qua offset (trả lại đúng trang cũ)
+        if reached_mark or (mark and seen_at_mark >= cursor.last_offset > 0):
+            break
+        if len(page) < PAGE_SIZE or page == previous_page:
+            break
+        previous_page = page
+    return logs
+
+
+def _insert_new_logs(nas, logs, result):
+    """Bỏ các log đã có trong DB rồi bulk_create phần còn lại, trả về danh sách log mới"""
+    now = timezone.now()
+    unique = {}
+    for log in logs:
+        if log.timestamp is None:
+            # Không đọc được thời gian: giữ hành vi cũ, lấy thời điểm đồng bộ
+            log.timestamp = now
+        unique.setdefault((log.timestamp, log.message), log)
+    result['duplicates'] += len(logs) - len(unique)
+    if not unique:
+        return []
+
+    # 1 query lấy các log đã có trong khoảng thời gian của lô mới
+    timestamps = [timestamp for timestamp, _ in unique]
+    existing = set(NASLog.objects.filter(
+        nas=nas,
+        log_type=LOG_TYPE,
+        timestamp__gte=min(timestamps),
+        timestamp__lte=max(timestamps),
+    ).values_list('timestamp', 'message'))
+
+    new_logs = [log for key, log in unique.items() if key not in existing]
+    result['duplicates'] += len(unique) - len(new_logs)
+    # ignore_conflicts: an toàn khi 2 lần đồng bộ cùng NAS chạy song song
+    with transaction.atomic():
+        # bulk_create không gửi signals: cả lô dùng chung 1 số thứ tự thay đổi (đồng bộ delta của API)
+        change_id = versions.next_change_id(NASLog)
+        for log in new_logs:
+            log.change_id = change_id
+        NASLog.objects.bulk_create(new_logs, batch_size=BATCH_SIZE, ignore_conflicts=True)
+    result['new'] = len(new_logs)
+    return new_logs
+
+
+def _advance_cursor(cursor, logs):
+    """Dời mốc tới log mới nhất trong lần đồng bộ"""
+    timestamps = [log.timestamp for log in logs]
+    if timestamps:
+        latest = max(timestamps)
+        if not cursor.last_timestamp or latest >= cursor.last_timestamp:
+            cursor.last_timestamp = latest
+            cursor.last_offset = NASLog.objects.filter(
+                nas_id=cursor.nas_id, log_type=cursor.log_type, timestamp=latest
+            ).count()
+    cursor.last_synced_at = timezone.now()
+    cursor.save()
+
+
+def sync_nas_logs(nas, progress=None):
+    """
+    Lấy log mới từ NAS (kể từ mốc đồng bộ lần trước) và lưu vào NASLog
+    progress: callback(result) được gọi sau mỗi trang log
+    """
+    result = {
+        'fetched': 0,
+        'new': 0,
+        'duplicates': 0,
+        'skipped_invalid': 0,
+        'skipped_short': 0,
+        'errors': 0,
+        'message': '',
+    }
+    cursor, _ = NASLogSyncCursor.objects.get_or_create(nas=nas, log_type=LOG_TYPE)
+
+    with pooled_client(nas) as client:
+        logs = _fetch_new_logs(client, nas, cursor, result, progress)
+        logger.info(f"Received {result['fetched']} logs from {nas.name}")
+
+        if not result['fetched']:
+            result['message'] = diagnose_empty_logs(client, nas)
+            return result
+
+    # Chỉ log đọc được thời gian mới dùng để dời mốc
+    dated_logs = [log for log in logs if log.timestamp]
+    new_logs = _insert_new_logs(nas, logs, result)
+    _advance_cursor(cursor, dated_logs)
+
+    # Cập nhật thống kê cho các ngày vừa đồng bộ
+    rollups.refresh_for_logs(new_logs)
+
+    result['message'] = _summary(nas, result)
+    return result
+
+
+def _summary(nas, result):
+    """Thông báo kết quả đồng bộ"""
+    if result['new'] or result['duplicates']:
+        if result['new']:
+            msg = f"Đã đồng bộ {result['new']} log mới từ {nas.name}"
+        else:
+            msg = f'Không có log mới từ {nas.name}'
+        msg += f". Nhận {result['fetched']} log, {result['duplicates']} log đã có"
+        skip_msg = []
+        if result['skipped_invalid']:
+            skip_msg.append(f"{result['skipped_invalid']} log không hợp lệ (API error)")
+        if result['skipped_short']:
+            skip_msg.append(f"{result['skipped_short']} log quá ngắn")
+        if skip_msg:
+            msg += f'. Đã bỏ qua: {", ".join(skip_msg)}'
+        if result['errors']:
+            msg += f". Có {result['errors']} lỗi khi xử lý logs"
+        return msg
+
+    msg = f'Không thể đồng bộ log từ {nas.name}.\n\n'
+    msg += f"Đã nhận được {result['fetched']} log entries nhưng:\n"
+    if result['skipped_invalid']:
+        msg += f"- {result['skipped_invalid']} log không hợp lệ (chứa JSON error response)\n"
+    if result['skipped_short']:
+        msg += f"- {result['skipped_short']} log quá ngắn\n"
+    if result['errors']:
+        msg += f"- {result['errors']} log gặp lỗi khi xử lý\n"
+    msg += '\nCó thể format dữ liệu từ NAS không đúng hoặc cần cấu hình lại.'
+    return msg
@@ -0,0 +1,140 @@
+"""
+Management command để benchmark import file CSV log NAS:
+so sánh cách cũ (read() + decode + list(csv.reader)) với đọc theo chunk của log_import
+trên file filexferlog giả lập, đo bộ nhớ đỉnh (tracemalloc) và tốc độ xử lý
+"""
+import csv
+import io
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from nas_management.models import NASConfig
+from nas_management import log_import
+
+# Fix encoding cho Windows
+if sys.platform == 'win32':
+    import codecs
+    sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'strict')
+    sys.stderr = codecs.getwriter('utf-8')(sys.stderr.buffer, 'strict')
+
+HEADER = ['Log', 'Time', 'IP address', 'User', 'Event', 'File/Folder', 'File size', 'File name']
+
+
+def _legacy_parse(path):
+    """Cách cũ: đọc toàn bộ file, decode thành 1 string rồi list(csv.reader)"""
+    with open(path, 'rb') as f:
+        file_content = f.read()
+    text_content = file_content.decode('utf-8-sig')
+    rows = list(csv.reader(io.StringIO(text_content)))
+    return len(rows)
+
+
+def _file_chunks(f, chunk_size=64 * 1024):
+    """Đọc file theo chunk giống UploadedFile.chunks()"""
+    return iter(lambda: f.read(chunk_size), b'')
+
+
+def _streaming_parse(path):
+    """Cách mới: decode từng chunk, parse từng dòng"""
+    with open(path, 'rb') as f:
+        return sum(1 for _ in log_import.iter_rows(_file_chunks(f)))
+
+
+class Command(BaseCommand):
+    help = 'Benchmark bộ nhớ/tốc độ import CSV log NAS trên file filexferlog giả lập'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rows',
+            type=int,
+            default=1000000,
+            help='Số dòng log trong file giả lập (mặc định: 1000000)',
+        )
+        parser.add_argument(
+            '--with-db',
+            action='store_true',
+            help='Chạy thêm import đầy đủ vào database (trong transaction, tự rollback)',
+        )
+
+    def handle(self, *args, **options):
+        rows = options['rows']
+
+        fd, path = tempfile.mkstemp(suffix='_filexferlog.csv')
+        os.close(fd)
+        try:
+            self.stdout.write(f'Đang tạo file giả lập {rows} dòng...')
+            self._write_csv(path, rows)
+            size_mb = os.path.getsize(path) / 1024 / 1024
+            self.stdout.write(f'File: {path} ({size_mb:.1f} MB)')
+
+            results = [
+                ('read() + list(csv.reader) (cũ)', self._measure(lambda: _legacy_parse(path))),
+                ('Đọc theo chunk', self._measure(lambda: _streaming_parse(path))),
+            ]
+            if options['with_db']:
+                results.append(('Import đầy đủ vào DB', self._measure(lambda: self._import(path))))
+
+            self.stdout.write('')
+            self.stdout.write(f'{"Cách xử lý":<34}{"Số dòng":>10}{"Thời gian (s)":>16}{"Dòng/s":>12}{"RAM đỉnh (MB)":>16}')
+            for name, (count, elapsed, peak) in results:
+                self.stdout.write(
+                    f'{name:<34}{count:>10}{elapsed:>16.2f}{count / elapsed:>12.0f}{peak / 1024 / 1024:>16.1f}'
+                )
+        finally:
+            os.remove(path)
+
+    def _write_csv(self, path, rows):
+        """Tạo file filexferlog theo format export của DSM (có BOM)"""
+        now = timezone.localtime()
+        with open(path, 'w', encoding='utf-8-sig', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(HEADER)
+            for i in range(rows):
+                timestamp = now - timedelta(seconds=random.randint(0, 20 * 24 * 3600))
+                writer.writerow([
+                    'SMB',
+                    timestamp.strftime('%Y/%m/%d %H:%M:%S'),
+                    f'192.168.1.{i % 250 + 1}',
+                    f'user{i % 50}',
+                    random.choice(['Read', 'Write', 'Delete', 'Create']),
+                    'File',
+                    f'{random.randint(1, 10 ** 6)} Bytes',
+                    f'/share/folder{i % 100}/file_{i}.docx',
+                ])
+
+    def _import(self, path):
+        """Import đầy đủ (parse + bulk_create + thống kê), rollback ở cuối"""
+        # DEBUG=True giữ lại SQL của mọi query trong connection.queries, làm sai số đo bộ nhớ
+        with override_settings(DEBUG=False), transaction.atomic():
+            nas = NASConfig.objects.create(
+                name=f'benchmark-{timezone.now().timestamp()}',
+                host='127.0.0.1',
+                username='benchmark',
+                password='benchmark',
+            )
+            with open(path, 'rb') as f:
+                result = log_import.import_log_csv(nas, os.path.basename(path), _file_chunks(f))
+            transaction.set_rollback(True)
+        return result['count']
+
+    def _measure(self, func):
+        """Chạy func 2 lần: đo thời gian, rồi đo bộ nhớ đỉnh (tracemalloc làm chậm đáng kể)"""
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+
+        tracemalloc.start()
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return result, elapsed, peak
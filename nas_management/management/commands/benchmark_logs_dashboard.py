@@ -0,0 +1,163 @@
+"""
+Management command để benchmark thống kê theo ngày của dashboard logs NAS:
+so sánh vòng lặp 30 ngày x 5 count() cũ, 1 query TruncDate + Count có điều kiện trên NASLog
+và đọc từ bảng thống kê NASLogDailyRollup
+"""
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Count, Q
+from django.db.models.functions import TruncDate
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from nas_management.models import NASConfig, NASLog, NASLogDailyRollup
+from nas_management.views import LOG_LEVELS
+from nas_management import rollups
+
+# Fix encoding cho Windows
+if sys.platform == 'win32':
+    import codecs
+    sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'strict')
+    sys.stderr = codecs.getwriter('utf-8')(sys.stderr.buffer, 'strict')
+
+
+def _legacy_daily_stats(logs):
+    """Cách tính cũ: mỗi ngày 5 query count()"""
+    daily_stats = []
+    for i in range(30):
+        day = timezone.localdate() - timedelta(days=29 - i)
+        day_start = timezone.make_aware(datetime.combine(day, datetime.min.time()))
+        day_end = day_start + timedelta(days=1)
+        day_logs = logs.filter(timestamp__gte=day_start, timestamp__lt=day_end)
+        daily_stats.append({
+            'date': day,
+            'total': day_logs.count(),
+            'info': day_logs.filter(level='info').count(),
+            'warning': day_logs.filter(level='warning').count(),
+            'error': day_logs.filter(level='error').count(),
+            'critical': day_logs.filter(level='critical').count(),
+        })
+    return daily_stats
+
+
+def _grouped_daily_stats(logs):
+    """1 query GROUP BY ngày trên bảng NASLog"""
+    first_day = timezone.localdate() - timedelta(days=29)
+    counts = {'total': Count('id')}
+    for level in LOG_LEVELS:
+        counts[level] = Count('id', filter=Q(level=level))
+    rows = logs.filter(
+        timestamp__gte=rollups.day_start(first_day),
+        timestamp__lt=rollups.day_start(first_day + timedelta(days=30)),
+    ).annotate(day=TruncDate('timestamp')).values('day').annotate(**counts).order_by('day')
+    rows_by_day = {row['day']: row for row in rows}
+
+    daily_stats = []
+    for i in range(30):
+        day = first_day + timedelta(days=i)
+        row = rows_by_day.get(day, {})
+        stat = {'date': day, 'total': row.get('total', 0)}
+        for level in LOG_LEVELS:
+            stat[level] = row.get(level, 0)
+        daily_stats.append(stat)
+    return daily_stats
+
+
+class Command(BaseCommand):
+    help = 'Benchmark thống kê theo ngày của dashboard logs NAS (dữ liệu giả lập, tự rollback)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rows',
+            type=int,
+            default=100000,
+            help='Số log giả lập (mặc định: 100000)',
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=3,
+            help='Số lần chạy mỗi cách để lấy thời gian tốt nhất (mặc định: 3)',
+        )
+
+    def handle(self, *args, **options):
+        rows = options['rows']
+        repeat = max(1, options['repeat'])
+
+        # Toàn bộ dữ liệu giả lập nằm trong 1 transaction và bị rollback ở cuối
+        with transaction.atomic():
+            nas = NASConfig.objects.create(
+                name=f'benchmark-{timezone.now().timestamp()}',
+                host='127.0.0.1',
+                username='benchmark',
+                password='benchmark',
+            )
+            self.stdout.write(f'Đang tạo {rows} log giả lập...')
+            self._seed_logs(nas, rows)
+
+            start = time.perf_counter()
+            rollups.rebuild(nas_id=nas.id)
+            rebuild_time = time.perf_counter() - start
+
+            logs = NASLog.objects.filter(nas=nas, log_type='syslog')
+            log_rollups = NASLogDailyRollup.objects.filter(nas=nas, log_type='syslog')
+            results = [
+                ('Vòng lặp 30 ngày (cũ)', self._measure(lambda: _legacy_daily_stats(logs), repeat)),
+                ('TruncDate + Count trên NASLog', self._measure(lambda: _grouped_daily_stats(logs), repeat)),
+                ('Bảng thống kê theo ngày', self._measure(
+                    lambda: rollups.daily_stats(log_rollups, 'level', LOG_LEVELS), repeat
+                )),
+            ]
+
+            self.stdout.write('')
+            self.stdout.write(f'{"Cách tính":<32}{"Số query":>10}{"Thời gian (ms)":>18}')
+            for name, (_, query_count, elapsed) in results:
+                self.stdout.write(f'{name:<32}{query_count:>10}{elapsed * 1000:>18.1f}')
+            self.stdout.write(f'(Backfill bảng thống kê cho {rows} log: {rebuild_time * 1000:.1f} ms)')
+
+            expected = results[0][1][0]
+            if all(result[0] == expected for _, result in results):
+                self.stdout.write(self.style.SUCCESS('[OK] Kết quả các cách tính giống nhau'))
+            else:
+                self.stdout.write(self.style.ERROR('[LỖI] Kết quả các cách tính khác nhau!'))
+
+            transaction.set_rollback(True)
+
+    def _seed_logs(self, nas, rows):
+        """Tạo log rải đều trong 35 ngày gần nhất"""
+        now = timezone.now()
+        batch = []
+        for i in range(rows):
+            batch.append(NASLog(
+                nas=nas,
+                log_type='syslog',
+                level=random.choice(LOG_LEVELS),
+                category='System',
+                message=f'Benchmark log entry {i}',
+                source='SYSTEM',
+                timestamp=now - timedelta(seconds=random.randint(0, 35 * 24 * 3600)),
+            ))
+            if len(batch) >= 5000:
+                NASLog.objects.bulk_create(batch, ignore_conflicts=True)
+                batch = []
+        if batch:
+            NASLog.objects.bulk_create(batch, ignore_conflicts=True)
+
+    def _measure(self, func, repeat):
+        """Chạy func nhiều lần, trả về (kết quả, số query, thời gian tốt nhất)"""
+        best = None
+        result = None
+        query_count = 0
+        for _ in range(repeat):
+            with CaptureQueriesContext(connection) as ctx:
+                start = time.perf_counter()
+                result = func()
+                elapsed = time.perf_counter() - start
+            query_count = len(ctx.captured_queries)
+            best = elapsed if best is None else min(best, elapsed)
+        return result, query_count, best
@@ -0,0 +1,141 @@
+"""
+Management command để benchmark thời gian xử lý trang file manager NAS:
+mỗi request login/logout riêng (cách cũ) so với dùng client pool giữ SID + kết nối keep-alive
+Chạy với DSM giả lập trên localhost (thêm độ trễ mỗi request) nên không cần NAS thật
+"""
+import json
+import sys
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+from urllib.parse import parse_qs, urlparse
+
+from django.contrib.auth.models import User
+from django.contrib.messages.storage.cookie import CookieStorage
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import RequestFactory
+
+from nas_management import views
+from nas_management.client_pool import SynologyClientPool
+from nas_management.models import NASConfig
+from nas_management.synology_api import SynologyAPIClient
+
+# Fix encoding cho Windows
+if sys.platform == 'win32':
+    import codecs
+    sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'strict')
+    sys.stderr = codecs.getwriter('utf-8')(sys.stderr.buffer, 'strict')
+
+
+class FakeDSMHandler(BaseHTTPRequestHandler):
+    """DSM giả lập: auth.cgi (login/logout), query.cgi và SYNO.FileStation.List"""
+    protocol_version = 'HTTP/1.1'  # Cho phép keep-alive
+    latency = 0.0
+    request_count = 0
+    sids = set()
+    lock = threading.Lock()
+
+    def do_GET(self):
+        time.sleep(self.latency)
+        url = urlparse(self.path)
+        params = {key: values[0] for key, values in parse_qs(url.query).items()}
+        with self.lock:
+            FakeDSMHandler.request_count += 1
+
+        if url.path.endswith('auth.cgi') and params.get('method') == 'login':
+            sid = uuid.uuid4().hex
+            self.sids.add(sid)
+            data = {'success': True, 'data': {'sid': sid}}
+        elif url.path.endswith('auth.cgi'):
+            self.sids.discard(params.get('_sid'))
+            data = {'success': True}
+        elif url.path.endswith('query.cgi'):
+            data = {'success': True, 'data': {}}
+        elif params.get('_sid') not in self.sids:
+            data = {'success': False, 'error': {'code': 119}}
+        else:
+            files = [{'name': f'file_{i}.txt', 'path': f'/share/file_{i}.txt', 'isdir': False} for i in range(50)]
+            data = {'success': True, 'data': {'files': files}}
+
+        body = json.dumps(data).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class Command(BaseCommand):
+    help = 'Benchmark file manager NAS: login/logout mỗi request so với client pool (DSM giả lập)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=50,
+            help='Số lần mở trang file manager (mặc định: 50)',
+        )
+        parser.add_argument(
+            '--latency',
+            type=float,
+            default=20,
+            help='Độ trễ giả lập mỗi request tới DSM, tính bằng ms (mặc định: 20)',
+        )
+
+    def handle(self, *args, **options):
+        FakeDSMHandler.latency = options['latency'] / 1000
+        server = ThreadingHTTPServer(('127.0.0.1', 0), FakeDSMHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+
+        try:
+            with transaction.atomic():
+                nas = NASConfig.objects.create(
+                    name=f'benchmark-{time.time()}',
+                    host='127.0.0.1',
+                    port=server.server_address[1],
+                    username='benchmark',
+                    password='benchmark',
+                    use_https=False,
+                )
+                user = User(username='benchmark', is_staff=True, is_active=True)
+
+                pool = SynologyClientPool()
+                results = [
+                    ('Login/logout mỗi request (cũ)', self._run(nas, user, SynologyAPIClient, options['requests'])),
+                    ('Client pool', self._run(nas, user, pool.client, options['requests'])),
+                ]
+                pool.clear()
+                transaction.set_rollback(True)
+        finally:
+            server.shutdown()
+
+        self.stdout.write('')
+        self.stdout.write(f'{"Cách kết nối":<32}{"Trung bình (ms)":>18}{"p95 (ms)":>12}{"Request DSM/trang":>20}')
+        for name, (timings, dsm_requests) in results:
+            timings.sort()
+            avg = sum(timings) / len(timings) * 1000
+            p95 = timings[int(len(timings) * 0.95) - 1] * 1000
+            self.stdout.write(f'{name:<32}{avg:>18.1f}{p95:>12.1f}{dsm_requests / len(timings):>20.1f}')
+
+    def _run(self, nas, user, client_factory, count):
+        """Gọi view file_manager count lần với client_factory thay cho pooled_client"""
+        factory = RequestFactory()
+        timings = []
+        FakeDSMHandler.request_count = 0
+        with mock.patch.object(views, 'pooled_client', client_factory):
+            for _ in range(count):
+                request = factory.get('/nas/files/', {'nas_id': nas.id, 'path': '/share'})
+                request.user = user
+                request._messages = CookieStorage(request)
+                start = time.perf_counter()
+                response = views.file_manager(request)
+                timings.append(time.perf_counter() - start)
+                if response.status_code != 200 or list(request._messages):
+                    raise RuntimeError(f'file_manager lỗi: {[str(m) for m in request._messages]}')
+        return timings, FakeDSMHandler.request_count
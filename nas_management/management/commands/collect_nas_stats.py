@@ -0,0 +1,64 @@
+"""
+Management command thu thập định kỳ CPU/RAM/Disk của tất cả NAS đang kích hoạt
+Ví dụ: python manage.py collect_nas_stats --interval 60
+"""
+import sys
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from nas_management.models import NASConfig
+from nas_management.stats_collector import collect_stats
+
+# Fix encoding cho Windows
+if sys.platform == 'win32':
+    import codecs
+    sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'strict')
+    sys.stderr = codecs.getwriter('utf-8')(sys.stderr.buffer, 'strict')
+
+
+class Command(BaseCommand):
+    help = 'Thu thập định kỳ thống kê CPU/RAM/Disk của các NAS (poll song song)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval',
+            type=int,
+            default=60,
+            help='Số giây giữa 2 lượt thu thập (mặc định: 60)',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=8,
+            help='Số NAS poll đồng thời tối đa (mặc định: 8)',
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Chỉ thu thập 1 lượt rồi thoát (dùng với cron)',
+        )
+
+    def handle(self, *args, **options):
+        interval = max(1, options['interval'])
+
+        try:
+            while True:
+                started = time.monotonic()
+                close_old_connections()
+
+                nas_list = NASConfig.objects.filter(is_active=True)
+                samples, errors = collect_stats(nas_list, max_workers=options['workers'])
+                elapsed = time.monotonic() - started
+
+                self.stdout.write(f'Đã thu thập {len(samples)} NAS trong {elapsed:.1f}s')
+                for nas_name, error in errors.items():
+                    self.stdout.write(self.style.WARNING(f'  [LỖI] {nas_name}: {error}'))
+
+                if options['once']:
+                    break
+                # Giữ chu kỳ cố định, không cộng dồn thời gian poll
+                time.sleep(max(0, interval - elapsed))
+        except KeyboardInterrupt:
+            self.stdout.write('Đã dừng thu thập')
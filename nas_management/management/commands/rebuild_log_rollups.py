@@ -0,0 +1,48 @@
+"""
+Management command để tính lại bảng thống kê log theo ngày (NASLogDailyRollup) từ NASLog
+Chạy 1 lần sau khi migrate để backfill dữ liệu cũ, hoặc khi cần đối soát lại thống kê
+Bắt buộc chạy lại sau khi sửa/xóa NASLog không qua import/đồng bộ/admin (queryset.delete trong shell, SQL...):
+thống kê không tự cập nhật trong các trường hợp đó
+"""
+import sys
+import time
+from django.core.management.base import BaseCommand
+from nas_management.models import NASConfig
+from nas_management import rollups
+
+# Fix encoding cho Windows
+if sys.platform == 'win32':
+    import codecs
+    sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'strict')
+    sys.stderr = codecs.getwriter('utf-8')(sys.stderr.buffer, 'strict')
+
+
+class Command(BaseCommand):
+    help = 'Tính lại bảng thống kê log NAS theo ngày từ bảng NASLog (backfill)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--nas-id',
+            type=int,
+            help='Chỉ tính lại cho NAS này (mặc định: tất cả NAS)',
+        )
+
+    def handle(self, *args, **options):
+        nas_id = options.get('nas_id')
+
+        if nas_id:
+            nas_configs = NASConfig.objects.filter(id=nas_id)
+        else:
+            nas_configs = NASConfig.objects.all()
+
+        if not nas_configs.exists():
+            self.stdout.write(self.style.ERROR('Khong tim thay NAS config nao!'))
+            return
+
+        for nas in nas_configs:
+            start = time.perf_counter()
+            created = rollups.rebuild(nas_id=nas.id)
+            elapsed = time.perf_counter() - start
+            self.stdout.write(self.style.SUCCESS(
+                f'[OK] {nas.name}: {created} dòng thống kê ({elapsed:.1f}s)'
+            ))
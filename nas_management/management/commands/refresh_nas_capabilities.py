@@ -0,0 +1,63 @@
+"""
+Management command để xóa và dò lại các API của NAS (SYNO.API.Info, endpoint lấy log)
+Chạy sau khi nâng cấp DSM hoặc cài/gỡ package (Log Center...) trên NAS
+"""
+import sys
+from django.core.management.base import BaseCommand
+from nas_management.models import NASConfig
+from nas_management import capabilities
+from nas_management.client_pool import pooled_client
+
+# Fix encoding cho Windows
+if sys.platform == 'win32':
+    import codecs
+    sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'strict')
+    sys.stderr = codecs.getwriter('utf-8')(sys.stderr.buffer, 'strict')
+
+
+class Command(BaseCommand):
+    help = 'Xóa cache dò API của NAS và dò lại endpoint lấy log'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--nas-id',
+            type=int,
+            help='Chỉ dò lại cho NAS này (mặc định: tất cả NAS đang hoạt động)',
+        )
+        parser.add_argument(
+            '--clear-only',
+            action='store_true',
+            help='Chỉ xóa cache, lần gọi API tiếp theo sẽ tự dò lại',
+        )
+
+    def handle(self, *args, **options):
+        nas_id = options.get('nas_id')
+
+        if nas_id:
+            nas_configs = NASConfig.objects.filter(id=nas_id)
+        else:
+            nas_configs = NASConfig.objects.filter(is_active=True)
+
+        if not nas_configs.exists():
+            self.stdout.write(self.style.ERROR('Khong tim thay NAS config nao!'))
+            return
+
+        for nas in nas_configs:
+            capabilities.forget(nas.id)
+            if options['clear_only']:
+                self.stdout.write(self.style.SUCCESS(f'[OK] {nas.name}: đã xóa cache'))
+                continue
+
+            try:
+                with pooled_client(nas) as client:
+                    apis = client.list_all_apis(refresh=True)
+                    client.get_logs(limit=1)
+            except Exception as e:
+                self.stdout.write(self.style.ERROR(f'[ERROR] {nas.name}: {str(e)}'))
+                continue
+
+            endpoint = capabilities.get(nas.id, 'logs')
+            endpoint_name = client.describe_endpoint(endpoint) if endpoint else 'không có'
+            self.stdout.write(self.style.SUCCESS(
+                f'[OK] {nas.name}: {len(apis)} API, endpoint lấy log: {endpoint_name}'
+            ))
@@ -0,0 +1,127 @@
+"""
+Management command chạy worker xử lý job đồng bộ/import log NAS (LogImportJob)
+Ví dụ: python manage.py run_workers --processes 2
+"""
+import logging
+import multiprocessing
+import sys
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, connections
+
+# Fix encoding cho Windows
+if sys.platform == 'win32':
+    import codecs
+    sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'strict')
+    sys.stderr = codecs.getwriter('utf-8')(sys.stderr.buffer, 'strict')
+
+logger = logging.getLogger('nas_management')
+
+
+def _worker_loop(poll_interval, burst, stale_after):
+    """Vòng lặp của 1 process worker: lấy job pending và chạy cho đến khi hết (burst) hoặc bị dừng"""
+    import django
+    from django.apps import apps
+    if not apps.ready:
+        # Windows dùng spawn: process con phải tự khởi tạo Django
+        django.setup()
+
+    from nas_management import jobs
+
+    # Settings chưa cấu hình LOGGING thì in log INFO ra stderr (không có handler nào thì chỉ WARNING trở lên được in)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+
+    worker = jobs.worker_name()
+    try:
+        while True:
+            try:
+                job = jobs.claim_next(worker)
+            except DatabaseError:
+                logger.exception(f'[{worker}] Không lấy được job, thử lại sau {poll_interval}s')
+                connections.close_all()
+                time.sleep(poll_interval)
+                continue
+            if job is None:
+                # Lúc rảnh thì dọn job của worker đã chết (cùng ngưỡng heartbeat như lúc khởi động)
+                try:
+                    stale = jobs.fail_stale_jobs(stale_after)
+                except DatabaseError:
+                    logger.exception(f'[{worker}] Không dọn được job bị treo, thử lại ở lần rảnh sau')
+                    connections.close_all()
+                else:
+                    if stale:
+                        logger.warning(f'[{worker}] Đã đánh dấu lỗi {stale} job bị treo')
+                if burst:
+                    return
+                time.sleep(poll_interval)
+                continue
+            logger.info(f'[{worker}] Bắt đầu job #{job.id} ({job.job_type}, NAS {job.nas.name})')
+            jobs.run_job(job)
+            job.refresh_from_db()
+            log = logger.warning if job.status == 'failed' else logger.info
+            log(f'[{worker}] Job #{job.id}: {job.get_status_display()}{" - " + job.error if job.error else ""}')
+    except KeyboardInterrupt:
+        pass
+    finally:
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    help = 'Chạy worker xử lý job đồng bộ/import log NAS chạy nền'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--processes',
+            type=int,
+            default=2,
+            help='Số process worker (mặc định: 2)',
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=2.0,
+            help='Số giây chờ giữa các lần kiểm tra job mới (mặc định: 2)',
+        )
+        parser.add_argument(
+            '--burst',
+            action='store_true',
+            help='Thoát khi không còn job đang chờ',
+        )
+        parser.add_argument(
+            '--stale-minutes',
+            type=int,
+            default=5,
+            help='Khi khởi động và lúc worker rảnh, đánh dấu lỗi các job running mà worker không báo sống quá số phút này (mặc định: 5)',
+        )
+
+    def handle(self, *args, **options):
+        from nas_management import jobs
+
+        stale_after = timedelta(minutes=options['stale_minutes'])
+        stale = jobs.fail_stale_jobs(stale_after)
+        if stale:
+            self.stdout.write(self.style.WARNING(f'Đã đánh dấu lỗi {stale} job bị treo'))
+
+        processes = max(1, options['processes'])
+        self.stdout.write(f'Khởi động {processes} worker (Ctrl+C để dừng)...')
+
+        # Không chia sẻ kết nối database giữa các process
+        connections.close_all()
+        workers = [
+            multiprocessing.Process(target=_worker_loop, args=(options['poll_interval'], options['burst'], stale_after))
+            for _ in range(processes)
+        ]
+        for worker in workers:
+            worker.start()
+
+        try:
+            for worker in workers:
+                worker.join()
+        except KeyboardInterrupt:
+            self.stdout.write('Đang dừng worker...')
+            for worker in workers:
+                worker.join()
+
+        self.stdout.write(self.style.SUCCESS('[OK] Đã dừng worker'))
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-16 22:47
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('nas_management', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NASLogDailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('log_type', models.CharField(choices=[('syslog', 'System Log'), ('connectlog', 'Connection Log'), ('filexferlog', 'File Transfer Log')], max_length=20, verbose_name='Loại log')),
+                ('day', models.DateField(verbose_name='Ngày')),
+                ('level', models.CharField(choices=[('info', 'Info'), ('warning', 'Warning'), ('error', 'Error'), ('critical', 'Critical')], max_length=20, verbose_name='Mức độ')),
+                ('category', models.CharField(blank=True, max_length=100, verbose_name='Danh mục')),
+                ('source', models.CharField(blank=True, max_length=200, verbose_name='Nguồn')),
+                ('operation', models.CharField(blank=True, max_length=50, verbose_name='Thao tác')),
+                ('log_count', models.PositiveIntegerField(default=0, verbose_name='Số log')),
+                ('nas', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='log_rollups', to='nas_management.nasconfig', verbose_name='NAS')),
+            ],
+            options={
+                'verbose_name': 'Thống kê log theo ngày',
+                'verbose_name_plural': 'Thống kê log theo ngày',
+                'ordering': ['-day'],
+                'indexes': [models.Index(fields=['log_type', '-day'], name='nas_managem_log_typ_059572_idx'), models.Index(fields=['nas', 'log_type', '-day'], name='nas_managem_nas_id_1d8dd1_idx')],
+                'unique_together': {('nas', 'log_type', 'day', 'level', 'category', 'source', 'operation')},
+            },
+        ),
+    ]
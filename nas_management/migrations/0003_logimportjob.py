@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:00
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('nas_management', '0002_naslogdailyrollup'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LogImportJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('job_type', models.CharField(choices=[('sync', 'Đồng bộ từ NAS'), ('csv', 'Import file CSV')], max_length=20, verbose_name='Loại job')),
+                ('status', models.CharField(choices=[('pending', 'Đang chờ'), ('running', 'Đang chạy'), ('done', 'Hoàn thành'), ('failed', 'Lỗi')], default='pending', max_length=20, verbose_name='Trạng thái')),
+                ('csv_file', models.FileField(blank=True, upload_to='log_imports/%Y/%m/', verbose_name='File CSV')),
+                ('file_name', models.CharField(blank=True, max_length=255, verbose_name='Tên file gốc')),
+                ('rows_parsed', models.PositiveIntegerField(default=0, verbose_name='Số dòng đã đọc')),
+                ('rows_inserted', models.PositiveIntegerField(default=0, verbose_name='Số log đã ghi')),
+                ('rows_skipped', models.PositiveIntegerField(default=0, verbose_name='Số dòng bỏ qua')),
+                ('message', models.TextField(blank=True, verbose_name='Kết quả')),
+                ('error', models.TextField(blank=True, verbose_name='Lỗi')),
+                ('worker', models.CharField(blank=True, max_length=100, verbose_name='Worker')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True, verbose_name='Bắt đầu')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Kết thúc')),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL, verbose_name='Người tạo')),
+                ('nas', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='import_jobs', to='nas_management.nasconfig', verbose_name='NAS')),
+            ],
+            options={
+                'verbose_name': 'Job import log',
+                'verbose_name_plural': 'Job import log',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['status', 'created_at'], name='nas_managem_status_858321_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:07
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('nas_management', '0003_logimportjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NASLogSyncCursor',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('log_type', models.CharField(choices=[('syslog', 'System Log'), ('connectlog', 'Connection Log'), ('filexferlog', 'File Transfer Log')], default='syslog', max_length=20, verbose_name='Loại log')),
+                ('last_timestamp', models.DateTimeField(blank=True, null=True, verbose_name='Thời gian log mới nhất')),
+                ('last_offset', models.PositiveIntegerField(default=0, verbose_name='Số log tại mốc')),
+                ('last_synced_at', models.DateTimeField(blank=True, null=True, verbose_name='Đồng bộ lần cuối')),
+                ('nas', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='log_sync_cursors', to='nas_management.nasconfig', verbose_name='NAS')),
+            ],
+            options={
+                'verbose_name': 'Mốc đồng bộ log',
+                'verbose_name_plural': 'Mốc đồng bộ log',
+                'unique_together': {('nas', 'log_type')},
+            },
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('nas_management', '0004_naslogsynccursor'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='naslog',
+            index=models.Index(fields=['created_at', 'id'], name='nas_managem_created_03abfc_idx'),
+        ),
+    ]
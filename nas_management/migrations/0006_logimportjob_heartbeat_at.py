@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('nas_management', '0005_naslog_nas_managem_created_03abfc_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='logimportjob',
+            name='heartbeat_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Worker báo sống lúc'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('nas_management', '0006_logimportjob_heartbeat_at'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='naslog',
+            name='nas_managem_created_03abfc_idx',
+        ),
+        migrations.AddField(
+            model_name='naslog',
+            name='change_id',
+            field=models.BigIntegerField(default=0, editable=False, verbose_name='Số thứ tự thay đổi'),
+        ),
+        migrations.AddIndex(
+            model_name='naslog',
+            index=models.Index(fields=['change_id', 'id'], name='nas_managem_change__5aca0a_idx'),
+        ),
+    ]
@@ -120,6 +120,8 @@ class NASLog(models.Model):
     file_name = models.CharField(max_length=500, blank=True, verbose_name="Tên file")
     operation = models.CharField(max_length=50, blank=True, verbose_name="Thao tác")  # Read, Write, Delete, Create
     created_at = models.DateTimeField(auto_now_add=True)
+    # Số thứ tự thay đổi cho đồng bộ delta của mobile app (xem api/sync.py)
+    change_id = models.BigIntegerField(default=0, editable=False, verbose_name="Số thứ tự thay đổi")
 
     class Meta:
         verbose_name = "Log NAS"
@@ -130,6 +132,8 @@ class NASLog(models.Model):
             models.Index(fields=['level', '-timestamp']),
             models.Index(fields=['log_type', '-timestamp']),
             models.Index(fields=['nas', 'log_type', '-timestamp']),
+            # Đồng bộ delta của API (?updated_since=)
+            models.Index(fields=['change_id', 'id']),
         ]
         unique_together = [['nas', 'log_type', 'timestamp', 'message']]
 
@@ -137,6 +141,93 @@ class NASLog(models.Model):
         return f"{self.nas.name} - {self.level} - {self.timestamp.strftime('%d/%m/%Y %H:%M')}"
 
 
+class NASLogDailyRollup(models.Model):
+    """Thống kê log NAS đã tổng hợp theo ngày - dashboard đọc bảng này thay vì quét NASLog"""
+    nas = models.ForeignKey(NASConfig, on_delete=models.CASCADE, related_name='log_rollups', verbose_name="NAS")
+    log_type = models.CharField(max_length=20, choices=NASLog.LOG_TYPE_CHOICES, verbose_name="Loại log")
+    day = models.DateField(verbose_name="Ngày")
+    level = models.CharField(max_length=20, choices=NASLog.LOG_LEVEL_CHOICES, verbose_name="Mức độ")
+    category = models.CharField(max_length=100, blank=True, verbose_name="Danh mục")
+    source = models.CharField(max_length=200, blank=True, verbose_name="Nguồn")
+    operation = models.CharField(max_length=50, blank=True, verbose_name="Thao tác")
+    log_count = models.PositiveIntegerField(default=0, verbose_name="Số log")
+
+    class Meta:
+        verbose_name = "Thống kê log theo ngày"
+        verbose_name_plural = "Thống kê log theo ngày"
+        ordering = ['-day']
+        indexes = [
+            models.Index(fields=['log_type', '-day']),
+            models.Index(fields=['nas', 'log_type', '-day']),
+        ]
+        unique_together = [['nas', 'log_type', 'day', 'level', 'category', 'source', 'operation']]
+
+    def __str__(self):
+        return f"{self.nas.name} - {self.log_type} - {self.day.strftime('%d/%m/%Y')} - {self.level}: {self.log_count}"
+
+
+class NASLogSyncCursor(models.Model):
+    """Mốc đồng bộ log từ NAS (high-water mark): lần sau chỉ lấy log mới hơn mốc này"""
+    nas = models.ForeignKey(NASConfig, on_delete=models.CASCADE, related_name='log_sync_cursors', verbose_name="NAS")
+    log_type = models.CharField(max_length=20, choices=NASLog.LOG_TYPE_CHOICES, default='syslog', verbose_name="Loại log")
+    last_timestamp = models.DateTimeField(null=True, blank=True, verbose_name="Thời gian log mới nhất")
+    # Số log đã lưu có đúng last_timestamp, dùng để biết đã đọc hết các log trùng thời gian với mốc
+    last_offset = models.PositiveIntegerField(default=0, verbose_name="Số log tại mốc")
+    last_synced_at = models.DateTimeField(null=True, blank=True, verbose_name="Đồng bộ lần cuối")
+
+    class Meta:
+        verbose_name = "Mốc đồng bộ log"
+        verbose_name_plural = "Mốc đồng bộ log"
+        unique_together = [['nas', 'log_type']]
+
+    def __str__(self):
+        return f"{self.nas.name} - {self.log_type} - {self.last_timestamp}"
+
+
+class LogImportJob(models.Model):
+    """Job đồng bộ/import log NAS chạy nền, được xử lý bởi `manage.py run_workers`"""
+    JOB_TYPE_CHOICES = [
+        ('sync', 'Đồng bộ từ NAS'),
+        ('csv', 'Import file CSV'),
+    ]
+
+    STATUS_CHOICES = [
+        ('pending', 'Đang chờ'),
+        ('running', 'Đang chạy'),
+        ('done', 'Hoàn thành'),
+        ('failed', 'Lỗi'),
+    ]
+
+    nas = models.ForeignKey(NASConfig, on_delete=models.CASCADE, related_name='import_jobs', verbose_name="NAS")
+    job_type = models.CharField(max_length=20, choices=JOB_TYPE_CHOICES, verbose_name="Loại job")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending', verbose_name="Trạng thái")
+    csv_file = models.FileField(upload_to='log_imports/%Y/%m/', blank=True, verbose_name="File CSV")
+    file_name = models.CharField(max_length=255, blank=True, verbose_name="Tên file gốc")
+    rows_parsed = models.PositiveIntegerField(default=0, verbose_name="Số dòng đã đọc")
+    rows_inserted = models.PositiveIntegerField(default=0, verbose_name="Số log đã ghi")
+    rows_skipped = models.PositiveIntegerField(default=0, verbose_name="Số dòng bỏ qua")
+    message = models.TextField(blank=True, verbose_name="Kết quả")
+    error = models.TextField(blank=True, verbose_name="Lỗi")
+    worker = models.CharField(max_length=100, blank=True, verbose_name="Worker")
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, verbose_name="Người tạo")
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True, verbose_name="Bắt đầu")
+    # Worker đang chạy job cập nhật định kỳ (jobs.HEARTBEAT_INTERVAL), quá lâu không cập nhật = worker đã dừng
+    heartbeat_at = models.DateTimeField(null=True, blank=True, verbose_name="Worker báo sống lúc")
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name="Kết thúc")
+
+    class Meta:
+        verbose_name = "Job import log"
+        verbose_name_plural = "Job import log"
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+        ]
+
+    def __str__(self):
+        return f"#{self.id} {self.get_job_type_display()} - {self.nas.name} - {self.get_status_display()}"
+
+
 class FileOperation(models.Model):
     """Lịch sử thao tác file/folder"""
     OPERATION_CHOICES = [
@@ -0,0 +1,217 @@
+"""
+Thống kê log NAS theo ngày (NASLogDailyRollup)
+Mỗi lần import/đồng bộ log sẽ tính lại các ngày bị ảnh hưởng, dashboard chỉ đọc bảng thống kê
+Sửa/xóa log ngoài các đường đó phải tự cập nhật thống kê: qua delete_logs/refresh_for_logs (admin đã làm vậy),
+còn xóa thẳng bằng queryset/SQL/shell thì chạy `manage.py rebuild_log_rollups` sau đó.
+Xóa NAS thì thống kê của NAS bị xóa theo (cascade), không cần tính lại
+Dashboard API của từng NAS được cache theo version lưu trong database (equipment_management.versions):
+tính lại thống kê thì tăng version của NAS đó, mọi process (kể cả run_workers) đều thấy ngay
+"""
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+
+from api.models import DeletionLog
+from equipment_management import versions
+
+from .models import NASLog, NASLogDailyRollup
+
+# Các chiều thống kê ngoài (nas, log_type, day)
+ROLLUP_FIELDS = ['level', 'category', 'source', 'operation']
+BATCH_SIZE = 1000
+# Xóa nhiều log hơn bấy nhiêu thì không ghi tombstone từng dòng mà đánh dấu mobile app tải lại toàn bộ log
+DELETE_TOMBSTONE_LIMIT = 1000
+
+# Version chung của mọi NAS và version riêng từng NAS
+DASHBOARD_VERSION = 'nas_dashboard'
+DASHBOARD_NAS_VERSION = 'nas_dashboard:{}'
+# Giữ cache dashboard tối đa bấy nhiêu giây (phòng thống kê bị sửa không qua refresh_days/rebuild)
+DASHBOARD_CACHE_TTL = 60
+
+
+def day_start(day):
+    """Thời điểm bắt đầu ngày theo timezone hiện tại"""
+    return timezone.make_aware(datetime.combine(day, datetime.min.time()))
+
+
+def _group_logs(logs):
+    """GROUP BY ngày + các chiều thống kê trên bảng NASLog"""
+    return logs.annotate(
+        day=TruncDate('timestamp')
+    ).values('nas_id', 'log_type', 'day', *ROLLUP_FIELDS).annotate(total=Count('id')).order_by()
+
+
+def _to_rollup(row):
+    return NASLogDailyRollup(
+        nas_id=row['nas_id'],
+        log_type=row['log_type'],
+        day=row['day'],
+        level=row['level'],
+        category=row['category'],
+        source=row['source'],
+        operation=row['operation'],
+        log_count=row['total'],
+    )
+
+
+def refresh_days(nas_id, log_type, days):
+    """Tính lại thống kê của các ngày (theo nas, log_type) từ bảng NASLog"""
+    days = set(days)
+    if not days:
+        return 0
+
+    logs = NASLog.objects.filter(
+        nas_id=nas_id,
+        log_type=log_type,
+        timestamp__gte=day_start(min(days)),
+        timestamp__lt=day_start(max(days) + timedelta(days=1)),
+    )
+    rollups = [_to_rollup(row) for row in _group_logs(logs) if row['day'] in days]
+
+    with transaction.atomic():
+        NASLogDailyRollup.objects.filter(nas_id=nas_id, log_type=log_type, day__in=days).delete()
+        NASLogDailyRollup.objects.bulk_create(rollups, batch_size=BATCH_SIZE)
+        invalidate_dashboard([nas_id])
+    return len(rollups)
+
+
+def refresh_for_logs(logs):
+    """Cập nhật thống kê cho các ngày có trong danh sách NASLog vừa được ghi"""
+    affected_days = defaultdict(set)
+    for log in logs:
+        affected_days[(log.nas_id, log.log_type)].add(timezone.localdate(log.timestamp))
+
+    for (nas_id, log_type), days in affected_days.items():
+        refresh_days(nas_id, log_type, days)
+
+
+def delete_logs(logs):
+    """
+    Xóa các NASLog (queryset), tính lại thống kê của các ngày có log bị xóa và ghi tombstone cho đồng bộ delta
+    của API (NASLog không có signal post_delete để xóa hàng loạt vẫn là 1 câu DELETE), trả về số log đã xóa
+    """
+    affected_days = defaultdict(set)
+    rows = logs.annotate(day=TruncDate('timestamp')).values_list('nas_id', 'log_type', 'day').order_by().distinct()
+    for nas_id, log_type, day in rows:
+        affected_days[(nas_id, log_type)].add(day)
+
+    with transaction.atomic():
+        log_ids = list(logs.order_by().values_list('id', flat=True)[:DELETE_TOMBSTONE_LIMIT + 1])
+        deleted = logs.delete()[0]
+        if len(log_ids) > DELETE_TOMBSTONE_LIMIT:
+            DeletionLog.record(NASLog)
+        else:
+            DeletionLog.record_many(NASLog, log_ids)
+        for (nas_id, log_type), days in affected_days.items():
+            refresh_days(nas_id, log_type, days)
+    return deleted
+
+
+def rebuild(nas_id=None):
+    """Tính lại toàn bộ bảng thống kê từ NASLog (backfill)"""
+    logs = NASLog.objects.all()
+    rollups = NASLogDailyRollup.objects.all()
+    if nas_id:
+        logs = logs.filter(nas_id=nas_id)
+        rollups = rollups.filter(nas_id=nas_id)
+
+    created = 0
+    with transaction.atomic():
+        rollups.delete()
+        batch = []
+        for row in _group_logs(logs).iterator(chunk_size=BATCH_SIZE):
+            batch.append(_to_rollup(row))
+            if len(batch) >= BATCH_SIZE:
+                NASLogDailyRollup.objects.bulk_create(batch)
+                created += len(batch)
+                batch = []
+        if batch:
+            NASLogDailyRollup.objects.bulk_create(batch)
+            created += len(batch)
+        invalidate_dashboard([nas_id] if nas_id else None)
+    return created
+
+
+def sum_by(field, values):
+    """Tổng số log + tổng theo từng giá trị của field (dùng cho aggregate/annotate)"""
+    sums = {'total': Coalesce(Sum('log_count'), 0)}
+    for value in values:
+        sums[value] = Coalesce(Sum('log_count', filter=Q(**{field: value})), 0)
+    return sums
+
+
+def top(rollups, field, limit=10):
+    """Top giá trị của field theo số log"""
+    return rollups.values(field).annotate(count=Sum('log_count')).order_by('-count')[:limit]
+
+
+def daily_stats(rollups, field, values, days=30):
+    """Ma trận ngày x field (level/log_type) cho N ngày gần nhất, điền 0 cho ngày không có log"""
+    today = timezone.localdate()
+    first_day = today - timedelta(days=days - 1)
+
+    rows = rollups.filter(
+        day__gte=first_day, day__lte=today
+    ).values('day').annotate(**sum_by(field, values)).order_by('day')
+    rows_by_day = {row['day']: row for row in rows}
+
+    stats = []
+    for i in range(days):
+        day = first_day + timedelta(days=i)
+        row = rows_by_day.get(day, {})
+        stat = {'date': day, 'total': row.get('total', 0)}
+        for value in values:
+            stat[value] = row.get(value, 0)
+        stats.append(stat)
+    return stats
+
+
+def type_level_matrix(nas_id):
+    """{log_type: {level: số log}} của 1 NAS, 1 query GROUP BY (log_type, level) trên bảng thống kê"""
+    levels = [level for level, _ in NASLog.LOG_LEVEL_CHOICES]
+    matrix = {log_type: dict.fromkeys(levels, 0) for log_type, _ in NASLog.LOG_TYPE_CHOICES}
+    rows = NASLogDailyRollup.objects.filter(nas_id=nas_id).values('log_type', 'level').annotate(
+        count=Sum('log_count')
+    ).order_by()
+    for row in rows:
+        matrix.setdefault(row['log_type'], dict.fromkeys(levels, 0))[row['level']] = row['count']
+    return matrix
+
+
+def dashboard(nas_id):
+    """Tổng số log, theo loại, theo mức độ và ma trận loại x mức độ của 1 NAS (từ cache nếu có)"""
+    nas_version = DASHBOARD_NAS_VERSION.format(nas_id)
+    current = versions.get_many([DASHBOARD_VERSION, nas_version])
+    key = f'{nas_version}:{current[DASHBOARD_VERSION]}:{current[nas_version]}'
+    data = cache.get(key)
+    if data is None:
+        matrix = type_level_matrix(nas_id)
+        logs_by_level = defaultdict(int)
+        for counts in matrix.values():
+            for level, count in counts.items():
+                logs_by_level[level] += count
+        data = {
+            'total_logs': sum(logs_by_level.values()),
+            'logs_by_type': {log_type: sum(counts.values()) for log_type, counts in matrix.items()},
+            'logs_by_level': dict(logs_by_level),
+            'matrix': matrix,
+        }
+        cache.set(key, data, DASHBOARD_CACHE_TTL)
+    return data
+
+
+def invalidate_dashboard(nas_ids=None):
+    """
+    Bỏ cache dashboard của các NAS (None = tất cả): tăng version trong transaction đang chạy,
+    có hiệu lực cùng lúc với thống kê mới khi commit
+    """
+    if nas_ids is None:
+        versions.bump(DASHBOARD_VERSION)
+        return
+    for nas_id in nas_ids:
+        versions.bump(DASHBOARD_NAS_VERSION.format(nas_id))
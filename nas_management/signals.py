@@ -0,0 +1,14 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import capabilities
+from .client_pool import client_pool
+from .models import NASConfig
+
+
+@receiver(post_save, sender=NASConfig)
+@receiver(post_delete, sender=NASConfig)
+def invalidate_nas_client(sender, instance, **kwargs):
+    """NAS bị sửa/xóa thì bỏ session đang giữ trong pool và kết quả dò API"""
+    client_pool.invalidate(instance.id)
+    capabilities.forget(instance.id)
@@ -0,0 +1,80 @@
+"""
+Thu thập thống kê CPU/RAM/Disk của các NAS (SystemStats)
+Các NAS được poll song song trên thread pool, kết quả ghi bằng 1 lần bulk_create
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.utils import timezone
+
+from .models import SystemStats
+from .client_pool import pooled_client
+
+logger = logging.getLogger('nas_management')
+
+
+def fetch_stats(nas):
+    """Lấy CPU/RAM/Disk của 1 NAS, trả về SystemStats chưa lưu"""
+    with pooled_client(nas) as client:
+        # Utilization đã có cả CPU và memory, không cần gọi get_memory_info
+        cpu_info = client.get_cpu_info()
+        disk_info = client.get_disk_info()
+
+    cpu_usage = cpu_info.get('cpu', {}).get('system_load', 0)
+    memory_data = cpu_info.get('memory', {})
+    memory_total = memory_data.get('total', 0)
+    memory_used = memory_data.get('real_usage', 0)
+    memory_usage = (memory_used / memory_total * 100) if memory_total > 0 else 0
+
+    return SystemStats(
+        nas=nas,
+        cpu_usage=cpu_usage,
+        memory_usage=memory_usage,
+        memory_total=memory_total,
+        memory_used=memory_used,
+        disk_usage=disk_info,
+    )
+
+
+def collect_stats(nas_list, max_workers=8):
+    """
+    Poll song song các NAS và lưu kết quả
+    Trả về (danh sách SystemStats đã lưu, dict lỗi theo tên NAS)
+    """
+    nas_list = list(nas_list)
+    if not nas_list:
+        return [], {}
+
+    samples = []
+    errors = {}
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(nas_list))) as executor:
+        futures = [(nas, executor.submit(fetch_stats, nas)) for nas in nas_list]
+        for nas, future in futures:
+            try:
+                samples.append(future.result())
+            except Exception as e:
+                errors[nas.name] = str(e)
+                logger.warning(f"Error collecting stats from {nas.name}: {str(e)}")
+
+    # Cùng 1 lượt poll dùng chung timestamp để các NAS thẳng hàng trên biểu đồ
+    now = timezone.now()
+    for sample in samples:
+        sample.timestamp = now
+    SystemStats.objects.bulk_create(samples)
+    return samples, errors
+
+
+def latest_stats(nas):
+    """Mẫu thống kê mới nhất của NAS dưới dạng dữ liệu cho dashboard"""
+    latest = SystemStats.objects.filter(nas=nas).order_by('-timestamp').first()
+    if not latest:
+        return None
+    return {
+        'cpu_usage': round(latest.cpu_usage, 2),
+        'memory_usage': round(latest.memory_usage, 2),
+        'memory_total': latest.memory_total,
+        'memory_used': latest.memory_used,
+        'memory_free': latest.memory_total - latest.memory_used,
+        'disk_info': latest.disk_usage,
+        'timestamp': latest.timestamp,
+    }
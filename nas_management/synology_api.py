@@ -2,17 +2,243 @@
 Synology DSM API Client
 Tài liệu: https://global.download.synology.com/download/Document/Software/DeveloperGuide/Package/FileStation/All/enu/Synology_File_Station_API_Guide.pdf
 """
+import io
 import requests
 import json
 import os
+import uuid
 from typing import Dict, List, Optional, Any
 from django.utils import timezone
 from .models import NASConfig
+from . import capabilities
+
+
+# Mã lỗi DSM khi SID hết hạn/không hợp lệ: 106 timeout, 107 bị đăng nhập trùng, 119 không tìm thấy SID
+SID_EXPIRED_CODES = {106, 107, 119}
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+UPLOAD_CHUNK_SIZE = 1024 * 1024
 
 
 class SynologyAPIError(Exception):
     """Lỗi khi gọi Synology API"""
-    pass
+    def __init__(self, message='', code=None):
+        super().__init__(message)
+        self.code = code
+
+
+def iter_response(response: requests.Response, chunk_size: int = DOWNLOAD_CHUNK_SIZE):
+    """Đọc response theo từng chunk, đóng kết nối khi xong hoặc khi client ngắt"""
+    try:
+        for chunk in response.iter_content(chunk_size=chunk_size):
+            if chunk:
+                yield chunk
+    finally:
+        response.close()
+
+
+class MultipartFileStream:
+    """
+    Body multipart/form-data đọc dần từ file khi requests gửi đi, kích thước biết trước (Content-Length)
+    Các field đứng trước phần file vì DSM yêu cầu file là phần cuối cùng
+    """
+    
+    def __init__(self, fields: Dict, file_field: str, file_name: str, fileobj, file_size: int,
+                 progress=None, chunk_size: int = UPLOAD_CHUNK_SIZE):
+        boundary = uuid.uuid4().hex
+        self.content_type = f'multipart/form-data; boundary={boundary}'
+        
+        head = ''
+        for name, value in fields.items():
+            head += f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'
+        safe_name = file_name.replace('"', '%22').replace('\r', '').replace('\n', '')
+        head += (
+            f'--{boundary}\r\n'
+            f'Content-Disposition: form-data; name="{file_field}"; filename="{safe_name}"\r\n'
+            f'Content-Type: application/octet-stream\r\n\r\n'
+        )
+        tail = f'\r\n--{boundary}--\r\n'.encode()
+        head = head.encode('utf-8')
+        
+        self._parts = [io.BytesIO(head), fileobj, io.BytesIO(tail)]
+        self._length = len(head) + file_size + len(tail)
+        self._sent = 0
+        self._reported = 0
+        self._progress = progress
+        self._chunk_size = chunk_size
+    
+    def __len__(self):
+        return self._length
+    
+    def read(self, size: int = -1) -> bytes:
+        if size is None or size < 0:
+            size = self._length
+        data = b''
+        while self._parts and len(data) < size:
+            chunk = self._parts[0].read(size - len(data))
+            if not chunk:
+                self._parts.pop(0)
+                continue
+            data += chunk
+        
+        self._sent += len(data)
+        if self._progress and (self._sent - self._reported >= self._chunk_size or self._sent == self._length):
+            self._reported = self._sent
+            self._progress(self._sent, self._length)
+        return data
+    
+    def __iter__(self):
+        while True:
+            chunk = self.read(self._chunk_size)
+            if not chunk:
+                return
+            yield chunk
+
+LOG_FILES = [
+    '/var/log/messages',
+    '/var/log/auth.log',
+    '/var/log/samba.log',
+    '/var/log/nas.log',
+    '/var/log/syslog',
+    '/var/log/system.log',
+    '/var/log/daemon.log',
+]
+
+
+def _parse_system_logs(data: Dict) -> List[Dict]:
+    """Response của SYNO.Core.System.get_log"""
+    parsed_logs = []
+    for log in data.get('data', {}).get('logs', []):
+        if isinstance(log, dict):
+            parsed_logs.append({
+                'time': str(log.get('time', '') or log.get('timestamp', '') or timezone.now().timestamp()),
+                'level': (log.get('level', 'info') or 'info').lower(),
+                'category': str(log.get('module', '') or log.get('category', '') or 'system')[:100],
+                'source': str(log.get('user', '') or log.get('source', '') or log.get('host', '') or 'system')[:200],
+                'message': str(log.get('msg', '') or log.get('message', '') or log.get('content', '') or str(log))[:500],
+            })
+        else:
+            parsed_logs.append({
+                'time': str(timezone.now().timestamp()),
+                'level': 'info',
+                'category': 'system',
+                'source': 'system',
+                'message': str(log)[:500],
+            })
+    return parsed_logs
+
+
+def _parse_events(data: Dict) -> List[Dict]:
+    """Response của SYNO.Core.EventLog / SYNO.LogCenter.Log"""
+    events = data.get('data', {}).get('events', []) or data.get('data', {}).get('logs', [])
+    parsed_logs = []
+    for event in events:
+        if isinstance(event, dict):
+            parsed_logs.append({
+                'time': str(event.get('time', 0) or event.get('timestamp', 0) or timezone.now().timestamp()),
+                'level': (event.get('level', 'info') or 'info').lower(),
+                'category': str(event.get('category', '') or event.get('program', '') or 'event')[:100],
+                'source': str(event.get('host_name', '') or event.get('source', '') or event.get('program', '') or 'system')[:200],
+                'message': str(event.get('message', '') or event.get('msg', '') or str(event))[:500],
+            })
+        else:
+            parsed_logs.append({
+                'time': str(timezone.now().timestamp()),
+                'level': 'info',
+                'category': 'event',
+                'source': 'system',
+                'message': str(event)[:500],
+            })
+    return parsed_logs
+
+
+def _parse_raw_logs(data: Dict) -> List[Dict]:
+    """Response của SYNO.Core.System.Log đã đúng format"""
+    return data.get('data', {}).get('logs', [])
+
+
+def _extract_ai_logs(data: Dict) -> List:
+    """SYNO.AI.Statistics.*.Log trả log ở nhiều chỗ khác nhau tùy version"""
+    if isinstance(data.get('data'), list):
+        return data['data']
+    if isinstance(data.get('data'), dict):
+        # Kiểm tra các keys có thể chứa logs
+        for key in ['logs', 'data', 'items', 'events']:
+            if isinstance(data['data'].get(key), list) and data['data'][key]:
+                return data['data'][key]
+        return []
+    if isinstance(data.get('logs'), list):
+        return data['logs']
+    return []
+
+
+def _parse_ai_admin_logs(data: Dict) -> List[Dict]:
+    """Response của SYNO.AI.Statistics.Admin.Log"""
+    converted_logs = []
+    for entry in _extract_ai_logs(data):
+        if not isinstance(entry, dict):
+            converted_logs.append({
+                'level': 'info',
+                'category': 'AI.Statistics.Admin',
+                'message': str(entry)[:500],
+                'source': 'AI.Statistics',
+                'time': str(timezone.now().timestamp())
+            })
+            continue
+        
+        # Thử nhiều field names khác nhau
+        level_raw = entry.get('level') or entry.get('severity') or entry.get('log_level') or 'info'
+        level = level_raw.lower() if isinstance(level_raw, str) else 'info'
+        if level not in ['info', 'warning', 'error', 'critical', 'debug']:
+            level = 'info'
+        category = (entry.get('category') or entry.get('type') or entry.get('module') or
+                    entry.get('component') or 'AI.Statistics.Admin')
+        message = (entry.get('message') or entry.get('content') or entry.get('description') or
+                   entry.get('text') or entry.get('log') or str(entry))
+        source = (entry.get('source') or entry.get('user') or entry.get('username') or
+                  entry.get('account') or entry.get('host') or entry.get('ip') or 'AI.Statistics')
+        timestamp = (entry.get('time') or entry.get('timestamp') or entry.get('date') or
+                     entry.get('created_at') or entry.get('datetime') or entry.get('time_stamp') or
+                     str(timezone.now().timestamp()))
+        converted_logs.append({
+            'level': level,
+            'category': str(category)[:100],
+            'message': str(message)[:500],
+            'source': str(source)[:200],
+            'time': str(timestamp)
+        })
+    return converted_logs
+
+
+def _parse_ai_request_logs(data: Dict) -> List[Dict]:
+    """Response của SYNO.AI.Statistics.Request.Log"""
+    converted_logs = []
+    for entry in _extract_ai_logs(data):
+        if isinstance(entry, dict):
+            converted_logs.append({
+                'level': 'info',  # Request logs thường là info
+                'category': entry.get('category', '') or entry.get('type', '') or 'AI.Request',
+                'message': str(entry.get('message', '')) or str(entry.get('content', '')) or str(entry.get('request', '')) or str(entry),
+                'source': entry.get('source', '') or entry.get('ip', '') or entry.get('client_ip', '') or 'AI.Request',
+                'time': str(entry.get('time', 0)) or str(entry.get('timestamp', 0)) or str(entry.get('date', '')) or str(entry.get('created_at', ''))
+            })
+        else:
+            converted_logs.append({
+                'level': 'info',
+                'category': 'AI.Request',
+                'message': str(entry),
+                'source': 'AI.Request',
+                'time': str(timezone.now().timestamp())
+            })
+    return converted_logs
+
+
+LOG_PARSERS = {
+    'system': _parse_system_logs,
+    'event': _parse_events,
+    'raw': _parse_raw_logs,
+    'ai_admin': _parse_ai_admin_logs,
+    'ai_request': _parse_ai_request_logs,
+}
 
 
 class SynologyAPIClient:
@@ -26,13 +252,27 @@ class SynologyAPIClient:
         self.sid = None  # Session ID
         
     def _request(self, api: str, method: str, params: Dict = None) -> Dict:
-        """Gửi request đến Synology API"""
+        """Gửi request đến Synology API, tự đăng nhập lại 1 lần nếu SID đã hết hạn"""
         if params is None:
             params = {}
         
+        try:
+            return self._send(api, method, params)
+        except SynologyAPIError as e:
+            if e.code not in SID_EXPIRED_CODES or not self.sid or api == 'auth.cgi':
+                raise
+        
+        self.sid = None
+        self.login()
+        return self._send(api, method, params)
+    
+    def _send(self, api: str, method: str, params: Dict) -> Dict:
+        """Gửi 1 request đến Synology API"""
         # Thêm SID nếu đã đăng nhập
         if self.sid:
             params['_sid'] = self.sid
+        else:
+            params.pop('_sid', None)
         
         url = f"{self.base_url}/webapi/{api}"
         
@@ -58,7 +298,7 @@ class SynologyAPIClient:
             if not data.get('success', False):
                 error_code = data.get('error', {}).get('code', 0)
                 error_msg = data.get('error', {}).get('errors', data.get('error', {}).get('message', 'Unknown error'))
-                raise SynologyAPIError(f"API Error {error_code}: {error_msg}")
+                raise SynologyAPIError(f"API Error {error_code}: {error_msg}", code=error_code)
             
             return data
             
@@ -194,21 +434,15 @@ class SynologyAPIClient:
             return []
     
     def get_api_info(self, api_name: str) -> Dict:
-        """Lấy thông tin về API"""
-        try:
-            params = {
-                'api': 'SYNO.API.Info',
-                'version': '1',
-                'method': 'query',
-                'query': api_name
-            }
-            data = self._request('query.cgi', 'GET', params)
-            return data.get('data', {}).get(api_name, {})
-        except:
-            return {}
+        """Lấy thông tin về API (từ danh sách API đã cache)"""
+        return self.list_all_apis().get(api_name, {})
     
-    def list_all_apis(self) -> Dict:
-        """Lấy danh sách tất cả API có sẵn"""
+    def list_all_apis(self, refresh: bool = False) -> Dict:
+        """Lấy danh sách tất cả API có sẵn, cache theo NAS (xem capabilities.py)"""
+        if not refresh:
+            cached = capabilities.get(self.nas_config.id, 'api_info')
+            if cached is not None:
+                return cached
         try:
             params = {
                 'api': 'SYNO.API.Info',
@@ -217,616 +451,204 @@ class SynologyAPIClient:
                 'query': 'all'
             }
             data = self._request('query.cgi', 'GET', params)
-            return data.get('data', {})
+            apis = data.get('data', {})
         except:
             return {}
+        if apis:
+            capabilities.remember(self.nas_config.id, 'api_info', apis)
+        return apis
+    
+    def _log_endpoints(self) -> List[Dict]:
+        """Các endpoint lấy log theo thứ tự ưu tiên"""
+        # DSM 7+ sử dụng SYNO.Core.System.get_log - API chuẩn nhất, thử các version khác nhau
+        endpoints = [
+            {'api': 'SYNO.Core.System', 'version': version, 'method': 'get_log', 'parser': 'system'}
+            for version in ('1', '2', '3')
+        ]
+        # Phương án ưu tiên: Đọc trực tiếp file log qua FileStation API
+        endpoints += [{'file': log_file} for log_file in LOG_FILES]
+        # Fallback: Các API cũ cho DSM 6 hoặc các trường hợp đặc biệt
+        endpoints += [
+            # SYNO.Core.EventLog v1 (API chính cho Log Center) cần session SYNO.Core.EventLog
+            {'api': 'SYNO.Core.EventLog', 'version': '1', 'method': 'list', 'parser': 'event', 'session': 'SYNO.Core.EventLog'},
+            {'api': 'SYNO.Core.EventLog', 'version': '1', 'method': 'query', 'parser': 'event', 'session': 'SYNO.Core.EventLog'},
+            {'api': 'SYNO.Core.EventLog', 'version': '2', 'method': 'list', 'parser': 'event'},
+            {'api': 'SYNO.LogCenter.Log', 'version': '1', 'method': 'list', 'parser': 'event'},
+            # SYNO.Core.EventLog (DSM 6) với session mặc định
+            {'api': 'SYNO.Core.EventLog', 'version': '1', 'method': 'list', 'parser': 'event'},
+            {'api': 'SYNO.Core.System.Log', 'version': '1', 'method': 'list', 'parser': 'raw'},
+        ]
+        return endpoints
+    
+    def _ai_log_endpoints(self) -> List[Dict]:
+        """Endpoint SYNO.AI.Statistics.*.Log nếu NAS có (version/path lấy từ SYNO.API.Info)"""
+        all_apis = self.list_all_apis()
+        endpoints = []
+        for api_name, parser in (('SYNO.AI.Statistics.Admin.Log', 'ai_admin'), ('SYNO.AI.Statistics.Request.Log', 'ai_request')):
+            if api_name not in all_apis:
+                continue
+            api_info = all_apis[api_name]
+            for method in ('list', 'get'):
+                endpoints.append({
+                    'api': api_name,
+                    'version': str(api_info.get('maxVersion', '1')),
+                    'path': api_info.get('path', 'entry.cgi'),
+                    'method': method,
+                    'parser': parser,
+                })
+        return endpoints
     
-    def get_logs(self, limit: int = 200, level: str = None) -> List[Dict]:
-        """Lấy logs của hệ thống - DSM 7+ sử dụng SYNO.Core.System.get_log (ổn định nhất)"""
+    def get_logs(self, limit: int = 200, level: str = None, offset: int = 0) -> List[Dict]:
+        """
+        Lấy logs của hệ thống - DSM 7+ sử dụng SYNO.Core.System.get_log (ổn định nhất)
+        offset: bỏ qua offset log mới nhất, dùng để phân trang (log trả về từ mới đến cũ)
+        Endpoint chạy được được cache theo NAS, lần sau gọi thẳng endpoint đó
+        """
         import logging
         logger = logging.getLogger('nas_management')
+        nas_id = self.nas_config.id
         
-        # DSM 7+ sử dụng SYNO.Core.System.get_log - API chuẩn nhất
-        # Thử các version khác nhau
-        versions_to_try = ['1', '2', '3']
-        for version in versions_to_try:
+        cached = capabilities.get(nas_id, 'logs')
+        if cached:
             try:
-                logger.info(f"Trying SYNO.Core.System.get_log v{version} (DSM 7+ standard API)...")
-                
-                params = {
-                    'api': 'SYNO.Core.System',
-                    'version': version,
-                    'method': 'get_log',
-                    'limit': limit,
-                }
-                
-                if level:
-                    params['level'] = level  # info / warning / error
-                
-                data = self._request('entry.cgi', 'GET', params)
-                
-                # Kiểm tra xem response có thành công không
-                if not data.get('success', False):
-                    error_code = data.get('error', {}).get('code', 0)
-                    error_msg = data.get('error', {}).get('message', 'Unknown error')
-                    logger.warning(f"SYNO.Core.System v{version} returned error: {error_code} - {error_msg}")
-                    continue  # Thử version tiếp theo
-                
-                logs = data.get('data', {}).get('logs', [])
-                
-                if logs and len(logs) > 0:
-                    logger.info(f"SYNO.Core.System v{version} returned {len(logs)} logs")
-                    parsed_logs = []
-                    for log in logs:
-                        if isinstance(log, dict):
-                            parsed_logs.append({
-                                'time': str(log.get('time', '') or log.get('timestamp', '') or timezone.now().timestamp()),
-                                'level': (log.get('level', 'info') or 'info').lower(),
-                                'category': str(log.get('module', '') or log.get('category', '') or 'system')[:100],
-                                'source': str(log.get('user', '') or log.get('source', '') or log.get('host', '') or 'system')[:200],
-                                'message': str(log.get('msg', '') or log.get('message', '') or log.get('content', '') or str(log))[:500],
-                            })
-                        else:
-                            parsed_logs.append({
-                                'time': str(timezone.now().timestamp()),
-                                'level': 'info',
-                                'category': 'system',
-                                'source': 'system',
-                                'message': str(log)[:500],
-                            })
-                    
-                    if parsed_logs:
-                        logger.info(f"Successfully got {len(parsed_logs)} logs from SYNO.Core.System v{version}")
-                        return parsed_logs
-            except SynologyAPIError as e:
-                logger.warning(f"SYNO.Core.System v{version} failed: {str(e)}")
-                continue  # Thử version tiếp theo
+                # Endpoint đã biết là chạy được: trả về kết quả kể cả khi rỗng (vd. đã hết trang)
+                return self._fetch_logs(cached, limit, level, offset)
             except Exception as e:
-                logger.warning(f"SYNO.Core.System v{version} error: {str(e)}")
-                continue  # Thử version tiếp theo
-        
-        # Phương án ưu tiên: Đọc trực tiếp file log qua FileStation API (100% hoạt động)
-        logger.info("Trying to read log files directly via FileStation API...")
-        log_files = [
-            '/var/log/messages',
-            '/var/log/auth.log',
-            '/var/log/samba.log',
-            '/var/log/nas.log',
-            '/var/log/syslog',
-            '/var/log/system.log',
-            '/var/log/daemon.log',
-        ]
-        
-        all_parsed_logs = []
-        for log_file in log_files:
-            try:
-                logger.info(f"Trying to read log file: {log_file}")
-                file_content = self.download_file(log_file)
-                if file_content:
-                    # Parse log file (thường là text format)
-                    lines = file_content.decode('utf-8', errors='ignore').split('\n')
-                    # Lấy các dòng gần nhất
-                    recent_lines = lines[-limit:] if len(lines) > limit else lines
-                    
-                    for line in recent_lines:
-                        if line.strip():
-                            # Parse log line (format có thể khác nhau)
-                            # Ví dụ: "2024-01-01 12:00:00 hostname module[pid]: message"
-                            # Hoặc: "Jan  1 12:00:00 hostname module: message"
-                            parts = line.strip().split()
-                            if len(parts) >= 3:
-                                # Thử parse timestamp và message
-                                timestamp_str = ''
-                                level = 'info'
-                                category = ''
-                                source = ''
-                                message = line.strip()
-                                
-                                # Thử parse timestamp (nhiều format)
-                                # Format 1: "2024-01-01T12:00:00" hoặc "2024-01-01 12:00:00"
-                                # Format 2: "Jan  1 12:00:00"
-                                if len(parts) >= 3:
-                                    # Thử format ISO hoặc standard
-                                    if '-' in parts[0] and ':' in parts[1]:
-                                        timestamp_str = f"{parts[0]} {parts[1]}"
-                                        message = ' '.join(parts[2:])
-                                    elif len(parts) >= 4 and ':' in parts[2]:
-                                        # Format: "Jan  1 12:00:00 hostname message"
-                                        timestamp_str = f"{parts[0]} {parts[1]} {parts[2]}"
-                                        if len(parts) > 3:
-                                            source = parts[3]
-                                            message = ' '.join(parts[4:]) if len(parts) > 4 else ''
-                                
-                                # Detect level từ message
-                                message_lower = message.lower()
-                                if any(word in message_lower for word in ['error', 'failed', 'fatal', 'critical']):
-                                    level = 'error'
-                                elif any(word in message_lower for word in ['warn', 'warning']):
-                                    level = 'warning'
-                                
-                                # Extract category/module từ message hoặc source
-                                if not category and source:
-                                    category = source.split('[')[0] if '[' in source else source
-                                
-                                all_parsed_logs.append({
-                                    'time': timestamp_str or str(timezone.now().timestamp()),
-                                    'level': level,
-                                    'category': category[:100] or log_file.split('/')[-1].replace('.log', ''),
-                                    'source': source[:200] or 'system',
-                                    'message': message[:500] or line.strip()[:500],
-                                })
-                            else:
-                                # Nếu không parse được, lưu nguyên dòng
-                                all_parsed_logs.append({
-                                    'time': str(timezone.now().timestamp()),
-                                    'level': 'info',
-                                    'category': log_file.split('/')[-1].replace('.log', ''),
-                                    'source': 'system',
-                                    'message': line.strip()[:500],
-                                })
-                    
-                    if all_parsed_logs:
-                        logger.info(f"Successfully read {len(all_parsed_logs)} logs from {log_file}")
-                        # Giới hạn số lượng logs
-                        return all_parsed_logs[-limit:] if len(all_parsed_logs) > limit else all_parsed_logs
-            except SynologyAPIError as e:
-                logger.warning(f"Could not read log file {log_file}: {str(e)}")
-                continue
-            except Exception as e:
-                logger.warning(f"Error reading log file {log_file}: {str(e)}")
-                continue
-        
-        if all_parsed_logs:
-            logger.info(f"Successfully got {len(all_parsed_logs)} logs from log files")
-            return all_parsed_logs[-limit:] if len(all_parsed_logs) > limit else all_parsed_logs
-        
-        # Fallback: Thử các API cũ cho DSM 6 hoặc các trường hợp đặc biệt
-        logger.info("FileStation log files not available, trying legacy APIs...")
-        logs = []
-        
-        # Lưu SID hiện tại
-        original_sid = self.sid
-        
-        # Thử đăng nhập với session SYNO.Core.EventLog nếu chưa có
-        try:
-            logger.info("Trying to login with SYNO.Core.EventLog session...")
-            params = {
-                'api': 'SYNO.API.Auth',
-                'version': '3',
-                'method': 'login',
-                'account': self.nas_config.username,
-                'passwd': self.nas_config.password,
-                'session': 'SYNO.Core.EventLog',
-                'format': 'sid'
-            }
-            data = self._request('auth.cgi', 'GET', params)
-            eventlog_sid = data.get('data', {}).get('sid')
-            if eventlog_sid:
-                self.sid = eventlog_sid
-                logger.info("Logged in with SYNO.Core.EventLog session")
-        except Exception as e:
-            logger.warning(f"Could not login with SYNO.Core.EventLog session: {str(e)}")
-            # Giữ nguyên SID cũ
-            self.sid = original_sid
+                logger.warning(f"Cached log endpoint {self.describe_endpoint(cached)} failed: {str(e)}, probing again")
+                capabilities.forget(nas_id, 'logs')
         
-        # Thử API SYNO.Core.EventLog version 1 (API chính cho Log Center)
-        try:
-            logger.info("Trying SYNO.Core.EventLog v1 with method 'list'...")
-            params = {
-                'api': 'SYNO.Core.EventLog',
-                'version': '1',
-                'method': 'list',
-                'limit': limit,
-                'offset': 0
-            }
-            if level:
-                params['level'] = level
-            data = self._request('entry.cgi', 'GET', params)
-            events = data.get('data', {}).get('events', [])
-            logger.info(f"SYNO.Core.EventLog v1 returned {len(events)} events")
-            if events:
-                for event in events:
-                    logs.append({
-                        'level': event.get('level', 'info').lower(),
-                        'category': event.get('category', '') or event.get('program', ''),
-                        'message': event.get('message', '') or event.get('msg', ''),
-                        'source': event.get('host_name', '') or event.get('source', '') or event.get('program', ''),
-                        'time': str(event.get('time', 0)) or str(event.get('timestamp', 0))
-                    })
+        for endpoints in (self._log_endpoints, self._ai_log_endpoints):
+            for endpoint in endpoints():
+                name = self.describe_endpoint(endpoint)
+                try:
+                    logger.info(f"Trying {name}...")
+                    logs = self._fetch_logs(endpoint, limit, level, offset)
+                except Exception as e:
+                    logger.warning(f"{name} failed: {str(e)}")
+                    continue
                 if logs:
-                    logger.info(f"Successfully got {len(logs)} logs from SYNO.Core.EventLog v1")
-                    # Khôi phục SID cũ
-                    self.sid = original_sid
+                    logger.info(f"Successfully got {len(logs)} logs from {name}")
+                    capabilities.remember(nas_id, 'logs', endpoint)
                     return logs
-        except SynologyAPIError as e:
-            logger.warning(f"SYNO.Core.EventLog v1 failed: {str(e)}")
-            # Thử với method 'query' thay vì 'list'
-            try:
-                logger.info("Trying SYNO.Core.EventLog v1 with method 'query'...")
-                params = {
-                    'api': 'SYNO.Core.EventLog',
-                    'version': '1',
-                    'method': 'query',
-                    'limit': limit,
-                    'offset': 0
-                }
-                if level:
-                    params['level'] = level
-                data = self._request('entry.cgi', 'GET', params)
-                events = data.get('data', {}).get('events', [])
-                if events:
-                    for event in events:
-                        logs.append({
-                            'level': event.get('level', 'info').lower(),
-                            'category': event.get('category', '') or event.get('program', ''),
-                            'message': event.get('message', '') or event.get('msg', ''),
-                            'source': event.get('host_name', '') or event.get('source', '') or event.get('program', ''),
-                            'time': str(event.get('time', 0)) or str(event.get('timestamp', 0))
-                        })
-                    if logs:
-                        logger.info(f"Successfully got {len(logs)} logs from SYNO.Core.EventLog v1 (query)")
-                        self.sid = original_sid
-                        return logs
-            except Exception as e2:
-                logger.warning(f"SYNO.Core.EventLog v1 query also failed: {str(e2)}")
-        except Exception as e:
-            logger.warning(f"SYNO.Core.EventLog v1 error: {str(e)}")
-        
-        # Khôi phục SID cũ trước khi thử các API khác
-        self.sid = original_sid
         
-        # Thử API SYNO.Core.EventLog version 2
-        try:
-            logger.info("Trying SYNO.Core.EventLog v2...")
-            params = {
-                'api': 'SYNO.Core.EventLog',
-                'version': '2',
-                'method': 'list',
-                'limit': limit,
-                'offset': 0
-            }
-            if level:
-                params['level'] = level
-            data = self._request('entry.cgi', 'GET', params)
-            events = data.get('data', {}).get('events', [])
-            logger.info(f"SYNO.Core.EventLog v2 returned {len(events)} events")
-            if events:
-                for event in events:
-                    logs.append({
-                        'level': event.get('level', 'info').lower(),
-                        'category': event.get('category', '') or event.get('program', ''),
-                        'message': event.get('message', '') or event.get('msg', ''),
-                        'source': event.get('host_name', '') or event.get('source', '') or event.get('program', ''),
-                        'time': str(event.get('time', 0)) or str(event.get('timestamp', 0))
-                    })
-                if logs:
-                    logger.info(f"Successfully got {len(logs)} logs from SYNO.Core.EventLog v2")
-                    return logs
-        except SynologyAPIError as e:
-            logger.warning(f"SYNO.Core.EventLog v2 failed: {str(e)}")
-        except Exception as e:
-            logger.warning(f"SYNO.Core.EventLog v2 error: {str(e)}")
+        # Nếu không có API nào hoạt động
+        logger.error("Tất cả các API logs đều không hoạt động và không thể đọc file log!")
+        return []
+    
+    @staticmethod
+    def describe_endpoint(endpoint: Dict) -> str:
+        if 'file' in endpoint:
+            return f"log file {endpoint['file']}"
+        return f"{endpoint['api']} v{endpoint['version']} ({endpoint['method']})"
+    
+    def _fetch_logs(self, endpoint: Dict, limit: int, level: str, offset: int) -> List[Dict]:
+        """Gọi 1 endpoint lấy log và chuyển về format chung (time, level, category, source, message)"""
+        if 'file' in endpoint:
+            return self._read_log_file(endpoint['file'], limit, offset)
         
-        # Thử API SYNO.LogCenter.Log (Log Center package)
-        try:
-            logger.info("Trying SYNO.LogCenter.Log v1...")
-            params = {
-                'api': 'SYNO.LogCenter.Log',
-                'version': '1',
-                'method': 'list',
-                'limit': limit,
-                'offset': 0
-            }
-            if level:
-                params['level'] = level
-            data = self._request('entry.cgi', 'GET', params)
-            log_entries = data.get('data', {}).get('logs', []) or data.get('data', {}).get('events', [])
-            logger.info(f"SYNO.LogCenter.Log v1 returned {len(log_entries)} entries")
-            if log_entries:
-                for entry in log_entries:
-                    logs.append({
-                        'level': entry.get('level', 'info').lower(),
-                        'category': entry.get('category', '') or entry.get('program', ''),
-                        'message': entry.get('message', '') or entry.get('msg', ''),
-                        'source': entry.get('host_name', '') or entry.get('source', '') or entry.get('program', ''),
-                        'time': str(entry.get('time', 0)) or str(entry.get('timestamp', 0))
-                    })
-                if logs:
-                    logger.info(f"Successfully got {len(logs)} logs from SYNO.LogCenter.Log v1")
-                    return logs
-        except SynologyAPIError as e:
-            logger.warning(f"SYNO.LogCenter.Log v1 failed: {str(e)}")
-        except Exception as e:
-            logger.warning(f"SYNO.LogCenter.Log v1 error: {str(e)}")
+        params = {
+            'api': endpoint['api'],
+            'version': endpoint['version'],
+            'method': endpoint['method'],
+            'limit': limit,
+            'offset': offset,
+        }
+        if level and not endpoint['parser'].startswith('ai_'):
+            params['level'] = level  # info / warning / error
         
-        # Các API cũ (DSM 6) - chỉ thử nếu SYNO.Core.System.get_log không hoạt động
-        # Thử API SYNO.Core.EventLog (DSM 6)
-        try:
-            logger.info("Trying legacy SYNO.Core.EventLog v1 (DSM 6)...")
-            params = {
-                'api': 'SYNO.Core.EventLog',
-                'version': '1',
-                'method': 'list',
-                'limit': limit,
-                'offset': 0
-            }
-            if level:
-                params['level'] = level
-            data = self._request('entry.cgi', 'GET', params)
-            events = data.get('data', {}).get('events', [])
-            logger.info(f"SYNO.Core.EventLog v1 returned {len(events)} events")
-            if events and len(events) > 0:
-                parsed_logs = []
-                for event in events:
-                    if isinstance(event, dict):
-                        parsed_logs.append({
-                            'time': str(event.get('time', 0) or event.get('timestamp', 0) or timezone.now().timestamp()),
-                            'level': (event.get('level', 'info') or 'info').lower(),
-                            'category': str(event.get('category', '') or event.get('program', '') or 'event')[:100],
-                            'source': str(event.get('host_name', '') or event.get('source', '') or event.get('program', '') or 'system')[:200],
-                            'message': str(event.get('message', '') or event.get('msg', '') or str(event))[:500],
-                        })
-                    else:
-                        parsed_logs.append({
-                            'time': str(timezone.now().timestamp()),
-                            'level': 'info',
-                            'category': 'event',
-                            'source': 'system',
-                            'message': str(event)[:500],
-                        })
-                if parsed_logs:
-                    logger.info(f"Successfully got {len(parsed_logs)} logs from SYNO.Core.EventLog v1")
-                    return parsed_logs
-        except SynologyAPIError as e:
-            logger.warning(f"SYNO.Core.EventLog v1 failed: {str(e)}")
-        except Exception as e:
-            logger.warning(f"SYNO.Core.EventLog v1 error: {str(e)}")
+        path = endpoint.get('path', 'entry.cgi')
+        if endpoint.get('session'):
+            original_sid = self.sid
+            self._login_session(endpoint['session'])
+            try:
+                data = self._request(path, 'GET', params)
+            finally:
+                # Khôi phục SID cũ
+                self.sid = original_sid
+        else:
+            data = self._request(path, 'GET', params)
         
-        # Thử API SYNO.Core.System.Log
+        return LOG_PARSERS[endpoint['parser']](data)
+    
+    def _login_session(self, session: str):
+        """Đăng nhập thêm 1 session riêng (vd. SYNO.Core.EventLog), giữ SID cũ nếu không được"""
+        params = {
+            'api': 'SYNO.API.Auth',
+            'version': '3',
+            'method': 'login',
+            'account': self.nas_config.username,
+            'passwd': self.nas_config.password,
+            'session': session,
+            'format': 'sid'
+        }
         try:
-            logger.info("Trying SYNO.Core.System.Log v1...")
-            params = {
-                'api': 'SYNO.Core.System.Log',
-                'version': '1',
-                'method': 'list',
-                'limit': limit
-            }
-            if level:
-                params['level'] = level
-            data = self._request('entry.cgi', 'GET', params)
-            log_data = data.get('data', {}).get('logs', [])
-            logger.info(f"SYNO.Core.System.Log v1 returned {len(log_data)} logs")
-            if log_data:
-                logger.info(f"Successfully got {len(log_data)} logs from SYNO.Core.System.Log v1")
-                return log_data
-        except SynologyAPIError as e:
-            logger.warning(f"SYNO.Core.System.Log v1 failed: {str(e)}")
-        except Exception as e:
-            logger.warning(f"SYNO.Core.System.Log v1 error: {str(e)}")
+            data = self._request('auth.cgi', 'GET', params)
+        except SynologyAPIError:
+            return
+        self.sid = data.get('data', {}).get('sid') or self.sid
+    
+    def _read_log_file(self, log_file: str, limit: int, offset: int) -> List[Dict]:
+        """Đọc trực tiếp file log qua FileStation, lấy limit dòng gần nhất (bỏ qua offset dòng cuối)"""
+        file_content = self.download_file(log_file)
+        lines = file_content.decode('utf-8', errors='ignore').split('\n')
+        lines = lines[:len(lines) - offset] if offset else lines
+        recent_lines = lines[-limit:] if len(lines) > limit else lines
+        default_category = log_file.split('/')[-1].replace('.log', '')
         
-        # Thử các API SYNO.AI.Statistics.* nếu có
-        try:
-            all_apis = self.list_all_apis()
-            ai_stat_apis = [api for api in all_apis.keys() if api.startswith('SYNO.AI.Statistics') and 'Log' in api]
+        parsed_logs = []
+        for line in recent_lines:
+            if not line.strip():
+                continue
+            # Parse log line (format có thể khác nhau)
+            # Ví dụ: "2024-01-01 12:00:00 hostname module[pid]: message"
+            # Hoặc: "Jan  1 12:00:00 hostname module: message"
+            parts = line.strip().split()
+            if len(parts) < 3:
+                # Nếu không parse được, lưu nguyên dòng
+                parsed_logs.append({
+                    'time': str(timezone.now().timestamp()),
+                    'level': 'info',
+                    'category': default_category,
+                    'source': 'system',
+                    'message': line.strip()[:500],
+                })
+                continue
             
-            if ai_stat_apis:
-                logger.info(f"Trying SYNO.AI.Statistics APIs: {', '.join(ai_stat_apis[:3])}")
-                
-                # Thử SYNO.AI.Statistics.Admin.Log
-                if 'SYNO.AI.Statistics.Admin.Log' in ai_stat_apis:
-                    try:
-                        api_info = all_apis.get('SYNO.AI.Statistics.Admin.Log', {})
-                        max_ver = str(api_info.get('maxVersion', '1'))
-                        api_path = api_info.get('path', 'entry.cgi')
-                        logger.info(f"Trying SYNO.AI.Statistics.Admin.Log v{max_ver}...")
-                        
-                        # Thử method 'list' trước
-                        params = {
-                            'api': 'SYNO.AI.Statistics.Admin.Log',
-                            'version': max_ver,
-                            'method': 'list',
-                            'limit': limit,
-                            'offset': 0
-                        }
-                        data = self._request(api_path, 'GET', params)
-                        
-                        # Debug: log raw response để hiểu structure
-                        logger.debug(f"SYNO.AI.Statistics.Admin.Log raw response keys: {list(data.keys())}")
-                        if 'data' in data:
-                            logger.debug(f"data keys: {list(data['data'].keys()) if isinstance(data['data'], dict) else 'not dict'}")
-                        
-                        # Thử nhiều cách lấy logs
-                        ai_logs = []
-                        if isinstance(data.get('data'), list):
-                            ai_logs = data.get('data', []) if len(data.get('data', [])) > 0 else []
-                        elif isinstance(data.get('data'), dict):
-                            data_dict = data.get('data', {})
-                            # Kiểm tra các keys có thể chứa logs
-                            for key in ['logs', 'data', 'items', 'events']:
-                                if key in data_dict and isinstance(data_dict[key], list) and len(data_dict[key]) > 0:
-                                    ai_logs = data_dict[key]
-                                    break
-                        else:
-                            # Nếu data không phải dict hoặc list, thử lấy trực tiếp
-                            if isinstance(data.get('logs'), list) and len(data.get('logs', [])) > 0:
-                                ai_logs = data.get('logs', [])
-                            elif isinstance(data.get('data'), list) and len(data.get('data', [])) > 0:
-                                ai_logs = data.get('data', [])
-                        
-                        # Nếu không có, thử method 'get'
-                        if not ai_logs:
-                            try:
-                                params = {
-                                    'api': 'SYNO.AI.Statistics.Admin.Log',
-                                    'version': max_ver,
-                                    'method': 'get',
-                                    'limit': limit,
-                                    'offset': 0
-                                }
-                                data = self._request(api_path, 'GET', params)
-                                if isinstance(data.get('data'), list):
-                                    ai_logs = data.get('data', [])
-                                elif isinstance(data.get('data'), dict):
-                                    ai_logs = (data.get('data', {}).get('logs', []) or 
-                                              data.get('data', {}).get('data', []) or 
-                                              data.get('data', {}).get('items', []) or
-                                              data.get('data', {}).get('events', []))
-                                else:
-                                    ai_logs = data.get('logs', []) or data.get('data', [])
-                            except Exception as e:
-                                logger.warning(f"Method 'get' failed: {str(e)}")
-                        
-                        if ai_logs:
-                            logger.info(f"SYNO.AI.Statistics.Admin.Log returned {len(ai_logs)} logs")
-                            # Convert format
-                            converted_logs = []
-                            for entry in ai_logs:
-                                if isinstance(entry, dict):
-                                    # Thử nhiều field names khác nhau
-                                    level_raw = (entry.get('level') or entry.get('severity') or 
-                                                entry.get('log_level') or 'info')
-                                    level = level_raw.lower() if isinstance(level_raw, str) else 'info'
-                                    if level not in ['info', 'warning', 'error', 'critical', 'debug']:
-                                        level = 'info'
-                                    
-                                    category = (entry.get('category') or entry.get('type') or 
-                                               entry.get('module') or entry.get('component') or 
-                                               'AI.Statistics.Admin')
-                                    
-                                    message = (entry.get('message') or entry.get('content') or 
-                                              entry.get('description') or entry.get('text') or
-                                              entry.get('log') or str(entry))
-                                    
-                                    source = (entry.get('source') or entry.get('user') or 
-                                             entry.get('username') or entry.get('account') or
-                                             entry.get('host') or entry.get('ip') or
-                                             'AI.Statistics')
-                                    
-                                    timestamp = (entry.get('time') or entry.get('timestamp') or 
-                                                entry.get('date') or entry.get('created_at') or
-                                                entry.get('datetime') or entry.get('time_stamp') or
-                                                str(timezone.now().timestamp()))
-                                    
-                                    converted_logs.append({
-                                        'level': level,
-                                        'category': str(category)[:100],  # Giới hạn độ dài
-                                        'message': str(message)[:500],  # Giới hạn độ dài
-                                        'source': str(source)[:200],  # Giới hạn độ dài
-                                        'time': str(timestamp)
-                                    })
-                                else:
-                                    # Nếu entry không phải dict, convert thành string
-                                    converted_logs.append({
-                                        'level': 'info',
-                                        'category': 'AI.Statistics.Admin',
-                                        'message': str(entry)[:500],
-                                        'source': 'AI.Statistics',
-                                        'time': str(timezone.now().timestamp())
-                                    })
-                            
-                            if converted_logs:
-                                logger.info(f"Successfully got {len(converted_logs)} logs from SYNO.AI.Statistics.Admin.Log")
-                                return converted_logs
-                    except Exception as e:
-                        logger.warning(f"SYNO.AI.Statistics.Admin.Log failed: {str(e)}")
-                
-                # Thử SYNO.AI.Statistics.Request.Log
-                if 'SYNO.AI.Statistics.Request.Log' in ai_stat_apis:
-                    try:
-                        api_info = all_apis.get('SYNO.AI.Statistics.Request.Log', {})
-                        max_ver = str(api_info.get('maxVersion', '1'))
-                        api_path = api_info.get('path', 'entry.cgi')
-                        logger.info(f"Trying SYNO.AI.Statistics.Request.Log v{max_ver}...")
-                        
-                        # Thử method 'list' trước
-                        params = {
-                            'api': 'SYNO.AI.Statistics.Request.Log',
-                            'version': max_ver,
-                            'method': 'list',
-                            'limit': limit,
-                            'offset': 0
-                        }
-                        data = self._request(api_path, 'GET', params)
-                        
-                        # Debug: log raw response để hiểu structure
-                        logger.debug(f"SYNO.AI.Statistics.Request.Log raw response keys: {list(data.keys())}")
-                        if 'data' in data:
-                            logger.debug(f"data keys: {list(data['data'].keys()) if isinstance(data['data'], dict) else 'not dict'}")
-                        
-                        # Thử nhiều cách lấy logs
-                        ai_logs = []
-                        if isinstance(data.get('data'), list):
-                            ai_logs = data.get('data', []) if len(data.get('data', [])) > 0 else []
-                        elif isinstance(data.get('data'), dict):
-                            data_dict = data.get('data', {})
-                            # Kiểm tra các keys có thể chứa logs
-                            for key in ['logs', 'data', 'items', 'events']:
-                                if key in data_dict and isinstance(data_dict[key], list) and len(data_dict[key]) > 0:
-                                    ai_logs = data_dict[key]
-                                    break
-                        else:
-                            # Nếu data không phải dict hoặc list, thử lấy trực tiếp
-                            if isinstance(data.get('logs'), list) and len(data.get('logs', [])) > 0:
-                                ai_logs = data.get('logs', [])
-                            elif isinstance(data.get('data'), list) and len(data.get('data', [])) > 0:
-                                ai_logs = data.get('data', [])
-                        
-                        # Nếu không có, thử method 'get'
-                        if not ai_logs:
-                            try:
-                                params = {
-                                    'api': 'SYNO.AI.Statistics.Request.Log',
-                                    'version': max_ver,
-                                    'method': 'get',
-                                    'limit': limit,
-                                    'offset': 0
-                                }
-                                data = self._request(api_path, 'GET', params)
-                                if isinstance(data.get('data'), list):
-                                    ai_logs = data.get('data', [])
-                                elif isinstance(data.get('data'), dict):
-                                    ai_logs = (data.get('data', {}).get('logs', []) or 
-                                              data.get('data', {}).get('data', []) or 
-                                              data.get('data', {}).get('items', []) or
-                                              data.get('data', {}).get('events', []))
-                                else:
-                                    ai_logs = data.get('logs', []) or data.get('data', [])
-                            except Exception as e:
-                                logger.warning(f"Method 'get' failed: {str(e)}")
-                        
-                        if ai_logs and len(ai_logs) > 0:
-                            logger.info(f"SYNO.AI.Statistics.Request.Log returned {len(ai_logs)} logs")
-                            # Convert format
-                            converted_logs = []
-                            for entry in ai_logs:
-                                if isinstance(entry, dict):
-                                    converted_logs.append({
-                                        'level': 'info',  # Request logs thường là info
-                                        'category': entry.get('category', '') or entry.get('type', '') or 'AI.Request',
-                                        'message': str(entry.get('message', '')) or str(entry.get('content', '')) or str(entry.get('request', '')) or str(entry),
-                                        'source': entry.get('source', '') or entry.get('ip', '') or entry.get('client_ip', '') or 'AI.Request',
-                                        'time': str(entry.get('time', 0)) or str(entry.get('timestamp', 0)) or str(entry.get('date', '')) or str(entry.get('created_at', ''))
-                                    })
-                                else:
-                                    converted_logs.append({
-                                        'level': 'info',
-                                        'category': 'AI.Request',
-                                        'message': str(entry),
-                                        'source': 'AI.Request',
-                                        'time': str(timezone.now().timestamp())
-                                    })
-                            
-                            if converted_logs:
-                                logger.info(f"Successfully got {len(converted_logs)} logs from SYNO.AI.Statistics.Request.Log")
-                                return converted_logs
-                    except Exception as e:
-                        logger.warning(f"SYNO.AI.Statistics.Request.Log failed: {str(e)}")
-        except Exception as e:
-            logger.warning(f"Error trying SYNO.AI.Statistics APIs: {str(e)}")
-        
-        # Nếu không có API nào hoạt động
-        logger.error("Tất cả các API logs đều không hoạt động và không thể đọc file log!")
-        return []
+            timestamp_str = ''
+            level = 'info'
+            category = ''
+            source = ''
+            message = line.strip()
+            
+            # Format 1: "2024-01-01T12:00:00" hoặc "2024-01-01 12:00:00"
+            # Format 2: "Jan  1 12:00:00"
+            if '-' in parts[0] and ':' in parts[1]:
+                timestamp_str = f"{parts[0]} {parts[1]}"
+                message = ' '.join(parts[2:])
+            elif len(parts) >= 4 and ':' in parts[2]:
+                timestamp_str = f"{parts[0]} {parts[1]} {parts[2]}"
+                source = parts[3]
+                message = ' '.join(parts[4:]) if len(parts) > 4 else ''
+            
+            # Detect level từ message
+            message_lower = message.lower()
+            if any(word in message_lower for word in ['error', 'failed', 'fatal', 'critical']):
+                level = 'error'
+            elif any(word in message_lower for word in ['warn', 'warning']):
+                level = 'warning'
+            
+            # Extract category/module từ source
+            if source:
+                category = source.split('[')[0] if '[' in source else source
+            
+            parsed_logs.append({
+                'time': timestamp_str or str(timezone.now().timestamp()),
+                'level': level,
+                'category': category[:100] or default_category,
+                'source': source[:200] or 'system',
+                'message': message[:500] or line.strip()[:500],
+            })
+        return parsed_logs
     
     def list_files(self, folder_path: str = '/', limit: int = 1000) -> List[Dict]:
         """Liệt kê files trong folder"""
@@ -844,68 +666,106 @@ class SynologyAPIClient:
         except Exception as e:
             raise SynologyAPIError(f"Failed to list files: {str(e)}")
     
-    def upload_file(self, file_path: str, file_content: bytes, overwrite: bool = True) -> bool:
-        """Upload file lên NAS"""
+    def upload_stream(self, folder_path: str, fileobj, file_name: str, file_size: int,
+                      overwrite: bool = True, progress=None) -> bool:
+        """
+        Upload file lên NAS, đọc dần từ file-like object (vd: UploadedFile) nên không load cả file vào RAM
+        progress: callback(bytes_sent, total_bytes) được gọi sau mỗi chunk
+        """
+        fields = {
+            'api': 'SYNO.FileStation.Upload',
+            'version': '2',
+            'method': 'upload',
+            'path': folder_path,
+            'overwrite': 'true' if overwrite else 'false',
+            'create_parents': 'true',
+        }
+        upload_url = f"{self.base_url}/webapi/entry.cgi"
+        
         try:
-            # Tạo upload URL
-            params = {
-                'api': 'SYNO.FileStation.Upload',
-                'version': '2',
-                'method': 'upload',
-                'path': file_path,
-                'overwrite': 'true' if overwrite else 'false',
-                'create_parents': 'true'
-            }
-            
-            # Upload file
-            upload_url = f"{self.base_url}/webapi/entry.cgi"
-            files = {'file': file_content}
-            params['_sid'] = self.sid
-            
-            response = self.session.post(upload_url, data=params, files=files, timeout=300)
-            response.raise_for_status()
-            data = response.json()
-            
-            return data.get('success', False)
-            
+            for attempt in range(2):
+                fields['_sid'] = self.sid
+                body = MultipartFileStream(fields, 'file', file_name, fileobj, file_size, progress=progress)
+                response = self.session.post(
+                    upload_url, data=body, headers={'Content-Type': body.content_type}, timeout=300
+                )
+                response.raise_for_status()
+                data = response.json()
+                
+                # SID hết hạn: đăng nhập lại và gửi lại từ đầu nếu đọc lại được file
+                error_code = data.get('error', {}).get('code', 0)
+                if attempt == 0 and error_code in SID_EXPIRED_CODES and fileobj.seekable():
+                    fileobj.seek(0)
+                    self.sid = None
+                    self.login()
+                    continue
+                return data.get('success', False)
+        except SynologyAPIError:
+            raise
         except Exception as e:
             raise SynologyAPIError(f"Failed to upload file: {str(e)}")
     
-    def download_file(self, file_path: str) -> bytes:
-        """Download file từ NAS"""
-        try:
-            # Thử method 'download' trước
-            params = {
-                'api': 'SYNO.FileStation.Download',
-                'version': '2',
-                'method': 'download',
-                'path': file_path,
-                'mode': 'download'
-            }
-            
-            download_url = f"{self.base_url}/webapi/entry.cgi"
-            params['_sid'] = self.sid
-            
-            response = self.session.get(download_url, params=params, stream=True, timeout=300)
-            
-            # Nếu 404, thử method 'get' với format text
-            if response.status_code == 404:
+    def upload_file(self, file_path: str, file_content: bytes, overwrite: bool = True, file_name: str = 'file') -> bool:
+        """Upload file lên NAS từ bytes (file lớn nên dùng upload_stream)"""
+        return self.upload_stream(file_path, io.BytesIO(file_content), file_name, len(file_content), overwrite=overwrite)
+    
+    def open_download(self, file_path: str, range_header: str = None) -> requests.Response:
+        """
+        Mở stream download file từ NAS (chưa đọc nội dung)
+        range_header: header Range của client để tải tiếp (NAS trả về 206 nếu hỗ trợ)
+        Người gọi phải đọc hết hoặc close() response
+        """
+        headers = {'Range': range_header} if range_header else {}
+        download_url = f"{self.base_url}/webapi/entry.cgi"
+        for attempt in range(2):
+            try:
+                # Thử method 'download' trước
                 params = {
                     'api': 'SYNO.FileStation.Download',
                     'version': '2',
-                    'method': 'get',
+                    'method': 'download',
                     'path': file_path,
-                    'mode': 'open'
+                    'mode': 'download',
+                    '_sid': self.sid,
                 }
-                params['_sid'] = self.sid
-                response = self.session.get(download_url, params=params, stream=True, timeout=300)
-            
-            response.raise_for_status()
+                response = self.session.get(download_url, params=params, headers=headers, stream=True, timeout=300)
+                
+                # Nếu 404, thử method 'get' với format text
+                if response.status_code == 404:
+                    response.close()
+                    params.update({'method': 'get', 'mode': 'open'})
+                    response = self.session.get(download_url, params=params, headers=headers, stream=True, timeout=300)
+                
+                # 416 (Range không hợp lệ) trả nguyên cho client
+                if response.status_code != 416:
+                    response.raise_for_status()
+            except requests.exceptions.RequestException as e:
+                raise SynologyAPIError(f"Failed to download file: {str(e)}")
             
+            # Khi lỗi DSM trả về JSON thay vì nội dung file
+            if 'application/json' not in response.headers.get('Content-Type', ''):
+                return response
+            try:
+                data = response.json()
+            except ValueError:
+                data = {}
+            finally:
+                response.close()
+            error_code = data.get('error', {}).get('code', 0)
+            # SID hết hạn (session bị DSM hủy khi client vẫn nằm trong pool): đăng nhập lại và thử 1 lần nữa
+            if attempt == 0 and error_code in SID_EXPIRED_CODES:
+                self.sid = None
+                self.login()
+                continue
+            raise SynologyAPIError(f"Failed to download file: API Error {error_code}", code=error_code)
+    
+    def download_file(self, file_path: str) -> bytes:
+        """Download toàn bộ file từ NAS vào bộ nhớ (file lớn nên dùng open_download)"""
+        response = self.open_download(file_path)
+        try:
             return response.content
-            
-        except Exception as e:
-            raise SynologyAPIError(f"Failed to download file: {str(e)}")
+        finally:
+            response.close()
     
     def create_folder(self, folder_path: str, name: str, force_parent: bool = True) -> bool:
         """Tạo folder mới"""
@@ -1,3 +1,114 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.core.cache import cache
 from django.test import TestCase
+from django.utils import timezone
+
+from nas_management import capabilities, jobs, rollups
+from nas_management.models import LogImportJob, NASConfig, NASLog, NASLogDailyRollup
+from nas_management.synology_api import SynologyAPIClient, SynologyAPIError
+
+
+class FailStaleJobsTests(TestCase):
+    """Chỉ đánh dấu lỗi job mà worker không còn báo sống, không đụng job chạy lâu nhưng worker vẫn sống"""
+
+    def test_reaps_by_heartbeat(self):
+        nas = NASConfig.objects.create(name='NAS', host='10.0.0.1', username='admin', password='x')
+        now = timezone.now()
+        started = now - timedelta(hours=2)
+        alive = LogImportJob.objects.create(nas=nas, job_type='sync', status='running', started_at=started, heartbeat_at=now)
+        dead = LogImportJob.objects.create(nas=nas, job_type='sync', status='running', started_at=started, heartbeat_at=started)
+        # Job tạo trước khi có heartbeat_at
+        legacy = LogImportJob.objects.create(nas=nas, job_type='csv', status='running', started_at=started)
+
+        self.assertEqual(jobs.fail_stale_jobs(timedelta(minutes=5)), 2)
+        statuses = dict(LogImportJob.objects.values_list('id', 'status'))
+        self.assertEqual(statuses, {alive.id: 'running', dead.id: 'failed', legacy.id: 'failed'})
+
+    def test_worker_reaps_when_idle(self):
+        """Worker đang chạy cũng dọn job treo mỗi lần rảnh, không chỉ lúc khởi động"""
+        from nas_management.management.commands.run_workers import _worker_loop
+
+        nas = NASConfig.objects.create(name='NAS', host='10.0.0.1', username='admin', password='x')
+        started = timezone.now() - timedelta(hours=2)
+        dead = LogImportJob.objects.create(nas=nas, job_type='sync', status='running', started_at=started, heartbeat_at=started)
+
+        with mock.patch('nas_management.management.commands.run_workers.connections'):
+            _worker_loop(0, True, timedelta(minutes=5))
+        dead.refresh_from_db()
+        self.assertEqual(dead.status, 'failed')
+
+
+class DeleteLogsTests(TestCase):
+    """Xóa log ngoài import/đồng bộ (vd. trong admin) thì thống kê theo ngày được tính lại"""
+
+    def test_rollups_refreshed(self):
+        nas = NASConfig.objects.create(name='NAS', host='10.0.0.1', username='admin', password='x')
+        now = timezone.now()
+        logs = [
+            NASLog.objects.create(nas=nas, log_type='syslog', level=level, message=f'log {index}', timestamp=now)
+            for index, level in enumerate(['info', 'info', 'error'])
+        ]
+        rollups.refresh_for_logs(logs)
+
+        self.assertEqual(rollups.delete_logs(NASLog.objects.filter(level='info')), 2)
+        counts = dict(NASLogDailyRollup.objects.values_list('level', 'log_count'))
+        self.assertEqual(counts, {'error': 1})
+
+
+class CapabilitiesTests(TestCase):
+    """forget() tăng version trong database nên cache cũ của mọi process đều bị bỏ"""
+
+    def test_forget_invalidates_other_processes(self):
+        nas = NASConfig.objects.create(name='NAS', host='10.0.0.1', username='admin', password='x')
+        capabilities.remember(nas.id, 'logs', {'api': 'SYNO.Core.SyslogClient.Log'})
+        stale_key = capabilities._key(nas.id, 'logs')
+
+        # Process khác: cache của process này vẫn còn nguyên khóa cũ, chỉ version trong database đổi
+        capabilities.forget(nas.id)
+        self.assertIsNotNone(cache.get(stale_key))
+        self.assertIsNone(capabilities.get(nas.id, 'logs'))
+
+
+class OpenDownloadTests(TestCase):
+    """SID hết hạn khi tải file: đăng nhập lại và thử đúng 1 lần"""
+
+    def _response(self, error_code=None):
+        response = mock.Mock(status_code=200)
+        if error_code is None:
+            response.headers = {'Content-Type': 'application/octet-stream'}
+        else:
+            response.headers = {'Content-Type': 'application/json'}
+            response.json.return_value = {'success': False, 'error': {'code': error_code}}
+        return response
+
+    def _api(self):
+        nas = NASConfig.objects.create(name='NAS', host='10.0.0.1', username='admin', password='x')
+        api = SynologyAPIClient(nas)
+        api.sid = 'expired'
+        api.session = mock.Mock()
+        return api
+
+    def test_relogin_on_expired_sid(self):
+        api = self._api()
+        content = self._response()
+        api.session.get.side_effect = [self._response(119), content]
+
+        def login():
+            api.sid = 'fresh'
+            return True
+
+        with mock.patch.object(api, 'login', side_effect=login) as login_mock:
+            self.assertIs(api.open_download('/share/a.log'), content)
+        login_mock.assert_called_once()
+        self.assertEqual(api.session.get.call_args.kwargs['params']['_sid'], 'fresh')
 
-# Create your tests here.
+    def test_retries_only_once(self):
+        api = self._api()
+        api.session.get.side_effect = [self._response(119), self._response(119)]
+        with mock.patch.object(api, 'login', return_value=True) as login_mock:
+            with self.assertRaises(SynologyAPIError) as raised:
+                api.open_download('/share/a.log')
+        self.assertEqual(raised.exception.code, 119)
+        login_mock.assert_called_once()
@@ -14,6 +14,7 @@ urlpatterns = [
     path('logs/dashboard/filexferlog/', views.filexferlog_dashboard, name='filexferlog_dashboard'),
     path('logs/sync/<int:nas_id>/', views.sync_logs, name='sync_logs'),
     path('logs/upload-csv/', views.upload_logs_csv, name='upload_logs_csv'),
+    path('logs/jobs/<int:job_id>/', views.import_job_status, name='import_job_status'),
     path('logs/clear-all/', views.clear_all_logs, name='clear_all_logs'),
     path('files/', views.file_manager, name='file_manager'),
     path('files/upload/<int:nas_id>/', views.upload_file, name='upload_file'),
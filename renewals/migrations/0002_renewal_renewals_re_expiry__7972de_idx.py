@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:14
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('equipment', '0009_equipment_equipment_e_created_98bee5_idx'),
+        ('renewals', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='renewal',
+            index=models.Index(fields=['expiry_date', 'id'], name='renewals_re_expiry__7972de_idx'),
+        ),
+    ]
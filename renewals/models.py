@@ -113,6 +113,9 @@ class Renewal(models.Model):
         verbose_name = "Gia hạn dịch vụ"
         verbose_name_plural = "Gia hạn dịch vụ"
         ordering = ['expiry_date', 'renewal_type']
+        indexes = [
+            models.Index(fields=['expiry_date', 'id']),
+        ]
     
     def __str__(self):
         return f"{self.name} ({self.renewal_type.name})"
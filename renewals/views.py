@@ -3,7 +3,6 @@ from django.contrib.auth.decorators import login_required
 from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib import messages
 from django.contrib.auth.models import User
-from django.core.paginator import Paginator
 from django.db.models import Q, Count
 from django.utils import timezone
 from django.http import JsonResponse
@@ -11,6 +10,7 @@ from django.views.decorators.http import require_http_methods
 from datetime import timedelta
 from .models import Renewal, RenewalType, RenewalHistory
 from .forms import RenewalForm, RenewalHistoryForm
+from equipment_management.pagination import KeysetPaginator
 
 
 @login_required
@@ -53,13 +53,9 @@ def renewal_list(request):
             status='active'
         )
     
-    # Sắp xếp theo ngày hết hạn
-    renewals = renewals.order_by('expiry_date', 'renewal_type')
-    
-    # Pagination
-    paginator = Paginator(renewals, 20)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    # Pagination: keyset theo ngày hết hạn (id để phân biệt các dịch vụ cùng ngày)
+    paginator = KeysetPaginator(renewals, 20, ordering=('expiry_date', 'id'))
+    page_obj = paginator.get_page(request.GET.get('cursor'))
     
     # Statistics
     total_count = Renewal.objects.count()
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Company, Department, TicketCategory, Ticket, TicketComment, TicketAttachment
+from .models import Company, Department, TicketCategory, Ticket, TicketComment, TicketAttachment, TicketDailyCounter
 
 
 @admin.register(Company)
@@ -76,3 +76,9 @@ class TicketAttachmentAdmin(admin.ModelAdmin):
     list_filter = ['created_at']
     search_fields = ['filename', 'ticket__ticket_number']
     raw_id_fields = ['ticket', 'uploaded_by']
+
+
+@admin.register(TicketDailyCounter)
+class TicketDailyCounterAdmin(admin.ModelAdmin):
+    list_display = ['day', 'last_value']
+    date_hierarchy = 'day'
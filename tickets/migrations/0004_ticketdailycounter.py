@@ -0,0 +1,45 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:55
+
+import re
+from datetime import datetime
+
+from django.db import migrations, models
+
+
+def seed_daily_counters(apps, schema_editor):
+    """Khởi tạo số thứ tự từng ngày bằng số lớn nhất trong các ticket đã có (TICKET-YYYYMMDD-XXX)"""
+    Ticket = apps.get_model('tickets', 'Ticket')
+    TicketDailyCounter = apps.get_model('tickets', 'TicketDailyCounter')
+    pattern = re.compile(r'^TICKET-(\d{8})-(\d+)$')
+    last_values = {}
+    for ticket_number in Ticket.objects.values_list('ticket_number', flat=True).iterator():
+        match = pattern.match(ticket_number)
+        if match:
+            day = datetime.strptime(match.group(1), '%Y%m%d').date()
+            last_values[day] = max(last_values.get(day, 0), int(match.group(2)))
+    TicketDailyCounter.objects.bulk_create(
+        [TicketDailyCounter(day=day, last_value=value) for day, value in last_values.items()],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tickets', '0003_ticket_tickets_tic_created_821228_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TicketDailyCounter',
+            fields=[
+                ('day', models.DateField(primary_key=True, serialize=False, verbose_name='Ngày')),
+                ('last_value', models.PositiveIntegerField(default=0, verbose_name='Số đã cấp gần nhất')),
+            ],
+            options={
+                'verbose_name': 'Số thứ tự ticket',
+                'verbose_name_plural': 'Số thứ tự ticket',
+            },
+        ),
+        migrations.RunPython(seed_daily_counters, migrations.RunPython.noop),
+    ]
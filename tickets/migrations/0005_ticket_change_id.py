@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:22
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tickets', '0004_ticketdailycounter'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ticket',
+            name='change_id',
+            field=models.BigIntegerField(default=0, editable=False, verbose_name='Số thứ tự thay đổi'),
+        ),
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(fields=['change_id', 'id'], name='tickets_tic_change__1c0164_idx'),
+        ),
+    ]
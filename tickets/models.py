@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import connection, models, transaction
 from django.contrib.auth.models import User
 from django.utils import timezone
 
@@ -86,6 +86,39 @@ class TicketCategory(models.Model):
         return self.name
 
 
+class TicketDailyCounter(models.Model):
+    """Số thứ tự ticket trong ngày (TICKET-YYYYMMDD-XXX), tăng nguyên tử nên nhiều worker tạo ticket cùng lúc không bị trùng số"""
+    day = models.DateField(primary_key=True, verbose_name="Ngày")
+    last_value = models.PositiveIntegerField(default=0, verbose_name="Số đã cấp gần nhất")
+
+    class Meta:
+        verbose_name = "Số thứ tự ticket"
+        verbose_name_plural = "Số thứ tự ticket"
+
+    def __str__(self):
+        return f"{self.day}: {self.last_value}"
+
+    @classmethod
+    def next_value(cls, day):
+        """Tăng và trả về số thứ tự của ngày"""
+        if connection.vendor in ('sqlite', 'postgresql'):
+            # 1 câu upsert ... RETURNING (SQLite >= 3.35, PostgreSQL): 1 round-trip, khóa dòng của ngày trong lúc tăng
+            table = connection.ops.quote_name(cls._meta.db_table)
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f'INSERT INTO {table} (day, last_value) VALUES (%s, 1) '
+                    f'ON CONFLICT (day) DO UPDATE SET last_value = {table}.last_value + 1 '
+                    f'RETURNING last_value',
+                    [connection.ops.adapt_datefield_value(day)],
+                )
+                return cursor.fetchone()[0]
+
+        with transaction.atomic():
+            cls.objects.get_or_create(day=day)
+            cls.objects.filter(day=day).update(last_value=models.F('last_value') + 1)
+            return cls.objects.filter(day=day).values_list('last_value', flat=True).get()
+
+
 class Ticket(models.Model):
     """Ticket hỗ trợ IT"""
     PRIORITY_CHOICES = [
@@ -176,11 +209,17 @@ class Ticket(models.Model):
     
     # Đếm số lần lặp lại (để bổ sung loại yêu cầu nếu >3 lần/tháng)
     repeat_count = models.IntegerField(default=0, verbose_name="Số lần lặp lại trong tháng")
+    # Số thứ tự thay đổi cho đồng bộ delta của mobile app (xem api/sync.py)
+    change_id = models.BigIntegerField(default=0, editable=False, verbose_name="Số thứ tự thay đổi")
 
     class Meta:
         verbose_name = "Ticket hỗ trợ"
         verbose_name_plural = "Ticket hỗ trợ"
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-created_at', '-id']),
+            models.Index(fields=['change_id', 'id']),
+        ]
 
     def __str__(self):
         return f"{self.ticket_number} - {self.title}"
@@ -193,18 +232,8 @@ class Ticket(models.Model):
         if not self.ticket_number:
             # Tạo số ticket tự động: TICKET-YYYYMMDD-XXX
             today = timezone.now().date()
-            prefix = f"TICKET-{today.strftime('%Y%m%d')}"
-            last_ticket = Ticket.objects.filter(
-                ticket_number__startswith=prefix
-            ).order_by('-ticket_number').first()
-            
-            if last_ticket:
-                last_num = int(last_ticket.ticket_number.split('-')[-1])
-                new_num = last_num + 1
-            else:
-                new_num = 1
-            
-            self.ticket_number = f"{prefix}-{new_num:03d}"
+            new_num = TicketDailyCounter.next_value(today)
+            self.ticket_number = f"TICKET-{today.strftime('%Y%m%d')}-{new_num:03d}"
         
         # Tự động cập nhật resolved_at khi status = resolved
         if self.status == 'resolved' and not self.resolved_at:
@@ -1,3 +1,108 @@
-from django.test import TestCase
+import threading
+import time
+from datetime import date
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.db import OperationalError, connection, transaction
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+
+from .models import Company, Ticket, TicketDailyCounter
+
+
+class TicketNumberTests(TestCase):
+    """Số ticket TICKET-YYYYMMDD-XXX lấy từ TicketDailyCounter"""
+
+    def setUp(self):
+        self.company = Company.objects.create(name='Công ty A', code='A')
+        self.user = User.objects.create_user('requester')
+
+    def create_ticket(self, **kwargs):
+        return Ticket.objects.create(
+            title='Máy in không in được',
+            description='Máy in tầng 2 báo lỗi giấy',
+            requester_name='Nguyễn Văn A',
+            requester_email='a@example.com',
+            company=self.company,
+            requester=self.user,
+            **kwargs
+        )
+
+    def test_numbers_are_sequential_per_day(self):
+        prefix = f"TICKET-{timezone.now().date().strftime('%Y%m%d')}"
+        numbers = [self.create_ticket().ticket_number for _ in range(3)]
+        self.assertEqual(numbers, [f'{prefix}-001', f'{prefix}-002', f'{prefix}-003'])
+
+    def test_counter_continues_past_999(self):
+        today = timezone.now().date()
+        TicketDailyCounter.objects.create(day=today, last_value=999)
+        ticket = self.create_ticket()
+        self.assertEqual(ticket.ticket_number, f"TICKET-{today.strftime('%Y%m%d')}-1000")
+
+    def test_counters_are_independent_per_day(self):
+        self.assertEqual(TicketDailyCounter.next_value(date(2025, 1, 1)), 1)
+        self.assertEqual(TicketDailyCounter.next_value(date(2025, 1, 2)), 1)
+        self.assertEqual(TicketDailyCounter.next_value(date(2025, 1, 1)), 2)
+
+    def test_saving_existing_ticket_keeps_number(self):
+        ticket = self.create_ticket()
+        number = ticket.ticket_number
+        ticket.status = 'resolved'
+        ticket.save()
+        self.assertEqual(ticket.ticket_number, number)
+        self.assertEqual(TicketDailyCounter.objects.get().last_value, 1)
+
+
+class TicketNumberConcurrencyTests(TransactionTestCase):
+    """Nhiều thread (giống nhiều gunicorn worker) tạo ticket cùng lúc không bị trùng số"""
+    THREADS = 8
+    TICKETS_PER_THREAD = 10
+
+    @staticmethod
+    def create_with_retry(**kwargs):
+        """Database test SQLite (in-memory, shared cache) báo 'table is locked' ngay thay vì chờ như file/PostgreSQL: thử lại"""
+        for _ in range(200):
+            try:
+                with transaction.atomic():
+                    return Ticket.objects.create(**kwargs)
+            except OperationalError as e:
+                if 'locked' not in str(e):
+                    raise
+                time.sleep(0.005)
+        raise OperationalError('database vẫn bị khóa sau nhiều lần thử')
+
+    def test_concurrent_ticket_creation(self):
+        company = Company.objects.create(name='Công ty A', code='A')
+        user = User.objects.create_user('requester')
+        barrier = threading.Barrier(self.THREADS)
+        errors = []
+
+        def worker(index):
+            try:
+                barrier.wait()
+                for i in range(self.TICKETS_PER_THREAD):
+                    self.create_with_retry(
+                        title=f'Ticket {index}-{i}',
+                        description='Tạo từ stress test',
+                        requester_name='Stress test',
+                        requester_email='stress@example.com',
+                        company=company,
+                        requester=user,
+                    )
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(self.THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        total = self.THREADS * self.TICKETS_PER_THREAD
+        numbers = list(Ticket.objects.values_list('ticket_number', flat=True))
+        self.assertEqual(len(numbers), total)
+        self.assertEqual(len(set(numbers)), total)
+        self.assertEqual(TicketDailyCounter.objects.get().last_value, total)
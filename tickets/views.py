@@ -14,6 +14,10 @@ from django.urls import reverse
 from datetime import datetime, timedelta
 from .models import Ticket, TicketComment, TicketAttachment, Company, Department, TicketCategory
 from .forms import TicketForm, TicketUpdateForm, TicketCommentForm, TicketAttachmentForm
+from equipment_management.pagination import KeysetPaginator
+
+# Các field được phép sắp xếp danh sách ticket (không null, dùng làm khóa phân trang)
+TICKET_ORDER_FIELDS = ['created_at', 'updated_at', 'ticket_number', 'priority', 'status', 'title']
 
 
 def ticket_create(request):
@@ -118,14 +122,13 @@ def ticket_list(request):
     if not request.user.is_staff:
         tickets = tickets.filter(requester=request.user)
     
-    # Sắp xếp
+    # Sắp xếp + phân trang keyset (id để phân biệt các ticket cùng giá trị)
     order_by = request.GET.get('order_by', '-created_at')
-    tickets = tickets.order_by(order_by)
-    
-    # Phân trang
-    paginator = Paginator(tickets, 20)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    if order_by.lstrip('-') not in TICKET_ORDER_FIELDS:
+        order_by = '-created_at'
+    tie_breaker = '-id' if order_by.startswith('-') else 'id'
+    paginator = KeysetPaginator(tickets, 20, ordering=(order_by, tie_breaker))
+    page_obj = paginator.get_page(request.GET.get('cursor'))
     
     # Thống kê
     stats = {